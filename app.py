@@ -1,154 +1,273 @@
 import os
+import json
 import logging
 import uuid
-from flask import Flask, render_template, request, jsonify, session
+import hashlib
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, render_template, make_response, request, jsonify, session, Response, stream_with_context, g
 from dotenv import load_dotenv
-import google.generativeai as genai
-import mysql.connector
-from mysql.connector import Error
-from mysql.connector.pooling import MySQLConnectionPool
+from mysql.connector.errors import PoolError
+from dbpool import DatabaseUnavailable
+from fallback import render_fallback
+from singleflight import SingleFlight
+from breaker import CircuitOpenError
+from scheduler import ENDPOINT_PRIORITIES, INTERACTIVE, estimate_tokens, is_rate_limited, used_tokens
+from suggest import merge_suggestions, template_suggestions, ERROR_SUGGESTIONS
+from prompts import build_suggestion_prompt, parse_suggestions, build_recommendation_prompt
+from schema import migrate
+import metrics
+import services
+from services import INCOMPLETE_FORM_ERROR, RECOMMENDATION_ERROR, fallback_reason, sse_event
+from batch import advisor_authorized, build_batch_limiter, build_batch_runner, parse_profiles, BatchError
+from compression import decompress_text, choose_encoding, compress_body, compressible, MIN_RESPONSE_BYTES
+from history import summarize_recommendation, fetch_history_page, decode_cursor, MAX_PAGE_SIZE
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', '2f8b60bda6a957bc9415dcb4774887f2')
 
-# Ensure logs directory exists
-log_dir = os.path.join(os.path.dirname(__file__), 'logs')
-os.makedirs(log_dir, exist_ok=True)
-
-# Set up logging
-log_file = os.path.join(log_dir, 'app.log')
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()  # Also log to console
-    ]
-)
-logger = logging.getLogger(__name__)
-
 # Load environment variables
 load_dotenv()
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-# MySQL configuration - make it optional
-MYSQL_CONFIG = {
-    'host': os.getenv('MYSQL_HOST', 'localhost'),
-    'user': os.getenv('MYSQL_USER', 'root'),
-    'password': os.getenv('MYSQL_PASSWORD', 'root@123'),
-    'database': os.getenv('MYSQL_DB', 'college_mentor')
-}
+# Set up logging: records are queued and written as JSON lines by a background listener
+log_pipeline = services.setup_logging()
+logger = logging.getLogger(__name__)
 
-# Configure Gemini API
-model = None
-if GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')  # Use experimental model
-        logger.info("Gemini API configured successfully")
-    except Exception as e:
-        logger.error(f"Failed to configure Gemini API: {e}")
-        model = None
-else:
-    logger.warning("GEMINI_API_KEY not found in environment variables")
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-# Database connection pool - make it optional
+# Gemini clients, the MySQL pool and every component that owns a thread or socket are
+# created per worker by create_app(); importing this module opens no connections
+model = None
+recommendation_model = None
 db_pool = None
-try:
-    db_pool = MySQLConnectionPool(
-        pool_name="mentor_pool",
-        pool_size=5,
-        pool_reset_session=True,
-        **MYSQL_CONFIG
-    )
-    logger.info("MySQL connection pool initialized successfully")
-except Exception as e:
-    logger.warning(f"MySQL connection pool not available: {e}")
-    logger.info("Application will run without database persistence")
+branch_catalog = None
+suggestion_cache = None
+recommendation_cache = None
+suggestion_index = None
+recommendation_writer = None
+retention_job = None
+pregenerated_store = None
+pregeneration_job = None
+gemini_breakers = None
+gemini_scheduler = None
+refresh_executor = None
+batch_limiter = None
+worker_pid = None
+
+refreshing_keys = set()
+refreshing_lock = threading.Lock()
+
+# Identical prompts in flight at the same time share one Gemini call
+gemini_flight = SingleFlight()
 
 def get_db_connection():
-    """Get database connection with error handling"""
+    """Get database connection with error handling; returns None at once while MySQL is down"""
     try:
-        if db_pool:
+        with metrics.stage('db_connection_wait'):
             return db_pool.get_connection()
-        else:
-            return mysql.connector.connect(**MYSQL_CONFIG)
+    except DatabaseUnavailable:
+        return None
+    except PoolError as e:
+        metrics.POOL_EXHAUSTED.inc()
+        logger.error("Database connection failed: %s", e)
+        return None
     except Exception as e:
-        logger.error(f"Database connection failed: {e}")
+        logger.error("Database connection failed: %s", e)
         return None
 
-def initialize_database():
-    """Initialize database tables if they don't exist"""
+def create_app():
+    """App factory: set up this process's clients, pool and background threads, then return the app
+
+    gunicorn calls it from the post_fork hook in gunicorn.conf.py, so nothing
+    is shared across a fork when the app is preloaded in the master. Tables
+    are not created here; run schema.py (gunicorn.conf.py does it once at
+    startup). Calling it again in the same process is a no-op.
+    """
+    global log_pipeline, model, recommendation_model, db_pool, branch_catalog, suggestion_cache
+    global recommendation_cache, suggestion_index, recommendation_writer, retention_job
+    global pregenerated_store, pregeneration_job, gemini_breakers, gemini_scheduler, refresh_executor, batch_limiter
+    global worker_pid
+    if worker_pid == os.getpid():
+        return app
+    started = time.monotonic()
+    if log_pipeline.pid != os.getpid():
+        # The listener thread stayed behind in the preloading master
+        log_pipeline = services.setup_logging()
+
+    model, recommendation_model = services.build_gemini_models(GEMINI_API_KEY)
+
+    # Database connection pool - connections open lazily, so the app starts without MySQL
+    db_pool = services.build_connection_pool()
+    logger.info("MySQL connection pool configured with up to %s connections", db_pool.pool_size)
+
+    # Branch catalog - loaded once and reloaded in the background when the tables change
+    branch_catalog = services.build_branch_catalog(get_db_connection, load=False)
+
+    # Suggestion cache - in-process LRU plus an optional shared backend (sqlite or mysql)
+    suggestion_cache = services.build_suggestion_cache(get_db_connection)
+
+    # Recommendation cache keyed on a canonical (branch, year, interests, goals) profile
+    recommendation_cache = services.build_recommendation_cache(get_db_connection, warm=False)
+
+    # Local suggestion index built from submitted goals, snapshotted to disk so workers start warm
+    suggestion_index = services.build_local_suggestion_index(get_db_connection, load=False)
+
+    refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='suggestion-refresh')
+
+    # Concurrent batches share one call rate instead of each getting BATCH_RATE_LIMIT
+    batch_limiter = build_batch_limiter()
+
+    # Write-behind queue for recommendation inserts, spilling to disk while MySQL is down
+    recommendation_writer = services.build_recommendation_writer(get_db_connection)
+
+    # Old recommendations are archived to compressed files and dropped; off unless RETENTION_DAYS is set
+    retention_job = services.build_retention_job(get_db_connection)
+
+    # Circuit breakers with adaptive deadlines, tight for autocomplete and looser for recommendations
+    gemini_breakers = services.build_gemini_breakers()
+
+    # Every Gemini call is admitted against the project's request and token quotas first
+    gemini_scheduler = services.build_gemini_scheduler()
+    services.charge_hedges(model, recommendation_model, gemini_scheduler)
+
+    # Recommendations for popular profiles, generated off-peak; the job is off unless PREGEN_LIMIT is set
+    pregenerated_store = services.build_pregenerated_store(get_db_connection, load=False)
+    pregeneration_job = services.build_pregeneration_job(
+        get_db_connection, generate_content if model else None, get_branch_data, pregenerated_store
+    )
+
+    # MySQL is first read on this thread, so an unreachable server cannot stall the worker's boot
+    services.warm_up(get_db_connection, branch_catalog, recommendation_cache, suggestion_index, pregenerated_store)
+
+    worker_pid = os.getpid()
+    logger.info("Worker %s ready in %.2fs", worker_pid, time.monotonic() - started)
+    return app
+
+def gemini_model(endpoint):
+    """Model for an endpoint; recommendations use the one carrying the format as a system instruction"""
+    return recommendation_model if endpoint == 'recommendations' else model
+
+def call_model(prompt, deadline, endpoint, ticket):
+    """One timed Gemini call, recording token usage"""
+    with metrics.stage('gemini_generate', endpoint):
+        try:
+            gemini = gemini_model(endpoint)
+            response = gemini.generate_content(
+                prompt, request_options={'timeout': deadline}, **services.hedge_options(gemini, ticket)
+            )
+        except Exception as e:
+            if is_rate_limited(e):
+                gemini_scheduler.rate_limited()
+            raise
+    metrics.record_tokens(endpoint, response)
+    gemini_scheduler.settle(ticket, used_tokens(response))
+    return response
+
+def scheduled_call(prompt, endpoint, priority):
+    """Wait for quota in the caller's priority class, then call through the endpoint's circuit breaker"""
+    with metrics.stage('gemini_queue', endpoint):
+        ticket = gemini_scheduler.acquire(priority, estimate_tokens(prompt, endpoint))
     try:
-        conn = get_db_connection()
-        if not conn:
-            logger.warning("Database not available - skipping initialization")
-            return False
-        
-        cursor = conn.cursor()
-        
-        # Create tables if they don't exist
-        tables = [
-            '''CREATE TABLE IF NOT EXISTS electives (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                branch VARCHAR(255) NOT NULL,
-                prerequisites TEXT,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )''',
-            '''CREATE TABLE IF NOT EXISTS clubs (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                branch VARCHAR(255) NOT NULL,
-                description TEXT,
-                activities TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )''',
-            '''CREATE TABLE IF NOT EXISTS internships (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                branch VARCHAR(255) NOT NULL,
-                skills_required TEXT,
-                description TEXT,
-                company_type VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )''',
-            '''CREATE TABLE IF NOT EXISTS recommendations (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                session_id VARCHAR(255) NOT NULL,
-                branch VARCHAR(255) NOT NULL,
-                interests TEXT,
-                goals TEXT,
-                recommendation LONGTEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )'''
-        ]
-        
-        for table_sql in tables:
-            cursor.execute(table_sql)
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        logger.info("Database tables initialized successfully")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
-        return False
+        return gemini_breakers[endpoint].call(lambda deadline: call_model(prompt, deadline, endpoint, ticket))
+    except CircuitOpenError:
+        gemini_scheduler.settle(ticket, called=False)
+        raise
+
+def generate_content(prompt, endpoint, priority=None):
+    """Call Gemini through the scheduler and circuit breaker, coalescing identical concurrent prompts"""
+    priority = priority or ENDPOINT_PRIORITIES[endpoint]
+    key = f"{endpoint}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+    return gemini_flight.do(
+        key,
+        lambda: scheduled_call(prompt, endpoint, priority),
+        timeout=gemini_breakers[endpoint].max_deadline + gemini_scheduler.max_wait[priority] + 1
+    )
 
-# Initialize database on startup
-initialize_database()
+def gemini_status():
+    """Overall Gemini availability derived from the breaker states"""
+    return services.gemini_status(model, gemini_breakers)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None and request.endpoint:
+        metrics.REQUEST_SECONDS.labels(request.endpoint, str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip or brotli for complete JSON/HTML responses; streamed SSE and NDJSON pass through"""
+    if response.is_streamed or response.direct_passthrough:
+        return response
+    if not compressible(response.status_code, response.mimetype, response.headers):
+        return response
+    data = response.get_data()
+    if len(data) < MIN_RESPONSE_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if not encoding:
+        return response
+    response.set_data(compress_body(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The bytes differ per encoding, so only a weak validator still holds
+        response.set_etag(etag, weak=True)
+    return response
 
 # Route for homepage
 @app.route('/')
 def index():
     if 'session_id' not in session:
         session['session_id'] = str(uuid.uuid4())
-        logger.info(f"New session started: {session['session_id']}")
-    return render_template('index.html')
+        logger.info("New session started: %s", session['session_id'])
+    # Revalidated on every visit; an unchanged page costs a 304 instead of the full HTML
+    response = make_response(render_template('index.html'))
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def generate_suggestions(query):
+    """Ask Gemini for goal suggestions; returns None if the response could not be parsed"""
+    response = generate_content(build_suggestion_prompt(query), 'suggestions')
+
+    # Parse suggestions from the response
+    with metrics.stage('response_parse', 'suggestions'):
+        return parse_suggestions(response.text)
+
+def refresh_suggestions(field, query):
+    """Background task that fetches Gemini suggestions for a query into the cache and index"""
+    key = suggestion_cache.key(field, query)
+    try:
+        suggestions = generate_suggestions(query)
+        if suggestions is not None:
+            suggestion_cache.set(field, query, suggestions)
+            logger.info("Suggestions generated for %s: %s", field, query)
+            if field == 'goals':
+                # Low weight so goals students actually submit outrank generated ones
+                for suggestion in suggestions:
+                    suggestion_index.add(suggestion, weight=0.25)
+    except Exception as e:
+        logger.error("Background suggestion refresh failed: %s", e)
+    finally:
+        with refreshing_lock:
+            refreshing_keys.discard(key)
+
+def schedule_suggestion_refresh(field, query):
+    """Queue a background refresh unless one is already running for this key"""
+    key = suggestion_cache.key(field, query)
+    with refreshing_lock:
+        if key in refreshing_keys:
+            return
+        refreshing_keys.add(key)
+    refresh_executor.submit(refresh_suggestions, field, query)
 
 # Route to get autocomplete suggestions
 @app.route('/get_suggestions', methods=['POST'])
@@ -160,577 +279,370 @@ def get_suggestions():
         if not field or not query or len(query) < 2:
             return jsonify({'suggestions': []})
 
-        # Fallback suggestions if Gemini is not available
-        fallback_suggestions = {
-            'goals': [
-                f"Become a {query} specialist in leading tech companies",
-                f"Start an innovative {query} startup company",
-                f"Pursue advanced research in {query} field",
-                f"Work on cutting-edge {query} projects globally",
-                f"Lead {query} teams in Fortune 500 companies"
-            ]
-        }
+        # Local index first: answers from past goals without a network call
+        local = suggestion_index.search(query) if field == 'goals' else []
+        if len(local) >= 3:
+            return jsonify({'suggestions': local, 'source': 'local'})
 
         if not model:
             logger.warning("Gemini API not available, using fallback suggestions")
-            return jsonify({'suggestions': fallback_suggestions.get(field, [
-                "Explore career opportunities in your field",
-                "Build expertise through hands-on projects",
-                "Network with industry professionals",
-                "Pursue continuous learning and skill development",
-                "Consider leadership roles in your domain"
-            ])})
-
-        prompt = f"""
-        Generate 5 concise, relevant career goal suggestions for a college student interested in: '{query}'.
-        Focus on realistic, achievable career paths and professional development goals.
-        Return only a simple list format without any extra formatting or explanations.
-        Example format:
-        - Become a data scientist at a tech company
-        - Start a fintech startup
-        - Pursue PhD in machine learning
-        - Work as AI consultant for Fortune 500
-        - Lead data teams at innovative companies
-        """
-        
-        try:
-            response = model.generate_content(prompt)
-            suggestions_text = response.text.strip()
-            
-            # Parse suggestions from the response
-            suggestions = []
-            for line in suggestions_text.split('\n'):
-                line = line.strip()
-                if line and (line.startswith('-') or line.startswith('•') or line.startswith('*')):
-                    suggestion = line[1:].strip()
-                    if suggestion:
-                        suggestions.append(suggestion)
-            
-            # If parsing failed, use fallback
-            if len(suggestions) < 3:
-                suggestions = fallback_suggestions.get(field, [
-                    f"Specialize in {query} technology",
-                    f"Lead {query} projects in industry",
-                    f"Research and develop {query} solutions",
-                    f"Consult on {query} implementations",
-                    f"Build {query}-focused products"
-                ])
-            
-            logger.info(f"Suggestions generated for {field}: {query}")
-            return jsonify({'suggestions': suggestions[:5]})
-            
-        except Exception as api_error:
-            logger.error(f"Gemini API error: {api_error}")
-            return jsonify({'suggestions': fallback_suggestions.get(field, [
-                "Explore career opportunities in your field",
-                "Build expertise through hands-on projects",
-                "Network with industry professionals",
-                "Pursue continuous learning and development",
-                "Consider leadership roles in your domain"
-            ])})
+            metrics.FALLBACKS.labels('get_suggestions', 'no_model').inc()
+            return jsonify({'suggestions': merge_suggestions(local, template_suggestions(field, query, offline=True)), 'source': 'fallback'})
+
+        # Gemini answers cached earlier; a prefix match is returned now and refreshed in the background
+        cached, kind = suggestion_cache.get(field, query)
+        if cached is not None:
+            if kind == 'prefix':
+                schedule_suggestion_refresh(field, query)
+            return jsonify({'suggestions': merge_suggestions(local, cached), 'cached': kind, 'source': 'cache'})
+
+        # Unseen prefix: ask Gemini in the background and answer from the templates now
+        schedule_suggestion_refresh(field, query)
+        metrics.FALLBACKS.labels('get_suggestions', 'cache_miss').inc()
+        return jsonify({'suggestions': merge_suggestions(local, template_suggestions(field, query)), 'source': 'fallback'})
             
     except Exception as e:
-        logger.error(f"Error in get_suggestions: {e}")
-        return jsonify({'suggestions': [
-            "Explore your interests deeper",
-            "Build practical skills",
-            "Network with professionals",
-            "Gain hands-on experience",
-            "Consider interdisciplinary approaches"
-        ]})
-
-def get_branch_data(branch):
-    """Get branch-specific data from database with comprehensive fallbacks"""
-    electives = []
-    clubs = []
-    internships = []
-    
-    try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Get electives
-            cursor.execute("SELECT name, prerequisites, description FROM electives WHERE branch = %s", (branch,))
-            electives = [(row[0], row[1] or 'None', row[2] or '') for row in cursor.fetchall()]
-            
-            # Get clubs
-            cursor.execute("SELECT name, description, activities FROM clubs WHERE branch = %s", (branch,))
-            clubs = [(row[0], row[1] or '', row[2] or '') for row in cursor.fetchall()]
-            
-            # Get internships
-            cursor.execute("SELECT name, skills_required, description, company_type FROM internships WHERE branch = %s", (branch,))
-            internships = [(row[0], row[1] or '', row[2] or '', row[3] or '') for row in cursor.fetchall()]
-            
-            cursor.close()
-            conn.close()
-            
-    except Exception as e:
-        logger.error(f"Error fetching branch data: {e}")
-    
-    # Enhanced fallback data based on branch
-    if not electives:
-        if "Computer Science" in branch or "IT" in branch or "Software" in branch:
-            electives = [
-                ("Advanced Algorithms & Data Structures", "Basic programming, DSA fundamentals", "Deep dive into complex algorithms and optimization"),
-                ("Machine Learning & AI", "Statistics, Python programming", "Hands-on ML projects and AI applications"),
-                ("Cloud Computing & DevOps", "Basic networking, Linux", "AWS/Azure certification and deployment strategies")
-            ]
-        elif "Mechanical" in branch or "Automobile" in branch:
-            electives = [
-                ("Advanced CAD & Simulation", "Engineering graphics, basic CAD", "SolidWorks, ANSYS simulation projects"),
-                ("Renewable Energy Systems", "Thermodynamics, fluid mechanics", "Solar, wind, and hybrid energy solutions"),
-                ("Robotics & Automation", "Control systems, programming", "Industrial robotics and automation projects")
-            ]
-        elif "Electrical" in branch or "Electronics" in branch:
-            electives = [
-                ("Embedded Systems Design", "Microprocessors, C programming", "IoT projects and embedded applications"),
-                ("Power Systems & Smart Grid", "Circuit analysis, power electronics", "Modern power distribution and smart grid tech"),
-                ("VLSI Design", "Digital electronics, HDL", "Chip design and semiconductor applications")
-            ]
-        else:
-            electives = [
-                (f"Advanced {branch} Applications", "Core subject completion", "Specialized applications in your field"),
-                ("Research Methodology", "Basic coursework", "Scientific research and publication techniques"),
-                ("Industry Integration", "Foundational knowledge", "Real-world applications and case studies")
-            ]
-    
-    if not clubs:
-        clubs = [
-            (f"{branch} Professional Society", f"Professional development in {branch}", "Industry workshops, guest lectures, networking events"),
-            ("Innovation & Entrepreneurship Club", "Startup incubation and innovation projects", "Pitch competitions, business plan development, mentorship"),
-            ("Technical Research Club", "Academic research and publication support", "Research projects, paper presentations, conference participation")
-        ]
-    
-    if not internships:
-        internships = [
-            (f"Industry Internship - {branch}", "Technical skills, communication, teamwork", f"Practical experience in {branch} industry", "Industry"),
-            ("Research Internship", "Analytical thinking, research methodology", "Academic research with faculty guidance", "Research Institute"),
-            ("Startup Internship", "Adaptability, multi-tasking, innovation mindset", "Dynamic startup environment experience", "Startup")
-        ]
-    
-    return electives, clubs, internships
+        logger.error("Error in get_suggestions: %s", e)
+        return jsonify({'suggestions': ERROR_SUGGESTIONS})
+
+def get_branch_data(branch, interests='', goals=''):
+    """Branch-specific data from the in-memory catalog, ranked against the student's interests and goals"""
+    return branch_catalog.ranked(branch, interests, goals)
+
+def render_fallback_recommendation(branch, year, interests, goals, electives, clubs, internships):
+    """Structured recommendation used when Gemini is not configured"""
+    return render_fallback('unavailable', branch, year, interests, goals, electives, clubs, internships)
+
+def render_error_fallback_recommendation(branch, year, interests, goals, electives, clubs, internships):
+    """Structured recommendation used when the Gemini call fails"""
+    return render_fallback('error', branch, year, interests, goals, electives, clubs, internships)
+
+def save_recommendation(session_id, branch, year, interests, goals, recommendation, source='gemini'):
+    """Queue a recommendation for the background writer"""
+    recommendation_writer.submit(
+        session_id, branch, year, interests, goals, recommendation, summarize_recommendation(recommendation), source
+    )
+
+def read_profile_form():
+    """Read the student profile fields from the submitted form"""
+    return (
+        request.form.get('branch', '').strip(),
+        request.form.get('year', '2nd Year').strip(),
+        request.form.get('interests-value', '').strip(),
+        request.form.get('goals', '').strip()
+    )
 
 # Route to handle recommendations
 @app.route('/get_recommendations', methods=['POST'])
 def get_recommendations():
     try:
         # Get form data
-        branch = request.form.get('branch', '').strip()
-        year = request.form.get('year', '2nd Year').strip()
-        interests = request.form.get('interests-value', '').strip()
-        goals = request.form.get('goals', '').strip()
+        branch, year, interests, goals = read_profile_form()
 
         # Validate input
         if not all([branch, interests, goals]):
             logger.warning("Incomplete form data in get_recommendations")
-            return jsonify({'error': 'Please fill all required fields including selecting at least one interest.'}), 400
+            return jsonify({'error': INCOMPLETE_FORM_ERROR}), 400
+
+        # Popular profiles are answered from their pregenerated entry, near-duplicates from the cache
+        if model:
+            pregenerated = pregenerated_store.get(branch, year, interests, goals)
+            if pregenerated is not None:
+                save_recommendation(session['session_id'], branch, year, interests, goals, pregenerated)
+                return jsonify({'recommendation': pregenerated, 'cached': True, 'pregenerated': True})
+            cached = recommendation_cache.get(branch, year, interests, goals)
+            if cached is not None:
+                logger.info("Recommendation cache hit for %s student", branch)
+                save_recommendation(session['session_id'], branch, year, interests, goals, cached)
+                return jsonify({'recommendation': cached, 'cached': True})
 
         # Get branch-specific data
-        electives, clubs, internships = get_branch_data(branch)
+        with metrics.stage('branch_data'):
+            electives, clubs, internships = get_branch_data(branch, interests, goals)
         
-        logger.info(f"Generating recommendations for {branch} student with interests: {interests}")
+        logger.info("Generating recommendations for %s student with interests: %s", branch, interests)
 
         # Enhanced fallback recommendation if Gemini is not available
         if not model:
             logger.warning("Gemini API not available, using structured fallback recommendation")
+            metrics.FALLBACKS.labels('get_recommendations', 'no_model').inc()
             
-            fallback_recommendation = f"""
-# 🎓 Personalized Academic & Career Recommendations
-
-## 📋 Your Profile
-- **Branch:** {branch}
-- **Year:** {year}
-- **Interests:** {interests}
-- **Career Goals:** {goals}
-
-## 🎓 Recommended Electives
-
-### 1. {electives[0][0]}
-**Why This Fits:** This course aligns perfectly with your interests in {interests.split(',')[0].strip()} and supports your career goals.
-
-**Key Benefits:**
-- Develops critical skills relevant to your field
-- Provides hands-on experience with industry tools
-- Opens pathways to specialized career opportunities
-
-**Prerequisites:** {electives[0][1]}
-
-### 2. {electives[1][0] if len(electives) > 1 else 'Advanced Specialization Course'}
-**Why This Fits:** Complements your interests while building analytical and technical skills.
-
-**Key Benefits:**
-- Enhances problem-solving capabilities
-- Provides theoretical foundation for practical applications
-- Builds portfolio of relevant projects
-
-**Prerequisites:** {electives[1][1] if len(electives) > 1 else 'Core coursework completion'}
-
-### 3. {electives[2][0] if len(electives) > 2 else 'Industry-Focused Elective'}
-**Why This Fits:** Bridges the gap between academic knowledge and real-world applications.
-
-**Key Benefits:**
-- Exposure to cutting-edge technologies
-- Networking opportunities with professionals
-- Capstone project experience
-
-**Prerequisites:** {electives[2][1] if len(electives) > 2 else 'Advanced foundation courses'}
-
-## 🏛️ Recommended Club
-
-### {clubs[0][0]}
-**Why This Club:** Perfect match for your interests and career aspirations in {branch}.
-
-**Activities & Benefits:**
-- Technical workshops and skill development
-- Networking with alumni and industry professionals
-- Competitions and project showcases
-- Leadership development opportunities
-
-## 💼 Recommended Internship
-
-### {internships[0][0]}
-**Perfect Match Because:** Aligns with your interests in {interests.split(',')[0].strip()} and career goals.
-
-**What You'll Gain:**
-- Real-world application of academic knowledge
-- Industry-specific tools and technology experience
-- Professional network and mentorship opportunities
-- Resume-building practical experience
-
-**Required Skills:** {internships[0][1]}
-
-## 🎯 Action Plan
-
-**Immediate Steps (This Semester):**
-1. Enroll in the top recommended elective for next semester
-2. Join the recommended club and attend orientation sessions
-3. Start building relevant skills through online courses
-
-**Medium-term Goals (Next 6-12 months):**
-1. Complete at least 2 recommended electives
-2. Take active role in club activities and projects
-3. Begin internship application process early
-
-**Long-term Vision (1-2 years):**
-1. Secure internship opportunity in your field
-2. Build strong professional network
-3. Develop expertise that sets you apart
-
-## 📈 Additional Recommendations
-
-**Skill Development Focus:**
-- Technical skills related to {interests.split(',')[0].strip()}
-- Communication and presentation skills  
-- Project management and teamwork
-
-**Networking Strategy:**
-- Attend industry conferences and webinars
-- Connect with alumni in your field
-- Join professional associations
-
-**Portfolio Building:**
-- Document all projects and achievements
-- Create online presence (LinkedIn, GitHub, personal website)
-- Collect recommendations from professors and supervisors
-
----
-*Remember: Success comes from consistent effort and strategic choices. Focus on quality over quantity and always align decisions with your long-term career goals.*
-            """
+            fallback_recommendation = render_fallback_recommendation(branch, year, interests, goals, electives, clubs, internships)
             
-            # Try to save to database if available
-            try:
-                conn = get_db_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "INSERT INTO recommendations (session_id, branch, interests, goals, recommendation) VALUES (%s, %s, %s, %s, %s)",
-                        (session['session_id'], branch, interests, goals, fallback_recommendation)
-                    )
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
-            except Exception as db_error:
-                logger.error(f"Failed to save recommendation to database: {db_error}")
+            save_recommendation(session['session_id'], branch, year, interests, goals, fallback_recommendation, source='fallback')
             
             return jsonify({'recommendation': fallback_recommendation})
 
         # Enhanced prompt for Gemini
-        prompt = f"""
-        You are an expert college academic advisor. Create comprehensive, personalized recommendations for this student:
-
-        **Student Profile:**
-        - Branch: {branch}
-        - Year: {year}  
-        - Interests: {interests}
-        - Career Goals: {goals}
-
-        **Available Options:**
-        - Electives: {[e[0] for e in electives]}
-        - Clubs: {[c[0] for c in clubs]}
-        - Internships: {[i[0] for i in internships]}
-
-        Create detailed recommendations in this exact markdown format:
-
-        # 🎓 Personalized Academic & Career Recommendations
-
-        ## 📋 Your Profile Summary
-        [Brief analysis of student's profile and how interests align with career goals]
-
-        ## 🎓 Recommended Electives (Top 3)
-
-        ### 1. {electives[0][0]}
-        **Why This Perfectly Fits You:** [Specific connection to their interests and goals]
-        **Key Benefits:**
-        • [Specific skill development]
-        • [Career advantages]
-        • [Industry relevance]
-        **Prerequisites:** {electives[0][1]}
-        **Career Impact:** [How this directly helps achieve their goals]
-
-        ### 2. {electives[1][0] if len(electives) > 1 else '[Second Best Elective]'}
-        **Why This Perfectly Fits You:** [Specific connection]
-        **Key Benefits:**
-        • [Benefits specific to their interests]
-        • [Complementary skills]
-        • [Future opportunities]
-        **Prerequisites:** {electives[1][1] if len(electives) > 1 else '[Prerequisites]'}
-        **Career Impact:** [Specific career benefits]
-
-        ### 3. {electives[2][0] if len(electives) > 2 else '[Third Best Elective]'}
-        **Why This Perfectly Fits You:** [Specific connection]
-        **Key Benefits:**
-        • [Advanced skill development]
-        • [Industry exposure]
-        • [Network building]
-        **Prerequisites:** {electives[2][1] if len(electives) > 2 else '[Prerequisites]'}
-        **Career Impact:** [Long-term career benefits]
-
-        ## 🏛️ Recommended Club
-
-        ### {clubs[0][0]}
-        **Perfect Match Because:** [Why this club aligns with their profile]
-        **What You'll Gain:**
-        • [Specific networking opportunities]
-        • [Skill development activities]
-        • [Leadership experiences]
-        • [Industry connections]
-
-        ## 💼 Recommended Internship Path
-
-        ### {internships[0][0]}
-        **Ideal Match Because:** [Connection to interests and goals]
-        **Experience You'll Gain:**
-        • [Hands-on technical experience]
-        • [Industry exposure]
-        • [Professional skills]
-        • [Network building]
-        **Skills to Develop First:** {internships[0][1]}
-        **Application Strategy:** [Specific advice for securing this internship]
-
-        ## 🎯 Personalized Action Plan
-
-        **Immediate Steps (Next 4 weeks):**
-        1. [Specific first action]
-        2. [Specific second action]
-        3. [Specific third action]
-
-        **Short-term Goals (3-6 months):**
-        1. [Specific goal with timeline]
-        2. [Specific goal with timeline]
-        3. [Specific goal with timeline]
-
-        **Long-term Vision (1-2 years):**
-        1. [Major milestone]
-        2. [Career positioning goal]
-        3. [Expertise development target]
-
-        ## 📈 Success Strategies
-
-        **Skill Development Priority:**
-        [Top 3 skills to focus on based on their interests and goals]
-
-        **Networking Approach:**
-        [Specific networking strategies for their field]
-
-        **Portfolio Building:**
-        [What they should include in their portfolio]
-
-        Make every recommendation highly specific to their interests ({interests}) and career goals ({goals}). Be actionable and practical.
-        """
+        with metrics.stage('prompt_build'):
+            prompt = build_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships)
 
         try:
-            response = model.generate_content(prompt)
-            recommendation = response.text
-            logger.info(f"AI recommendation generated successfully for session {session['session_id']}")
+            response = generate_content(prompt, 'recommendations')
+            with metrics.stage('response_parse'):
+                recommendation = response.text
+            logger.info("AI recommendation generated successfully for session %s", session['session_id'])
             
-            # Save to database if available
-            try:
-                conn = get_db_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "INSERT INTO recommendations (session_id, branch, interests, goals, recommendation) VALUES (%s, %s, %s, %s, %s)",
-                        (session['session_id'], branch, interests, goals, recommendation)
-                    )
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
-                    logger.info("Recommendation saved to database")
-            except Exception as db_error:
-                logger.error(f"Failed to save recommendation to database: {db_error}")
+            recommendation_cache.set(branch, year, interests, goals, recommendation)
+            save_recommendation(session['session_id'], branch, year, interests, goals, recommendation)
             
-            return jsonify({'recommendation': recommendation})
+            return jsonify({'recommendation': recommendation, 'cached': False})
             
         except Exception as api_error:
-            logger.error(f"Gemini API error: {api_error}")
+            logger.error("Gemini API error: %s", api_error)
+            metrics.FALLBACKS.labels('get_recommendations', fallback_reason(api_error)).inc()
             # Use the same fallback as when model is not available
-            fallback_recommendation = f"""
-# 🎓 Personalized Academic & Career Recommendations
-
-## 📋 Your Profile
-- **Branch:** {branch}
-- **Year:** {year}
-- **Interests:** {interests}
-- **Career Goals:** {goals}
-
-## 🎓 Recommended Electives
-
-### 1. {electives[0][0]}
-**Why This Fits:** This course aligns with your interests in {interests.split(',')[0].strip()} and supports your career aspirations.
-
-**Key Benefits:**
-- Develops critical technical skills
-- Provides hands-on project experience  
-- Opens specialized career pathways
-
-**Prerequisites:** {electives[0][1]}
-
-### 2. {electives[1][0] if len(electives) > 1 else 'Advanced Specialization'}
-**Why This Fits:** Complements your interests while building analytical capabilities.
-
-**Key Benefits:**
-- Enhances problem-solving skills
-- Provides theoretical foundation
-- Builds relevant project portfolio
-
-### 3. {electives[2][0] if len(electives) > 2 else 'Industry Applications'}
-**Why This Fits:** Bridges academic knowledge with real-world applications.
-
-**Key Benefits:**
-- Exposure to cutting-edge technology
-- Professional networking opportunities
-- Practical project experience
-
-## 🏛️ Recommended Club
-
-### {clubs[0][0]}
-**Why This Club:** Excellent match for your {branch} background and career interests.
-
-**What You'll Gain:**
-- Technical workshops and skill development
-- Networking with industry professionals
-- Leadership and teamwork experience
-- Project collaboration opportunities
-
-## 💼 Recommended Internship
-
-### {internships[0][0]}
-**Perfect Match:** Aligns with your interests and career goals in {branch}.
-
-**Benefits:**
-- Real-world application of your studies
-- Industry tools and technology exposure
-- Professional mentorship and networking
-- Competitive resume building
+            fallback_recommendation = render_error_fallback_recommendation(branch, year, interests, goals, electives, clubs, internships)
+            return jsonify({'recommendation': fallback_recommendation})
 
-**Required Skills:** {internships[0][1]}
+    except Exception as e:
+        logger.error("Error in get_recommendations: %s", e)
+        return jsonify({'error': RECOMMENDATION_ERROR}), 500
 
-## 🎯 Action Plan
+# Route to stream recommendations as Server-Sent Events
+@app.route('/stream_recommendations', methods=['POST'])
+def stream_recommendations():
+    branch, year, interests, goals = read_profile_form()
 
-**This Month:**
-1. Research and apply to recommended club
-2. Plan course selection for next semester  
-3. Start building relevant technical skills
+    if not all([branch, interests, goals]):
+        logger.warning("Incomplete form data in stream_recommendations")
+        return jsonify({'error': INCOMPLETE_FORM_ERROR}), 400
 
-**Next 3-6 Months:**
-1. Enroll in top recommended electives
-2. Take active role in club activities
-3. Begin internship preparation and applications
+    session_id = session.get('session_id') or str(uuid.uuid4())
 
-**Long-term (1-2 years):**
-1. Secure internship in your field
-2. Build strong professional network
-3. Develop specialized expertise
+    def generate():
+        try:
+            if model:
+                pregenerated = pregenerated_store.get(branch, year, interests, goals)
+                cached = pregenerated if pregenerated is not None else recommendation_cache.get(branch, year, interests, goals)
+                if cached is not None:
+                    yield sse_event({'text': cached})
+                    yield sse_event({'cached': True, 'pregenerated': pregenerated is not None}, event='done')
+                    save_recommendation(session_id, branch, year, interests, goals, cached)
+                    return
+
+            with metrics.stage('branch_data', 'stream_recommendations'):
+                electives, clubs, internships = get_branch_data(branch, interests, goals)
+            logger.info("Streaming recommendations for %s student with interests: %s", branch, interests)
+
+            if not model:
+                logger.warning("Gemini API not available, streaming structured fallback recommendation")
+                metrics.FALLBACKS.labels('stream_recommendations', 'no_model').inc()
+                fallback_recommendation = render_fallback_recommendation(branch, year, interests, goals, electives, clubs, internships)
+                yield sse_event({'text': fallback_recommendation})
+                yield sse_event({'cached': False}, event='done')
+                save_recommendation(session_id, branch, year, interests, goals, fallback_recommendation, 'fallback')
+                return
+
+            with metrics.stage('prompt_build', 'stream_recommendations'):
+                prompt = build_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships)
+            chunks = []
+            breaker = gemini_breakers['recommendations']
+            try:
+                with metrics.stage('gemini_queue', 'stream_recommendations'):
+                    ticket = gemini_scheduler.acquire(INTERACTIVE, estimate_tokens(prompt, 'recommendations'))
+                if not breaker.allow():
+                    gemini_scheduler.settle(ticket, called=False)
+                    raise CircuitOpenError("Circuit 'recommendations' is open")
+                start = time.monotonic()
+                recorded = False
+                try:
+                    stream = recommendation_model.generate_content(prompt, stream=True, request_options={'timeout': breaker.deadline()})
+                    for chunk in stream:
+                        text = chunk.text
+                        if text:
+                            if not recorded:
+                                # Time to first token is what the breaker tracks for streams
+                                breaker.record(time.monotonic() - start, ok=True)
+                                recorded = True
+                                metrics.STAGE_SECONDS.labels('stream_recommendations', 'gemini_first_chunk').observe(time.monotonic() - start)
+                            chunks.append(text)
+                            yield sse_event({'text': text})
+                    if not recorded:
+                        breaker.record(time.monotonic() - start, ok=True)
+                        recorded = True
+                    gemini_scheduler.settle(ticket, used_tokens(stream))
+                except Exception as e:
+                    if is_rate_limited(e):
+                        gemini_scheduler.rate_limited()
+                    if not recorded:
+                        breaker.record(time.monotonic() - start, ok=False)
+                        recorded = True
+                    raise
+                finally:
+                    if not recorded:
+                        # The client disconnected before the first chunk: free a half-open probe without judging Gemini
+                        breaker.release()
+            except Exception as api_error:
+                logger.error("Gemini API error while streaming: %s", api_error)
+                metrics.FALLBACKS.labels('stream_recommendations', fallback_reason(api_error)).inc()
+                fallback_recommendation = render_error_fallback_recommendation(branch, year, interests, goals, electives, clubs, internships)
+                # Replace whatever partial text the client has rendered so far
+                yield sse_event({'text': fallback_recommendation}, event='replace')
+                yield sse_event({'cached': False}, event='done')
+                return
+
+            recommendation = ''.join(chunks)
+            yield sse_event({'cached': False}, event='done')
+            logger.info("AI recommendation streamed successfully for session %s", session_id)
+
+            # Persist after the response is complete; the writer batches the insert off-thread
+            recommendation_cache.set(branch, year, interests, goals, recommendation)
+            save_recommendation(session_id, branch, year, interests, goals, recommendation)
+
+        except Exception as e:
+            logger.error("Error in stream_recommendations: %s", e)
+            yield sse_event({'error': RECOMMENDATION_ERROR}, event='error')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
-## 📈 Additional Recommendations
+# Route to generate recommendations for a CSV or JSONL file of profiles, streamed as NDJSON
+@app.route('/batch_recommendations', methods=['POST'])
+def batch_recommendations():
+    if not advisor_authorized(request.headers.get('Authorization')):
+        logger.warning("Rejected batch request without a valid advisor token from %s", request.remote_addr)
+        return jsonify({'error': 'Batch recommendations need an advisor token.'}), 401
+    try:
+        upload = request.files.get('file')
+        if upload:
+            text = upload.read().decode('utf-8')
+            name = (upload.filename or '').lower()
+            fmt = 'csv' if name.endswith('.csv') else 'jsonl' if name.endswith(('.jsonl', '.ndjson')) else None
+        else:
+            text = request.get_data(as_text=True)
+            content_type = request.mimetype or ''
+            fmt = 'csv' if content_type == 'text/csv' else 'jsonl' if 'ndjson' in content_type or 'jsonl' in content_type else None
+        profiles = parse_profiles(text, request.args.get('format') or fmt,
+                                  max_profiles=int(os.getenv('BATCH_MAX_PROFILES', '2000')))
+    except (BatchError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Error reading batch upload: %s", e)
+        return jsonify({'error': 'Could not read the uploaded profiles.'}), 400
+    if not profiles:
+        return jsonify({'error': 'No profiles found in the upload.'}), 400
+
+    runner = build_batch_runner(
+        generate_content if model else None, get_branch_data, recommendation_cache, recommendation_writer,
+        limiter=batch_limiter
+    )
+    session_id = session.get('session_id')
+    logger.info("Batch of %s profiles started for session %s", len(profiles), session_id)
 
-**Focus Areas:**
-- Technical skills: {interests.split(',')[0].strip()}
-- Professional skills: Communication, teamwork, project management
-- Industry knowledge: Stay updated with latest trends
+    def generate():
+        try:
+            for event in runner.run(profiles, session_id):
+                yield json.dumps(event) + '\n'
+        except Exception as e:
+            logger.error("Error in batch_recommendations: %s", e)
+            yield json.dumps({'event': 'error', 'error': RECOMMENDATION_ERROR}) + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
-**Success Tips:**
-- Quality over quantity in activities
-- Build meaningful professional relationships
-- Document achievements and create portfolio
-- Align all activities with career goals
+# Route to get recommendation history, one page of metadata at a time
+@app.route('/get_history', methods=['GET'])
+def get_history():
+    try:
+        limit = min(max(request.args.get('limit', 5, type=int), 1), MAX_PAGE_SIZE)
+        after = None
+        if request.args.get('cursor'):
+            try:
+                after = decode_cursor(request.args['cursor'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
 
-*Note: This recommendation was generated with limited AI assistance. For more detailed guidance, ensure your system configuration is complete.*
-            """
-            return jsonify({'recommendation': fallback_recommendation})
+        conn = get_db_connection()
+        if not conn:
+            logger.warning("Database not available for history")
+            return jsonify({'history': [], 'next_cursor': None})
 
+        cursor = conn.cursor()
+        try:
+            history, next_cursor = fetch_history_page(cursor, session.get('session_id', ''), limit, after)
+            logger.info("History retrieved: %s items for session %s", len(history), session.get('session_id'))
+            return jsonify({'history': history, 'next_cursor': next_cursor})
+            
+        finally:
+            cursor.close()
+            conn.close()
+            
     except Exception as e:
-        logger.error(f"Error in get_recommendations: {e}")
-        return jsonify({'error': 'An error occurred while generating recommendations. Please try again.'}), 500
+        logger.error("Error in get_history: %s", e)
+        return jsonify({'history': [], 'next_cursor': None})
 
-# Route to get recommendation history
-@app.route('/get_history', methods=['GET'])
-def get_history():
+# Route to get the full body of one history entry
+@app.route('/history/<int:recommendation_id>', methods=['GET'])
+def get_history_entry(recommendation_id):
     try:
         conn = get_db_connection()
         if not conn:
             logger.warning("Database not available for history")
-            return jsonify({'history': []})
+            return jsonify({'error': 'History is not available right now.'}), 503
 
         cursor = conn.cursor()
         try:
             cursor.execute(
-                "SELECT branch, interests, goals, recommendation, created_at FROM recommendations WHERE session_id = %s ORDER BY created_at DESC LIMIT 5",
-                (session.get('session_id', ''),)
+                "SELECT recommendation FROM recommendations WHERE id = %s AND session_id = %s",
+                (recommendation_id, session.get('session_id', ''))
             )
-            history = []
-            for row in cursor.fetchall():
-                history.append({
-                    'branch': row[0],
-                    'interests': row[1],
-                    'goals': row[2],
-                    'recommendation': row[3],
-                    'created_at': row[4].strftime('%Y-%m-%d %H:%M:%S') if row[4] else 'Unknown'
-                })
-            
-            logger.info(f"History retrieved: {len(history)} items for session {session.get('session_id')}")
-            return jsonify({'history': history})
-            
+            row = cursor.fetchone()
         finally:
             cursor.close()
             conn.close()
-            
+
+        if not row:
+            return jsonify({'error': 'Recommendation not found.'}), 404
+        return jsonify({'id': recommendation_id, 'recommendation': decompress_text(row[0])})
+
     except Exception as e:
-        logger.error(f"Error in get_history: {e}")
-        return jsonify({'history': []})
+        logger.error("Error in get_history_entry: %s", e)
+        return jsonify({'error': 'An error occurred while loading this recommendation.'}), 500
+
+# Prometheus metrics, aggregated across gunicorn workers when PROMETHEUS_MULTIPROC_DIR is set
+@app.route('/metrics')
+def metrics_endpoint():
+    payload, content_type = metrics.render_metrics()
+    return Response(payload, mimetype=content_type.split(';')[0], headers={'Content-Type': content_type})
 
 # Health check endpoint
 @app.route('/health')
 def health_check():
     return jsonify({
         'status': 'healthy',
-        'gemini_api': 'available' if model else 'unavailable',
-        'database': 'available' if db_pool else 'unavailable'
+        'gemini_api': gemini_status(),
+        'gemini_breakers': {name: breaker.stats() for name, breaker in gemini_breakers.items()},
+        'gemini_hedging': services.hedging_stats(model, recommendation_model),
+        'database': 'available' if db_pool.state == 'up' else 'unavailable',
+        'database_pool': db_pool.stats(),
+        'suggestion_index': suggestion_index.stats(),
+        'suggestion_cache': suggestion_cache.stats(),
+        'recommendation_cache': recommendation_cache.stats(),
+        'branch_catalog': branch_catalog.stats(),
+        'recommendation_writer': recommendation_writer.stats(),
+        'retention': retention_job.stats() if retention_job else None,
+        'pregenerated': pregenerated_store.stats(),
+        'pregeneration': pregeneration_job.stats() if pregeneration_job else None,
+        'logging': log_pipeline.stats(),
+        'gemini_single_flight': gemini_flight.stats(),
+        'gemini_scheduler': gemini_scheduler.stats()
     })
 
 if __name__ == '__main__':
     logger.info("Starting Flask application...")
-    logger.info(f"Gemini API: {'Configured' if model else 'Not configured'}")
-    logger.info(f"Database: {'Available' if db_pool else 'Not available'}")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # The development server has no gunicorn master, so it creates the tables itself
+    migrate()
+    create_app()
+    logger.info("Gemini API: %s", 'Configured' if model else 'Not configured')
+    logger.info("Database: %s", 'Available' if db_pool.state == 'up' else 'Not available')
+    app.run(debug=True, host='0.0.0.0', port=5000)
+elif os.getenv('DEFER_WORKER_INIT') != '1':
+    # Imported outside gunicorn (scripts, batch jobs, test clients): ready on import as before
+    create_app()
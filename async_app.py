@@ -0,0 +1,620 @@
+"""ASGI version of app.py for high-concurrency serving
+
+Routes await Gemini through the SDK's async client and read MySQL through an
+aiomysql pool, so one process holds many in-flight requests instead of one
+per thread. Caches, the branch catalog, the suggestion index and the
+background writer are the same components app.py uses.
+
+    python schema.py        # once per deploy; creates or upgrades the tables
+    uvicorn async_app:app --workers 2 --port 5000
+
+The synchronous Flask app (gunicorn app:app) remains the default.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+
+import aiomysql
+from dotenv import load_dotenv
+from quart import Quart, render_template, make_response, request, jsonify, session, Response, g
+from quart.wrappers.response import DataBody
+
+import metrics
+import services
+from fallback import render_fallback
+from compression import decompress_text, choose_encoding, compress_body, compressible, MIN_RESPONSE_BYTES
+from history import summarize_recommendation, history_page_query, history_page_from_rows, decode_cursor, MAX_PAGE_SIZE
+from prompts import build_suggestion_prompt, parse_suggestions, build_recommendation_prompt
+from schema import migrate
+from services import INCOMPLETE_FORM_ERROR, RECOMMENDATION_ERROR, fallback_reason, sse_event
+from singleflight import AsyncSingleFlight
+from breaker import CircuitOpenError
+from scheduler import ENDPOINT_PRIORITIES, INTERACTIVE, estimate_tokens, is_rate_limited, used_tokens
+from dbpool import DatabaseUnavailable
+from suggest import merge_suggestions, template_suggestions, ERROR_SUGGESTIONS
+
+# Initialize Quart app
+app = Quart(__name__)
+app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', '2f8b60bda6a957bc9415dcb4774887f2')
+
+# Load environment variables
+load_dotenv()
+
+log_pipeline = services.setup_logging()
+logger = logging.getLogger(__name__)
+
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+MYSQL_CONFIG = services.mysql_config()
+ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', '20'))
+DB_ACQUIRE_TIMEOUT = float(os.getenv('DB_ACQUIRE_TIMEOUT', '2'))
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '3'))
+
+# Gemini clients, both MySQL pools and every component that owns a thread are created
+# per worker by create_app() and open_db_pool(); importing this module opens no connections
+model = None
+recommendation_model = None
+sync_pool = None
+branch_catalog = None
+suggestion_cache = None
+recommendation_cache = None
+suggestion_index = None
+recommendation_writer = None
+retention_job = None
+pregenerated_store = None
+gemini_breakers = None
+gemini_scheduler = None
+worker_pid = None
+gemini_flight = AsyncSingleFlight()
+
+# Created per worker once the event loop is running, or on first use if that failed
+db_pool = None
+refreshing_keys = set()
+
+
+def get_sync_connection():
+    """Blocking connection for startup and the background threads; None while MySQL is down"""
+    try:
+        return sync_pool.get_connection()
+    except DatabaseUnavailable:
+        return None
+    except Exception as e:
+        logger.error("Database connection failed: %s", e)
+        return None
+
+
+def create_app():
+    """App factory: set up this process's Gemini clients and shared components, then return the app
+
+    Runs from before_serving in each uvicorn worker, or from gunicorn's
+    post_fork hook under a gunicorn worker class. Tables are not created
+    here; run schema.py first. Calling it again in the same process is a no-op.
+    """
+    global log_pipeline, model, recommendation_model, sync_pool, branch_catalog, suggestion_cache
+    global recommendation_cache, suggestion_index, recommendation_writer, retention_job, pregenerated_store
+    global gemini_breakers, gemini_scheduler, worker_pid
+    if worker_pid == os.getpid():
+        return app
+    started = time.monotonic()
+    if log_pipeline.pid != os.getpid():
+        # The listener thread stayed behind in the preloading master
+        log_pipeline = services.setup_logging()
+
+    model, recommendation_model = services.build_gemini_models(GEMINI_API_KEY)
+
+    # Small blocking pool for startup and the background threads
+    sync_pool = services.build_connection_pool(pool_size=int(os.getenv('ASYNC_SYNC_POOL_SIZE', '4')))
+
+    # Shared components; these load and write on their own threads, off the event loop
+    branch_catalog = services.build_branch_catalog(get_sync_connection, load=False)
+    suggestion_cache = services.build_suggestion_cache(get_sync_connection)
+    recommendation_cache = services.build_recommendation_cache(get_sync_connection, warm=False)
+    suggestion_index = services.build_local_suggestion_index(get_sync_connection, load=False)
+    recommendation_writer = services.build_recommendation_writer(get_sync_connection)
+    retention_job = services.build_retention_job(get_sync_connection)
+    gemini_breakers = services.build_gemini_breakers()
+    gemini_scheduler = services.build_gemini_scheduler()
+    services.charge_hedges(model, recommendation_model, gemini_scheduler)
+    # Entries are served here; the pregeneration job itself runs in the sync app or from cron
+    pregenerated_store = services.build_pregenerated_store(get_sync_connection, load=False)
+
+    # MySQL is first read on this thread, so an unreachable server cannot stall the worker's boot
+    services.warm_up(get_sync_connection, branch_catalog, recommendation_cache, suggestion_index, pregenerated_store)
+
+    worker_pid = os.getpid()
+    logger.info("Worker %s ready in %.2fs", worker_pid, time.monotonic() - started)
+    return app
+
+
+async def get_db_pool():
+    """The aiomysql pool, created now if before_serving could not; it connects only when borrowed from"""
+    global db_pool
+    if db_pool is None:
+        db_pool = await aiomysql.create_pool(
+            host=MYSQL_CONFIG['host'], user=MYSQL_CONFIG['user'], password=MYSQL_CONFIG['password'],
+            db=MYSQL_CONFIG['database'], minsize=0, maxsize=ASYNC_DB_POOL_SIZE,
+            connect_timeout=DB_CONNECT_TIMEOUT, autocommit=True
+        )
+        logger.info("Async MySQL pool initialized with up to %s connections", ASYNC_DB_POOL_SIZE)
+    return db_pool
+
+
+@app.before_serving
+async def open_db_pool():
+    create_app()
+    try:
+        await get_db_pool()
+    except Exception as e:
+        logger.warning("Async MySQL pool not available: %s", e)
+
+
+@app.after_serving
+async def close_db_pool():
+    if db_pool is not None:
+        db_pool.close()
+        await db_pool.wait_closed()
+
+
+async def acquire_db_connection():
+    """Borrow an aiomysql connection; None at once while MySQL is down, or when none frees up in time
+
+    Shares the blocking pool's Backoff, so both pools see MySQL go down and come
+    back together and only one caller at a time probes it.
+    """
+    try:
+        probe = sync_pool.backoff.check()
+    except DatabaseUnavailable:
+        return None
+    try:
+        pool = await get_db_pool()
+        # A full pool means a timeout is contention; otherwise it was a connect that hung
+        full = pool.freesize == 0 and pool.size >= pool.maxsize
+        start = time.perf_counter()
+        conn = await asyncio.wait_for(pool.acquire(), DB_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        if full:
+            metrics.POOL_EXHAUSTED.inc()
+            logger.error("Database connection failed: no connection free after %ss", DB_ACQUIRE_TIMEOUT)
+        else:
+            sync_pool.backoff.mark_down(f"no connection after {DB_ACQUIRE_TIMEOUT}s")
+        return None
+    except Exception as e:
+        sync_pool.backoff.mark_down(e)
+        return None
+    finally:
+        if probe:
+            sync_pool.backoff.probed()
+    sync_pool.backoff.mark_up()
+    metrics.STAGE_SECONDS.labels(current_route(), 'db_connection_wait').observe(time.perf_counter() - start)
+    return conn
+
+
+def current_route():
+    return request.endpoint or 'unknown'
+
+
+async def fetch_rows(sql, params, one=False):
+    """Run a read query on the async pool; returns None when the database is unavailable"""
+    conn = await acquire_db_connection()
+    if conn is None:
+        return None
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(sql, params)
+            return await (cursor.fetchone() if one else cursor.fetchall())
+    finally:
+        db_pool.release(conn)
+
+
+def gemini_model(endpoint):
+    """Model for an endpoint; recommendations use the one carrying the format as a system instruction"""
+    return recommendation_model if endpoint == 'recommendations' else model
+
+
+async def call_model(prompt, deadline, endpoint, ticket):
+    """One timed async Gemini call, recording token usage"""
+    with metrics.stage('gemini_generate', endpoint):
+        try:
+            gemini = gemini_model(endpoint)
+            response = await gemini.generate_content_async(
+                prompt, request_options={'timeout': deadline}, **services.hedge_options(gemini, ticket)
+            )
+        except Exception as e:
+            if is_rate_limited(e):
+                gemini_scheduler.rate_limited()
+            raise
+    metrics.record_tokens(endpoint, response)
+    gemini_scheduler.settle(ticket, used_tokens(response))
+    return response
+
+
+async def scheduled_call(prompt, endpoint, priority):
+    """Wait for quota in the caller's priority class, then call through the endpoint's circuit breaker"""
+    with metrics.stage('gemini_queue', endpoint):
+        ticket = await gemini_scheduler.acquire_async(priority, estimate_tokens(prompt, endpoint))
+    try:
+        return await gemini_breakers[endpoint].call_async(lambda deadline: call_model(prompt, deadline, endpoint, ticket))
+    except CircuitOpenError:
+        gemini_scheduler.settle(ticket, called=False)
+        raise
+
+
+async def generate_content(prompt, endpoint, priority=None):
+    """Await Gemini through the scheduler and circuit breaker, coalescing identical concurrent prompts"""
+    priority = priority or ENDPOINT_PRIORITIES[endpoint]
+    key = f"{endpoint}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+    return await gemini_flight.do(
+        key,
+        lambda: scheduled_call(prompt, endpoint, priority),
+        timeout=gemini_breakers[endpoint].max_deadline + gemini_scheduler.max_wait[priority] + 1
+    )
+
+
+@app.before_request
+async def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+async def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None and request.endpoint:
+        metrics.REQUEST_SECONDS.labels(request.endpoint, str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
+
+@app.after_request
+async def compress_response(response):
+    """gzip or brotli for complete JSON/HTML responses; streamed SSE and NDJSON pass through"""
+    if not isinstance(response.response, DataBody):
+        return response
+    if not compressible(response.status_code, response.mimetype, response.headers):
+        return response
+    data = await response.get_data()
+    if len(data) < MIN_RESPONSE_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if not encoding:
+        return response
+    response.set_data(compress_body(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+@app.route('/')
+async def index():
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+        logger.info("New session started: %s", session['session_id'])
+    response = await make_response(await render_template('index.html'))
+    await response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return await response.make_conditional(request)
+
+
+async def refresh_suggestions(field, query):
+    """Background task that fetches Gemini suggestions for a query into the cache and index"""
+    key = suggestion_cache.key(field, query)
+    try:
+        response = await generate_content(build_suggestion_prompt(query), 'suggestions')
+        with metrics.stage('response_parse', 'suggestions'):
+            suggestions = parse_suggestions(response.text)
+        if suggestions is not None:
+            await cache_call(suggestion_cache.set, field, query, suggestions)
+            logger.info("Suggestions generated for %s: %s", field, query)
+            if field == 'goals':
+                for suggestion in suggestions:
+                    suggestion_index.add(suggestion, weight=0.25)
+    except Exception as e:
+        logger.error("Background suggestion refresh failed: %s", e)
+    finally:
+        refreshing_keys.discard(key)
+
+
+def schedule_suggestion_refresh(field, query):
+    """Start a background refresh unless one is already running for this key"""
+    key = suggestion_cache.key(field, query)
+    if key in refreshing_keys:
+        return
+    refreshing_keys.add(key)
+    asyncio.ensure_future(refresh_suggestions(field, query))
+
+
+async def cache_call(fn, *args):
+    """Suggestion cache access; the shared backend does blocking I/O so it runs on a thread"""
+    if suggestion_cache.shared is None:
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+
+@app.route('/get_suggestions', methods=['POST'])
+async def get_suggestions():
+    try:
+        form = await request.form
+        field = form.get('field')
+        query = form.get('query')
+
+        if not field or not query or len(query) < 2:
+            return jsonify({'suggestions': []})
+
+        local = suggestion_index.search(query) if field == 'goals' else []
+        if len(local) >= 3:
+            return jsonify({'suggestions': local, 'source': 'local'})
+
+        if not model:
+            metrics.FALLBACKS.labels('get_suggestions', 'no_model').inc()
+            return jsonify({'suggestions': merge_suggestions(local, template_suggestions(field, query, offline=True)), 'source': 'fallback'})
+
+        cached, kind = await cache_call(suggestion_cache.get, field, query)
+        if cached is not None:
+            if kind == 'prefix':
+                schedule_suggestion_refresh(field, query)
+            return jsonify({'suggestions': merge_suggestions(local, cached), 'cached': kind, 'source': 'cache'})
+
+        schedule_suggestion_refresh(field, query)
+        metrics.FALLBACKS.labels('get_suggestions', 'cache_miss').inc()
+        return jsonify({'suggestions': merge_suggestions(local, template_suggestions(field, query)), 'source': 'fallback'})
+
+    except Exception as e:
+        logger.error("Error in get_suggestions: %s", e)
+        return jsonify({'suggestions': ERROR_SUGGESTIONS})
+
+
+def save_recommendation(session_id, branch, year, interests, goals, recommendation, source='gemini'):
+    """Queue a recommendation for the background writer"""
+    recommendation_writer.submit(
+        session_id, branch, year, interests, goals, recommendation, summarize_recommendation(recommendation), source
+    )
+
+
+async def read_profile_form():
+    """Read the student profile fields from the submitted form"""
+    form = await request.form
+    return (
+        form.get('branch', '').strip(),
+        form.get('year', '2nd Year').strip(),
+        form.get('interests-value', '').strip(),
+        form.get('goals', '').strip()
+    )
+
+
+@app.route('/get_recommendations', methods=['POST'])
+async def get_recommendations():
+    try:
+        branch, year, interests, goals = await read_profile_form()
+        if not all([branch, interests, goals]):
+            logger.warning("Incomplete form data in get_recommendations")
+            return jsonify({'error': INCOMPLETE_FORM_ERROR}), 400
+
+        session_id = session['session_id']
+        if model:
+            pregenerated = pregenerated_store.get(branch, year, interests, goals)
+            if pregenerated is not None:
+                save_recommendation(session_id, branch, year, interests, goals, pregenerated)
+                return jsonify({'recommendation': pregenerated, 'cached': True, 'pregenerated': True})
+            cached = recommendation_cache.get(branch, year, interests, goals)
+            if cached is not None:
+                logger.info("Recommendation cache hit for %s student", branch)
+                save_recommendation(session_id, branch, year, interests, goals, cached)
+                return jsonify({'recommendation': cached, 'cached': True})
+
+        with metrics.stage('branch_data', 'get_recommendations'):
+            electives, clubs, internships = branch_catalog.ranked(branch, interests, goals)
+        logger.info("Generating recommendations for %s student with interests: %s", branch, interests)
+
+        if not model:
+            metrics.FALLBACKS.labels('get_recommendations', 'no_model').inc()
+            fallback_recommendation = render_fallback('unavailable', branch, year, interests, goals, electives, clubs, internships)
+            save_recommendation(session_id, branch, year, interests, goals, fallback_recommendation, source='fallback')
+            return jsonify({'recommendation': fallback_recommendation})
+
+        with metrics.stage('prompt_build', 'get_recommendations'):
+            prompt = build_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships)
+
+        try:
+            response = await generate_content(prompt, 'recommendations')
+            with metrics.stage('response_parse', 'get_recommendations'):
+                recommendation = response.text
+            logger.info("AI recommendation generated successfully for session %s", session_id)
+            recommendation_cache.set(branch, year, interests, goals, recommendation)
+            save_recommendation(session_id, branch, year, interests, goals, recommendation)
+            return jsonify({'recommendation': recommendation, 'cached': False})
+
+        except Exception as api_error:
+            logger.error("Gemini API error: %s", api_error)
+            metrics.FALLBACKS.labels('get_recommendations', fallback_reason(api_error)).inc()
+            fallback_recommendation = render_fallback('error', branch, year, interests, goals, electives, clubs, internships)
+            return jsonify({'recommendation': fallback_recommendation})
+
+    except Exception as e:
+        logger.error("Error in get_recommendations: %s", e)
+        return jsonify({'error': RECOMMENDATION_ERROR}), 500
+
+
+@app.route('/stream_recommendations', methods=['POST'])
+async def stream_recommendations():
+    branch, year, interests, goals = await read_profile_form()
+    if not all([branch, interests, goals]):
+        logger.warning("Incomplete form data in stream_recommendations")
+        return jsonify({'error': INCOMPLETE_FORM_ERROR}), 400
+
+    session_id = session.get('session_id') or str(uuid.uuid4())
+
+    async def generate():
+        try:
+            if model:
+                pregenerated = pregenerated_store.get(branch, year, interests, goals)
+                cached = pregenerated if pregenerated is not None else recommendation_cache.get(branch, year, interests, goals)
+                if cached is not None:
+                    yield sse_event({'text': cached})
+                    yield sse_event({'cached': True, 'pregenerated': pregenerated is not None}, event='done')
+                    save_recommendation(session_id, branch, year, interests, goals, cached)
+                    return
+
+            electives, clubs, internships = branch_catalog.ranked(branch, interests, goals)
+            logger.info("Streaming recommendations for %s student with interests: %s", branch, interests)
+
+            if not model:
+                metrics.FALLBACKS.labels('stream_recommendations', 'no_model').inc()
+                fallback_recommendation = render_fallback('unavailable', branch, year, interests, goals, electives, clubs, internships)
+                yield sse_event({'text': fallback_recommendation})
+                yield sse_event({'cached': False}, event='done')
+                save_recommendation(session_id, branch, year, interests, goals, fallback_recommendation, 'fallback')
+                return
+
+            prompt = build_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships)
+            chunks = []
+            breaker = gemini_breakers['recommendations']
+            try:
+                with metrics.stage('gemini_queue', 'stream_recommendations'):
+                    ticket = await gemini_scheduler.acquire_async(INTERACTIVE, estimate_tokens(prompt, 'recommendations'))
+                if not breaker.allow():
+                    gemini_scheduler.settle(ticket, called=False)
+                    raise CircuitOpenError("Circuit 'recommendations' is open")
+                start = time.monotonic()
+                recorded = False
+                try:
+                    stream = await recommendation_model.generate_content_async(prompt, stream=True, request_options={'timeout': breaker.deadline()})
+                    async for chunk in stream:
+                        text = chunk.text
+                        if text:
+                            if not recorded:
+                                breaker.record(time.monotonic() - start, ok=True)
+                                recorded = True
+                                metrics.STAGE_SECONDS.labels('stream_recommendations', 'gemini_first_chunk').observe(time.monotonic() - start)
+                            chunks.append(text)
+                            yield sse_event({'text': text})
+                    if not recorded:
+                        breaker.record(time.monotonic() - start, ok=True)
+                        recorded = True
+                    gemini_scheduler.settle(ticket, used_tokens(stream))
+                except Exception as e:
+                    if is_rate_limited(e):
+                        gemini_scheduler.rate_limited()
+                    if not recorded:
+                        breaker.record(time.monotonic() - start, ok=False)
+                        recorded = True
+                    raise
+                finally:
+                    if not recorded:
+                        # The client disconnected before the first chunk: free a half-open probe without judging Gemini
+                        breaker.release()
+            except Exception as api_error:
+                logger.error("Gemini API error while streaming: %s", api_error)
+                metrics.FALLBACKS.labels('stream_recommendations', fallback_reason(api_error)).inc()
+                fallback_recommendation = render_fallback('error', branch, year, interests, goals, electives, clubs, internships)
+                yield sse_event({'text': fallback_recommendation}, event='replace')
+                yield sse_event({'cached': False}, event='done')
+                return
+
+            recommendation = ''.join(chunks)
+            yield sse_event({'cached': False}, event='done')
+            logger.info("AI recommendation streamed successfully for session %s", session_id)
+            recommendation_cache.set(branch, year, interests, goals, recommendation)
+            save_recommendation(session_id, branch, year, interests, goals, recommendation)
+
+        except Exception as e:
+            logger.error("Error in stream_recommendations: %s", e)
+            yield sse_event({'error': RECOMMENDATION_ERROR}, event='error')
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/get_history', methods=['GET'])
+async def get_history():
+    try:
+        limit = min(max(request.args.get('limit', 5, type=int), 1), MAX_PAGE_SIZE)
+        after = None
+        if request.args.get('cursor'):
+            try:
+                after = decode_cursor(request.args['cursor'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        session_id = session.get('session_id', '')
+        rows = await fetch_rows(*history_page_query(session_id, limit, after))
+        if rows is None:
+            logger.warning("Database not available for history")
+            return jsonify({'history': [], 'next_cursor': None})
+
+        history, next_cursor = history_page_from_rows(rows, limit)
+        logger.info("History retrieved: %s items for session %s", len(history), session_id)
+        return jsonify({'history': history, 'next_cursor': next_cursor})
+
+    except Exception as e:
+        logger.error("Error in get_history: %s", e)
+        return jsonify({'history': [], 'next_cursor': None})
+
+
+@app.route('/history/<int:recommendation_id>', methods=['GET'])
+async def get_history_entry(recommendation_id):
+    try:
+        conn = await acquire_db_connection()
+        if conn is None:
+            logger.warning("Database not available for history")
+            return jsonify({'error': 'History is not available right now.'}), 503
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    "SELECT recommendation FROM recommendations WHERE id = %s AND session_id = %s",
+                    (recommendation_id, session.get('session_id', ''))
+                )
+                row = await cursor.fetchone()
+        finally:
+            db_pool.release(conn)
+
+        if not row:
+            return jsonify({'error': 'Recommendation not found.'}), 404
+        return jsonify({'id': recommendation_id, 'recommendation': decompress_text(row[0])})
+
+    except Exception as e:
+        logger.error("Error in get_history_entry: %s", e)
+        return jsonify({'error': 'An error occurred while loading this recommendation.'}), 500
+
+
+@app.route('/metrics')
+async def metrics_endpoint():
+    payload, content_type = metrics.render_metrics()
+    return Response(payload, headers={'Content-Type': content_type})
+
+
+@app.route('/health')
+async def health_check():
+    return jsonify({
+        'status': 'healthy',
+        'mode': 'async',
+        'gemini_api': services.gemini_status(model, gemini_breakers),
+        'gemini_breakers': {name: breaker.stats() for name, breaker in gemini_breakers.items()},
+        'gemini_hedging': services.hedging_stats(model, recommendation_model),
+        # Up or down as the last connect or probe found it, shared with the blocking pool
+        'database': 'available' if db_pool is not None and sync_pool.backoff.state == 'up' else 'unavailable',
+        'database_pool': dict(
+            sync_pool.backoff.stats(), size=db_pool.size, free=db_pool.freesize, max=db_pool.maxsize
+        ) if db_pool is not None else sync_pool.backoff.stats(),
+        'suggestion_index': suggestion_index.stats(),
+        'suggestion_cache': suggestion_cache.stats(),
+        'recommendation_cache': recommendation_cache.stats(),
+        'branch_catalog': branch_catalog.stats(),
+        'recommendation_writer': recommendation_writer.stats(),
+        'retention': retention_job.stats() if retention_job else None,
+        'pregenerated': pregenerated_store.stats(),
+        'logging': log_pipeline.stats(),
+        'gemini_single_flight': gemini_flight.stats(),
+        'gemini_scheduler': gemini_scheduler.stats()
+    })
+
+
+if __name__ == '__main__':
+    # The development server has no separate migrate step, so it creates the tables itself
+    migrate()
+    app.run(host='0.0.0.0', port=5000)
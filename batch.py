@@ -0,0 +1,306 @@
+"""Batch recommendation generation for advisors working with a whole cohort
+
+Profiles come from CSV (header: branch, year, interests, goals and an
+optional student_id) or JSONL with the same keys. Identical profiles, as
+judged by the recommendation cache key, are generated once; catalog items are
+ranked once per unique profile. Gemini calls fan out over a bounded thread pool
+behind a rate limiter, results are bulk-inserted into recommendations and
+progress is reported as NDJSON events:
+
+    {"event": "result", "index": 0, "student_id": "s1", "source": "gemini", ...}
+    {"event": "progress", "done": 10, "total": 120}
+    {"event": "done", "total": 120, "unique": 97, "gemini": 95, ...}
+
+Run from the command line with:
+
+    python batch.py cohort.csv --output results.ndjson
+"""
+import argparse
+import csv
+import hmac
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+from cache import profile_key
+from fallback import render_fallback
+from history import summarize_recommendation
+from prompts import build_recommendation_prompt
+from scheduler import BATCH
+from services import fallback_reason
+from writer import RecommendationWriter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_YEAR = '2nd Year'
+
+
+class BatchError(ValueError):
+    """Raised for an unreadable or oversized batch file"""
+
+
+def _field(value):
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(v).strip() for v in value if str(v).strip())
+    return str(value or '').strip()
+
+
+def _profile(raw, index):
+    return {
+        'index': index,
+        'student_id': _field(raw.get('student_id') or raw.get('id')) or None,
+        'branch': _field(raw.get('branch')),
+        'year': _field(raw.get('year')) or DEFAULT_YEAR,
+        'interests': _field(raw.get('interests')),
+        'goals': _field(raw.get('goals'))
+    }
+
+
+def parse_profiles(text, fmt=None, max_profiles=None):
+    """Parse CSV or JSONL text into profile dicts; fmt is sniffed when not given"""
+    text = text.lstrip('\ufeff')
+    if fmt is None:
+        fmt = 'jsonl' if text.lstrip().startswith('{') else 'csv'
+    if fmt == 'csv':
+        rows = [{(k or '').strip().lower(): v for k, v in row.items()} for row in csv.DictReader(io.StringIO(text))]
+    elif fmt in ('jsonl', 'ndjson'):
+        rows = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                raise BatchError(f"Line {number} is not valid JSON: {e}")
+    else:
+        raise BatchError(f"Unknown batch format {fmt!r}")
+
+    if max_profiles and len(rows) > max_profiles:
+        raise BatchError(f"Batch has {len(rows)} profiles; the limit is {max_profiles}")
+    return [_profile(row, index) for index, row in enumerate(rows)]
+
+
+def advisor_authorized(authorization, token=None):
+    """True if an Authorization header carries the advisor token (BATCH_API_TOKEN)
+
+    Without a configured token nobody is authorized, so the endpoint stays off
+    until an advisor credential is set up.
+    """
+    token = token if token is not None else os.getenv('BATCH_API_TOKEN', '')
+    scheme, _, credential = (authorization or '').partition(' ')
+    if not token or scheme.lower() != 'bearer':
+        return False
+    return hmac.compare_digest(credential.strip().encode('utf-8'), token.encode('utf-8'))
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads; rate <= 0 disables it"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._next - now)
+            self._next = max(now, self._next) + self.interval
+        if wait:
+            time.sleep(wait)
+
+
+class BatchRunner:
+    """Generates recommendations for a list of profiles and yields NDJSON events
+
+    generate is the app's generate_content(prompt, endpoint, priority), or
+    None when Gemini is not configured, in which case every profile gets the
+    structured fallback. Calls go in the scheduler's batch class, so they
+    only use quota that interactive requests leave free. Rows are written through writer.write_now in chunks as results
+    arrive, so a long batch does not hold everything until the end. Pass a
+    shared limiter so concurrent batches split one call rate instead of each
+    getting its own.
+    """
+
+    def __init__(self, generate, get_branch_data, recommendation_cache, writer,
+                 concurrency=8, rate=10.0, progress_every=10, limiter=None):
+        self.generate = generate
+        self.get_branch_data = get_branch_data
+        self.recommendation_cache = recommendation_cache
+        self.writer = writer
+        self.concurrency = max(1, concurrency)
+        self.limiter = limiter or RateLimiter(rate)
+        self.progress_every = max(1, progress_every)
+
+    def _recommend(self, profile, branch_data):
+        """Return (recommendation, source) for one unique profile"""
+        branch, year, interests, goals = profile['branch'], profile['year'], profile['interests'], profile['goals']
+        electives, clubs, internships = branch_data
+        if not self.generate:
+            return render_fallback('unavailable', branch, year, interests, goals, electives, clubs, internships), 'fallback'
+
+        cached = self.recommendation_cache.get(branch, year, interests, goals)
+        if cached is not None:
+            return cached, 'cache'
+
+        prompt = build_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships)
+        self.limiter.acquire()
+        try:
+            recommendation = self.generate(prompt, 'recommendations', priority=BATCH).text
+        except Exception as e:
+            logger.error("Gemini API error in batch: %s", e)
+            metrics.FALLBACKS.labels('batch_recommendations', fallback_reason(e)).inc()
+            return render_fallback('error', branch, year, interests, goals, electives, clubs, internships), 'error'
+        self.recommendation_cache.set(branch, year, interests, goals, recommendation)
+        return recommendation, 'gemini'
+
+    def _row(self, session_id, profile, recommendation, source):
+        # Error fallbacks are not stored, matching /get_recommendations
+        if source == 'error':
+            return None
+        return RecommendationWriter.make_row(
+            session_id, profile['branch'], profile['year'], profile['interests'], profile['goals'],
+            recommendation, summarize_recommendation(recommendation), 'fallback' if source == 'fallback' else 'gemini'
+        )
+
+    def run(self, profiles, session_id=None):
+        started = time.monotonic()
+        batch_id = uuid.uuid4().hex[:12]
+        session_id = session_id or f"batch-{batch_id}"
+        total = len(profiles)
+        summary = {'gemini': 0, 'cache': 0, 'fallback': 0, 'error': 0, 'invalid': 0, 'duplicates': 0}
+        done = 0
+        pending_rows = []
+
+        yield {'event': 'start', 'batch_id': batch_id, 'total': total}
+
+        # Group identical profiles so each is generated once
+        groups = {}
+        for profile in profiles:
+            if not all([profile['branch'], profile['interests'], profile['goals']]):
+                summary['invalid'] += 1
+                done += 1
+                yield {'event': 'result', 'index': profile['index'], 'student_id': profile['student_id'],
+                       'error': 'Missing branch, interests or goals'}
+                continue
+            key = profile_key(profile['branch'], profile['year'], profile['interests'], profile['goals'])
+            groups.setdefault(key, []).append(profile)
+        summary['duplicates'] = sum(len(members) - 1 for members in groups.values())
+
+        # Catalog items are ranked per profile, so each group gets its own selection
+        with metrics.stage('branch_data'):
+            branch_data = {
+                key: self.get_branch_data(members[0]['branch'], members[0]['interests'], members[0]['goals'])
+                for key, members in groups.items()
+            }
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='batch') as executor:
+            futures = {
+                executor.submit(self._recommend, members[0], branch_data[key]): members
+                for key, members in groups.items()
+            }
+            try:
+                for future in as_completed(futures):
+                    members = futures[future]
+                    recommendation, source = future.result()
+                    summary[source] += 1
+                    for position, profile in enumerate(members):
+                        row = self._row(session_id, profile, recommendation, source)
+                        if row:
+                            pending_rows.append(row)
+                        done += 1
+                        yield {
+                            'event': 'result', 'index': profile['index'], 'student_id': profile['student_id'],
+                            'branch': profile['branch'], 'year': profile['year'], 'source': source,
+                            'duplicate_of': members[0]['index'] if position else None,
+                            'recommendation': recommendation
+                        }
+                        if done % self.progress_every == 0:
+                            yield {'event': 'progress', 'done': done, 'total': total}
+                    if len(pending_rows) >= self.writer.batch_size:
+                        self.writer.write_now(pending_rows)
+                        pending_rows = []
+            except GeneratorExit:
+                # The client went away; skip profiles that have not started yet
+                for future in futures:
+                    future.cancel()
+                raise
+            finally:
+                if pending_rows:
+                    self.writer.write_now(pending_rows)
+
+        elapsed = time.monotonic() - started
+        logger.info("Batch %s generated %s profiles (%s unique) in %.1fs", batch_id, total, len(groups), elapsed)
+        yield dict({'event': 'done'}, **summary, batch_id=batch_id, session_id=session_id, total=total,
+                   unique=len(groups), seconds=round(elapsed, 3),
+                   profiles_per_second=round(total / elapsed, 2) if elapsed else None)
+
+
+def build_batch_limiter():
+    """One RateLimiter for all of a process's batches, at BATCH_RATE_LIMIT Gemini calls per second"""
+    return RateLimiter(float(os.getenv('BATCH_RATE_LIMIT', '10')))
+
+
+def build_batch_runner(generate, get_branch_data, recommendation_cache, writer, limiter=None):
+    """BatchRunner tuned by BATCH_CONCURRENCY, sharing limiter (or a new one from BATCH_RATE_LIMIT)"""
+    return BatchRunner(
+        generate, get_branch_data, recommendation_cache, writer,
+        concurrency=int(os.getenv('BATCH_CONCURRENCY', '8')),
+        limiter=limiter or build_batch_limiter()
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate recommendations for a CSV or JSONL file of profiles')
+    parser.add_argument('path', help="profiles file, or - for stdin")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='input format (sniffed by default)')
+    parser.add_argument('--output', help='write NDJSON events here instead of stdout')
+    parser.add_argument('--session-id', help='session id the rows are stored under (default batch-<id>)')
+    parser.add_argument('--concurrency', type=int, help='parallel Gemini calls (default BATCH_CONCURRENCY or 8)')
+    parser.add_argument('--rate', type=float, help='Gemini calls per second, 0 for unlimited (default BATCH_RATE_LIMIT or 10)')
+    args = parser.parse_args(argv)
+
+    if args.path == '-':
+        text = sys.stdin.read()
+    else:
+        with open(args.path, encoding='utf-8') as f:
+            text = f.read()
+    profiles = parse_profiles(text, args.format)
+
+    # Outside gunicorn, importing the app runs create_app(), which builds the MySQL pool and Gemini clients
+    import app
+
+    runner = build_batch_runner(
+        app.generate_content if app.model else None, app.get_branch_data,
+        app.recommendation_cache, app.recommendation_writer
+    )
+    if args.concurrency:
+        runner.concurrency = args.concurrency
+    if args.rate is not None:
+        runner.limiter = RateLimiter(args.rate)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for event in runner.run(profiles, args.session_id):
+            out.write(json.dumps(event) + '\n')
+            if event['event'] != 'result':
+                out.flush()
+                if args.output:
+                    print(json.dumps({k: v for k, v in event.items() if k != 'recommendation'}), file=sys.stderr)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
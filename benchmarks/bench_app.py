@@ -0,0 +1,37 @@
+"""WSGI entry point that runs app.py against the local Gemini and MySQL stand-ins
+
+    BENCH_SQLITE_PATH=/tmp/bench.sqlite3 gunicorn -w 4 benchmarks.bench_app:app
+
+benchmarks/loadtest.py starts gunicorn this way and sets the environment for you.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import fakes  # noqa: E402
+
+fakes.install_fakes()
+# Stands in for the migrate step gunicorn.conf.py runs against MySQL
+fakes.migrate_once()
+
+import app as mentor  # noqa: E402
+
+app = mentor.app
+ready_pid = None
+
+
+def create_app():
+    """mentor.create_app() plus the stand-in catalog and this worker's stats dump"""
+    global ready_pid
+    if ready_pid != os.getpid():
+        mentor.create_app()
+        fakes.seed_once(mentor.get_db_connection, mentor.branch_catalog)
+        fakes.start_stats_dumper(os.getenv('BENCH_STATS_DIR'), mentor.db_pool.stats)
+        ready_pid = os.getpid()
+    return app
+
+
+if os.getenv('DEFER_WORKER_INIT') != '1':
+    create_app()
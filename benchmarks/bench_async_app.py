@@ -0,0 +1,30 @@
+"""ASGI entry point that runs async_app.py against the local Gemini and MySQL stand-ins
+
+    BENCH_SQLITE_PATH=/tmp/bench.sqlite3 uvicorn benchmarks.bench_async_app:app --workers 2
+
+benchmarks/loadtest.py --mode async starts uvicorn this way and sets the environment for you.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import aiomysql  # noqa: E402
+
+from benchmarks import fakes  # noqa: E402
+
+fakes.install_fakes()
+aiomysql.create_pool = fakes.create_async_pool
+fakes.migrate_once()
+
+import async_app as mentor  # noqa: E402
+
+app = mentor.app
+
+
+@app.before_serving
+async def seed_stand_ins():
+    # Registered after async_app's own hook, so this worker's components exist by now
+    fakes.seed_once(mentor.get_sync_connection, mentor.branch_catalog)
+    fakes.start_stats_dumper(os.getenv('BENCH_STATS_DIR'))
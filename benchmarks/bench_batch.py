@@ -0,0 +1,129 @@
+"""Throughput of the batch recommendation runner on a generated cohort file
+
+Builds a CSV of --profiles student profiles (a share of them duplicates),
+runs it through batch.BatchRunner against the local Gemini and MySQL
+stand-ins, and compares the wall time with what the same profiles would take
+as serial /get_recommendations calls:
+
+    python benchmarks/bench_batch.py --profiles 1000 --concurrency 16 --rate 0
+    python benchmarks/bench_batch.py --output results/batch.json
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import fakes  # noqa: E402
+from benchmarks.loadtest import BRANCHES, YEARS, INTERESTS  # noqa: E402
+from suggest import SEED_GOALS  # noqa: E402
+
+
+def build_cohort_csv(count, duplicate_share, seed):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        if rows and rng.random() < duplicate_share:
+            rows.append(dict(rng.choice(rows), student_id=f"s{index}"))
+            continue
+        rows.append({
+            'student_id': f"s{index}",
+            'branch': rng.choice(BRANCHES),
+            'year': rng.choice(YEARS),
+            'interests': ', '.join(rng.sample(INTERESTS, rng.randint(1, 3))),
+            'goals': f"{rng.choice(SEED_GOALS)} ({index})"
+        })
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=['student_id', 'branch', 'year', 'interests', 'goals'])
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', type=int, default=1000)
+    parser.add_argument('--duplicates', type=float, default=0.2, help='share of profiles repeating an earlier one')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=0, help='Gemini calls per second, 0 for unlimited')
+    parser.add_argument('--latency-ms', type=float, default=200, help='median fake Gemini latency')
+    parser.add_argument('--gemini-rpm', type=float, default=0, help='GEMINI_RPM for the app scheduler, 0 to disable')
+    parser.add_argument('--fake-rpm', type=int, default=0, help='fake Gemini quota per minute, 0 for none')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write the result JSON here')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-batch-')
+    os.environ['BENCH_SQLITE_PATH'] = os.path.join(workdir, 'bench.sqlite3')
+    os.environ['FAKE_GEMINI_LATENCY_MS'] = str(args.latency_ms)
+    os.environ['FAKE_GEMINI_RPM'] = str(args.fake_rpm)
+    os.environ['GEMINI_RPM'] = str(args.gemini_rpm)
+    os.environ.setdefault('GEMINI_TPM', '0')
+    os.environ.setdefault('RECOMMENDATION_SPILL_DIR', os.path.join(workdir, 'spill'))
+    os.environ.setdefault('SUGGESTION_INDEX_PATH', os.path.join(workdir, 'suggestion_index.json'))
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    fakes.install_fakes()
+    fakes.migrate_once()
+
+    import app
+    from batch import BatchRunner, parse_profiles
+
+    fakes.seed_once(app.get_db_connection, app.branch_catalog)
+    profiles = parse_profiles(build_cohort_csv(args.profiles, args.duplicates, args.seed), 'csv')
+    runner = BatchRunner(
+        app.generate_content, app.get_branch_data, app.recommendation_cache, app.recommendation_writer,
+        concurrency=args.concurrency, rate=args.rate
+    )
+
+    started = time.monotonic()
+    summary = None
+    first_result_s = None
+    for event in runner.run(profiles):
+        if event['event'] == 'result' and first_result_s is None:
+            first_result_s = time.monotonic() - started
+        if event['event'] == 'done':
+            summary = event
+    elapsed = time.monotonic() - started
+
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM recommendations WHERE session_id = %s", (summary['session_id'],))
+    stored = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+
+    # Serial requests pay the model latency once per profile, duplicates included
+    serial_estimate_s = args.profiles * args.latency_ms / 1000.0
+    result = {
+        'profiles': args.profiles,
+        'unique': summary['unique'],
+        'duplicates': summary['duplicates'],
+        'gemini_calls': summary['gemini'],
+        'errors': summary['error'],
+        'rows_stored': stored,
+        'concurrency': args.concurrency,
+        'rate_limit': args.rate,
+        'latency_ms': args.latency_ms,
+        'seconds': round(elapsed, 3),
+        'first_result_s': round(first_result_s or 0, 3),
+        'profiles_per_second': round(args.profiles / elapsed, 2),
+        'serial_estimate_s': round(serial_estimate_s, 1),
+        'speedup_vs_serial': round(serial_estimate_s / elapsed, 1)
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    app.recommendation_writer.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Compare per-request catalog queries with the in-memory BranchCatalog lookup
+
+Usage:
+    python benchmarks/bench_catalog.py                # local SQLite stand-in
+    python benchmarks/bench_catalog.py --mysql        # MySQL from the MYSQL_* env vars
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import BranchCatalog, fallback_branch_data  # noqa: E402
+from benchmarks.fakes import sqlite_connection_factory  # noqa: E402
+
+BRANCHES = ['Computer Science', 'Mechanical Engineering', 'Electrical Engineering',
+            'Civil Engineering', 'Business Administration', 'Chemical Engineering']
+
+
+def seed_sqlite(path, rows_per_branch):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE electives (id INTEGER PRIMARY KEY, name TEXT, branch TEXT, prerequisites TEXT, description TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE clubs (id INTEGER PRIMARY KEY, name TEXT, branch TEXT, description TEXT, activities TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE internships (id INTEGER PRIMARY KEY, name TEXT, branch TEXT, skills_required TEXT, description TEXT, company_type TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    ''')
+    for branch in BRANCHES:
+        for i in range(rows_per_branch):
+            conn.execute("INSERT INTO electives (name, branch, prerequisites, description) VALUES (?, ?, ?, ?)",
+                         (f"{branch} elective {i}", branch, "Intro course", "Description"))
+            conn.execute("INSERT INTO clubs (name, branch, description, activities) VALUES (?, ?, ?, ?)",
+                         (f"{branch} club {i}", branch, "Description", "Workshops"))
+            conn.execute("INSERT INTO internships (name, branch, skills_required, description, company_type) VALUES (?, ?, ?, ?, ?)",
+                         (f"{branch} internship {i}", branch, "Python", "Description", "Industry"))
+    conn.commit()
+    conn.close()
+
+
+def query_branch_data(get_connection, branch):
+    """The original per-request implementation of get_branch_data"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, prerequisites, description FROM electives WHERE branch = %s", (branch,))
+    electives = [(row[0], row[1] or 'None', row[2] or '') for row in cursor.fetchall()]
+    cursor.execute("SELECT name, description, activities FROM clubs WHERE branch = %s", (branch,))
+    clubs = [(row[0], row[1] or '', row[2] or '') for row in cursor.fetchall()]
+    cursor.execute("SELECT name, skills_required, description, company_type FROM internships WHERE branch = %s", (branch,))
+    internships = [(row[0], row[1] or '', row[2] or '', row[3] or '') for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    defaults = fallback_branch_data(branch)
+    return electives or defaults[0], clubs or defaults[1], internships or defaults[2]
+
+
+def measure(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        branch = random.choice(BRANCHES)
+        start = time.perf_counter()
+        fn(branch)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return {
+        'mean_us': round(statistics.fmean(timings), 2),
+        'p50_us': round(timings[len(timings) // 2], 2),
+        'p99_us': round(timings[int(len(timings) * 0.99)], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mysql', action='store_true', help='benchmark against MySQL instead of SQLite')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=20, help='rows per branch per table (SQLite only)')
+    args = parser.parse_args()
+
+    if args.mysql:
+        import mysql.connector
+        config = {
+            'host': os.getenv('MYSQL_HOST', 'localhost'),
+            'user': os.getenv('MYSQL_USER', 'root'),
+            'password': os.getenv('MYSQL_PASSWORD', 'root@123'),
+            'database': os.getenv('MYSQL_DB', 'college_mentor')
+        }
+        get_connection = lambda: mysql.connector.connect(**config)  # noqa: E731
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'catalog.sqlite3')
+        seed_sqlite(path, args.rows)
+        get_connection = sqlite_connection_factory(path)
+
+    catalog = BranchCatalog(get_connection)
+    catalog.load(force=True)
+
+    before = measure(lambda branch: query_branch_data(get_connection, branch), args.iterations)
+    after = measure(catalog.get, args.iterations)
+
+    print(f"{'':<22}{'mean':>12}{'p50':>12}{'p99':>12}")
+    for label, result in (('per-request queries', before), ('in-memory catalog', after)):
+        print(f"{label:<22}{result['mean_us']:>10}us{result['p50_us']:>10}us{result['p99_us']:>10}us")
+    print(f"speedup (mean): {before['mean_us'] / max(after['mean_us'], 0.01):.0f}x")
+
+
+if __name__ == '__main__':
+    main()
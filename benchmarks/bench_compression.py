@@ -0,0 +1,72 @@
+"""Stored size and decode cost of recommendation markdown per codec, plus response encodings
+
+Usage:
+    python benchmarks/bench_compression.py [--iterations 2000]
+
+Uses the structured fallback recommendations as realistic markdown, and a
+history-style JSON page of five of them for the response encodings.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import fallback_branch_data  # noqa: E402
+from compression import compress_text, decompress_text, compress_body, brotli, zstandard  # noqa: E402
+from fallback import render_fallback  # noqa: E402
+
+PROFILES = [
+    ('Computer Science', '2nd Year', 'Artificial Intelligence, Web Development, Cloud', 'Become a machine learning engineer'),
+    ('Mechanical Engineering', '3rd Year', 'Robotics, CAD', 'Design autonomous vehicles'),
+    ('Civil Engineering', '1st Year', 'Sustainability', 'Work on green infrastructure projects'),
+    ('Electrical Engineering', '4th Year', 'Embedded Systems, Renewable Energy', 'Build smart grid hardware'),
+    ('Business Administration', '2nd Year', 'Entrepreneurship, Finance', 'Start a fintech company'),
+]
+
+
+def documents():
+    docs = []
+    for branch, year, interests, goals in PROFILES:
+        electives, clubs, internships = fallback_branch_data(branch)
+        docs.append(render_fallback('error', branch, year, interests, goals, electives, clubs, internships))
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    docs = documents()
+    raw = sum(len(doc.encode('utf-8')) for doc in docs)
+
+    print(f"{'codec':<8}{'stored bytes':>14}{'ratio':>8}{'decode us':>12}")
+    for codec in ('none', 'zlib', 'zstd'):
+        if codec == 'zstd' and zstandard is None:
+            print("zstd    (zstandard not installed)")
+            continue
+        stored = [compress_text(doc, codec) for doc in docs]
+        size = sum(len(value) for value in stored)
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for value in stored:
+                decompress_text(value)
+        decode_us = (time.perf_counter() - start) / (args.iterations * len(stored)) * 1e6
+        print(f"{codec:<8}{size:>14}{raw / size:>8.2f}{decode_us:>12.1f}")
+
+    page = json.dumps({'history': [{'id': i, 'recommendation': doc} for i, doc in enumerate(docs)]}).encode('utf-8')
+    print(f"\nJSON page of {len(docs)} documents: {len(page)} bytes")
+    for encoding in ('gzip', 'br'):
+        if encoding == 'br' and brotli is None:
+            print("br      (brotli not installed)")
+            continue
+        start = time.perf_counter()
+        body = compress_body(page, encoding)
+        print(f"{encoding:<8}{len(body):>14}{len(page) / len(body):>8.2f}"
+              f"{(time.perf_counter() - start) * 1e6:>12.1f} us to encode")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Requests/sec of the fallback recommendation f-strings against a full render of the templates they mirror
+
+Usage:
+    python benchmarks/bench_fallback.py [--seconds 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import fallback_branch_data  # noqa: E402
+from fallback import load_templates, render_fallback  # noqa: E402
+
+PROFILES = [
+    ('Computer Science', '2nd Year', 'Artificial Intelligence, Web Development, Cloud', 'Become a machine learning engineer'),
+    ('Mechanical Engineering', '3rd Year', 'Robotics, CAD', 'Design autonomous vehicles'),
+    ('Civil Engineering', '1st Year', 'Sustainability', 'Work on green infrastructure projects'),
+]
+
+TEMPLATES = load_templates()
+
+
+def jinja_full_render(kind, branch, year, interests, goals, electives, clubs, internships):
+    """Compiled template rendered in full on every request"""
+    return TEMPLATES[kind].render(
+        branch=branch, year=year, interests=interests, goals=goals,
+        primary_interest=interests.split(',', 1)[0].strip(),
+        electives=electives, clubs=clubs, internships=internships
+    )
+
+
+def requests_per_second(render, kind, seconds):
+    cases = [(branch, year, interests, goals) + tuple(fallback_branch_data(branch))
+             for branch, year, interests, goals in PROFILES]
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for case in cases:
+            render(kind, *case)
+        count += len(cases)
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=2.0)
+    args = parser.parse_args()
+
+    renderers = [
+        ('f-string (served)', render_fallback),
+        ('jinja full render', jinja_full_render),
+    ]
+    print(f"{'':<24}{'unavailable':>14}{'error':>14}")
+    for label, render in renderers:
+        rates = [requests_per_second(render, kind, args.seconds) for kind in ('unavailable', 'error')]
+        print(f"{label:<24}" + ''.join(f"{rate:>10.0f} r/s" for rate in rates))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Tail latency of Gemini calls with and without hedging to a second model tier
+
+Two fake models with scripted latency distributions stand in for Gemini:
+the primary answers around --latency-ms but --tail-rate of its calls are
+stragglers around --tail-ms; the secondary is a little slower but rarely
+straggles. The same request mix is run against the primary alone, then
+through HedgedModel (sync on threads, and async), and the latency
+percentiles, hedge rate and extra calls are reported:
+
+    python benchmarks/bench_hedging.py --requests 600 --concurrency 8
+    python benchmarks/bench_hedging.py --primary-script 100,100,100,100,100,100,100,100,100,1500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeGenerativeModel  # noqa: E402
+from benchmarks.loadtest import percentile  # noqa: E402
+from hedging import HedgedModel, ModelTier  # noqa: E402
+
+PROMPT = "Student profile: Computer Science, 2nd Year, interests AI, goals ML engineer"
+
+
+def build_models(args):
+    primary = FakeGenerativeModel(
+        'fake-primary', latency_ms=args.latency_ms, jitter=0.25, tail_rate=args.tail_rate, tail_ms=args.tail_ms,
+        latency_script=args.primary_script, response_bytes=2000, seed=args.seed
+    )
+    secondary = FakeGenerativeModel(
+        'fake-secondary', latency_ms=args.latency_ms * args.secondary_factor, jitter=0.25,
+        tail_rate=args.tail_rate / 5, tail_ms=args.tail_ms, response_bytes=2000, seed=args.seed + 1
+    )
+    return primary, secondary
+
+
+def hedged(primary, secondary, args):
+    return HedgedModel(
+        [ModelTier('fake-primary', primary), ModelTier('fake-secondary', secondary)],
+        quantile=args.quantile, min_delay=0.01, max_hedge_ratio=args.max_ratio
+    )
+
+
+def summary(latencies, models, requests, extra=None):
+    latencies = sorted(latencies)
+    result = {
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+        'p90_ms': round(percentile(latencies, 0.9) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1),
+        'calls_per_request': round(sum(m.calls for m in models) / requests, 3),
+    }
+    result.update(extra or {})
+    return result
+
+
+def run_sync(model, requests, concurrency):
+    def one(_):
+        started = time.monotonic()
+        model.generate_content(PROMPT, request_options={'timeout': 30})
+        return time.monotonic() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(one, range(requests)))
+
+
+async def run_async(model, requests, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            started = time.monotonic()
+            await model.generate_content_async(PROMPT, request_options={'timeout': 30})
+            return time.monotonic() - started
+
+    return await asyncio.gather(*(one() for _ in range(requests)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=600)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=100, help='median latency of the primary')
+    parser.add_argument('--tail-rate', type=float, default=0.05, help='share of primary calls that straggle')
+    parser.add_argument('--tail-ms', type=float, default=800, help='median latency of a straggler')
+    parser.add_argument('--secondary-factor', type=float, default=1.25, help='secondary median / primary median')
+    parser.add_argument('--primary-script', help='comma-separated primary latencies in ms, replayed in order')
+    parser.add_argument('--quantile', type=float, default=0.9)
+    parser.add_argument('--max-ratio', type=float, default=0.15, help='most hedged calls per request')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    result = {}
+    primary, secondary = build_models(args)
+    result['primary_only'] = summary(run_sync(primary, args.requests, args.concurrency), [primary], args.requests)
+
+    primary, secondary = build_models(args)
+    model = hedged(primary, secondary, args)
+    latencies = run_sync(model, args.requests, args.concurrency)
+    stats = model.stats()
+    result['hedged_sync'] = summary(latencies, [primary, secondary], args.requests, {
+        'hedged': stats['hedged'], 'hedges_won': stats['hedges_won'],
+        'hedge_delay_ms': round(model.tiers[0].hedge_delay(args.quantile, 0) * 1000, 1)
+    })
+
+    primary, secondary = build_models(args)
+    model = hedged(primary, secondary, args)
+    latencies = asyncio.run(run_async(model, args.requests, args.concurrency))
+    stats = model.stats()
+    result['hedged_async'] = summary(latencies, [primary, secondary], args.requests, {
+        'hedged': stats['hedged'], 'hedges_won': stats['hedges_won'], 'cancelled': stats['tiers']['fake-primary']['cancelled']
+    })
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
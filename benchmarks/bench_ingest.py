@@ -0,0 +1,118 @@
+"""Rows per second of catalog ingestion, its idempotence, and how soon the catalog sees the rows
+
+Writes a generated --rows row feed per table (with a few invalid and
+duplicate rows) and loads it into a SQLite stand-in, or MySQL with --mysql.
+Each feed is then loaded a second time with some descriptions changed; row
+counts must not move. A BranchCatalog is passed in so it reloads as soon as
+each load commits:
+
+    python benchmarks/bench_ingest.py --rows 50000
+    python benchmarks/bench_ingest.py --mysql --rows 50000 --load-data     # MYSQL_* env vars
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector  # noqa: E402
+
+from benchmarks.fakes import SQLiteConnection  # noqa: E402
+from catalog import BranchCatalog  # noqa: E402
+from ingest import CATALOG_COLUMNS, CatalogIngestor, read_rows  # noqa: E402
+from schema import initialize_database  # noqa: E402
+
+BRANCHES = ['Computer Science', 'Mechanical Engineering', 'Electrical Engineering',
+            'Civil Engineering', 'Business Administration', 'Chemical Engineering']
+
+
+def write_feed(path, table, rows, seed, revision):
+    rng = random.Random(seed)
+    columns = CATALOG_COLUMNS[table]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for i in range(rows):
+            row = [BRANCHES[i % len(BRANCHES)], f"{table[:-1].title()} {i}"]
+            row += [f"{column} for item {i}, revision {revision if rng.random() < 0.1 else 0}" for column in columns[2:]]
+            if i % 1000 == 7:
+                row[1] = ''  # rejected: no name
+            if i % 1000 == 11:
+                writer.writerow(row)  # duplicate within the feed
+            writer.writerow(row)
+
+
+def count_rows(get_connection, table):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    count = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return count
+
+
+def wait_for_reload(catalog, reloads, timeout=60):
+    started = time.monotonic()
+    while catalog.stats()['reloads'] == reloads and time.monotonic() - started < timeout:
+        time.sleep(0.005)
+    return round(time.monotonic() - started, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='rows per table')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--transaction-rows', type=int, default=10000)
+    parser.add_argument('--load-data', action='store_true', help='LOAD DATA LOCAL INFILE (MySQL only)')
+    parser.add_argument('--mysql', action='store_true', help='use MySQL from the MYSQL_* env vars')
+    parser.add_argument('--seed', type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-ingest-')
+    if args.mysql:
+        import services
+        config = services.mysql_config()
+
+        def get_connection():
+            return mysql.connector.connect(allow_local_infile=args.load_data, **config)
+    else:
+        path = os.path.join(workdir, 'bench.sqlite3')
+
+        def get_connection():
+            return SQLiteConnection(path, error_class=mysql.connector.Error)
+
+    initialize_database(get_connection)
+    catalog = BranchCatalog(get_connection, refresh_interval=3600)
+    catalog.start()
+
+    result = {'rows_per_table': args.rows, 'load_data': args.load_data}
+    for table in CATALOG_COLUMNS:
+        runs = []
+        for revision in (1, 2):
+            feed = os.path.join(workdir, f"{table}-{revision}.csv")
+            write_feed(feed, table, args.rows, args.seed + revision, revision)
+            ingestor = CatalogIngestor(get_connection, table, chunk_size=args.chunk_size,
+                                       transaction_rows=args.transaction_rows, load_data=args.load_data,
+                                       rejects_path=os.path.join(workdir, 'rejects.jsonl'))
+            reloads = catalog.stats()['reloads']
+            stats = ingestor.run(read_rows(feed), catalog=catalog)
+            stats['catalog_reload_s'] = wait_for_reload(catalog, reloads)
+            stats['table_rows'] = count_rows(get_connection, table)
+            runs.append(stats)
+        result[table] = {
+            'first_load': runs[0],
+            'reload': runs[1],
+            'idempotent': runs[0]['table_rows'] == runs[1]['table_rows'],
+        }
+    result['catalog'] = catalog.stats()
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
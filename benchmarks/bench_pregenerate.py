@@ -0,0 +1,133 @@
+"""Peak-time coverage of pregenerated recommendations, and a resumable pregeneration run
+
+Seeds --history past requests with Zipf-distributed profiles (retyped, so
+only the canonical profile repeats) into a SQLite stand-in, then pregenerates
+the top --limit profiles with a fake Gemini model in two runs: the first is
+cut off by --max-calls and the second resumes it. A third run finds nothing
+left to do. Finally --peak requests from the same distribution are looked up
+as if during peak hours:
+
+    python benchmarks/bench_pregenerate.py --history 20000 --limit 300 --peak 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector  # noqa: E402
+
+from benchmarks.fakes import FakeGenerativeModel, SQLiteConnection  # noqa: E402
+from benchmarks.loadtest import BRANCHES, INTERESTS, YEARS  # noqa: E402
+from catalog import fallback_branch_data  # noqa: E402
+from pregenerate import PregeneratedStore, PregenerationJob  # noqa: E402
+from schema import initialize_database  # noqa: E402
+from suggest import SEED_GOALS  # noqa: E402
+from writer import INSERT_SQL  # noqa: E402
+
+
+def profile_pool(size, seed):
+    rng = random.Random(seed)
+    pool = set()
+    while len(pool) < size:
+        pool.add((rng.choice(BRANCHES), rng.choice(YEARS), tuple(sorted(rng.sample(INTERESTS, rng.randint(1, 3)))),
+                  rng.choice(SEED_GOALS)))
+    return sorted(pool)
+
+
+def draw(pool, count, exponent, seed):
+    """count profiles drawn with Zipf weights, each retyped with different case and punctuation"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** exponent for rank in range(len(pool))]
+    for branch, year, interests, goals in rng.choices(pool, weights=weights, k=count):
+        interests = list(interests)
+        rng.shuffle(interests)
+        yield branch, year, ', '.join(i.lower() if rng.random() < 0.3 else i for i in interests), \
+            ('To ' + goals.lower() + '.') if rng.random() < 0.3 else goals
+
+
+def seed_history(get_connection, pool, rows, exponent, seed):
+    now = datetime.now()
+    rng = random.Random(seed)
+    conn = get_connection()
+    cursor = conn.cursor()
+    batch = []
+    for branch, year, interests, goals in draw(pool, rows, exponent, seed):
+        created = now - timedelta(seconds=rng.randint(0, 29 * 86400))
+        batch.append(('history', branch, year, interests, goals, b'', 'Summary', 'gemini',
+                      created.strftime('%Y-%m-%d %H:%M:%S')))
+        if len(batch) == 1000:
+            cursor.executemany(INSERT_SQL, batch)
+            batch = []
+    if batch:
+        cursor.executemany(INSERT_SQL, batch)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history', type=int, default=20000, help='past requests to mine')
+    parser.add_argument('--profiles', type=int, default=2000, help='distinct profiles students choose from')
+    parser.add_argument('--zipf', type=float, default=1.0, help='popularity skew of the profiles')
+    parser.add_argument('--limit', type=int, default=300, help='profiles to pregenerate')
+    parser.add_argument('--max-calls', type=int, default=150, help='call budget of the first, interrupted run')
+    parser.add_argument('--peak', type=int, default=5000, help='peak-time requests to look up')
+    parser.add_argument('--latency-ms', type=float, default=0, help='fake Gemini latency per call')
+    parser.add_argument('--seed', type=int, default=6)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='bench-pregenerate-'), 'bench.sqlite3')
+
+    def get_connection():
+        return SQLiteConnection(path, error_class=mysql.connector.Error)
+
+    initialize_database(get_connection)
+    pool = profile_pool(args.profiles, args.seed)
+    seed_history(get_connection, pool, args.history, args.zipf, args.seed)
+
+    model = FakeGenerativeModel(latency_ms=args.latency_ms, seed=args.seed)
+
+    def generate(prompt, endpoint, priority=None):
+        return model.generate_content(prompt)
+
+    # An off-peak window that is not now, so the looked-up requests count as peak
+    hour = datetime.now().hour
+    store = PregeneratedStore(get_connection, window=((hour + 1) % 24, (hour + 2) % 24))
+    job = PregenerationJob(get_connection, generate, lambda branch, interests, goals: fallback_branch_data(branch),
+                           store, limit=args.limit, rate=0)
+    runs = {
+        'interrupted': job.run_once(ignore_window=True, max_calls=args.max_calls),
+        'resumed': job.run_once(ignore_window=True),
+        'nothing_left': job.run_once(ignore_window=True),
+    }
+
+    # A fresh worker loading the table, as at the start of a peak
+    store = PregeneratedStore(get_connection, window=store.window)
+    store.load(force=True)
+    started = time.perf_counter()
+    for profile in draw(pool, args.peak, args.zipf, args.seed + 1):
+        store.get(*profile)
+    lookup_us = (time.perf_counter() - started) / args.peak * 1e6
+    peak = store.stats()['peak']
+
+    print(json.dumps({
+        'history_rows': args.history,
+        'distinct_profiles': args.profiles,
+        'runs': runs,
+        'gemini_calls': model.calls,
+        'peak_requests': peak['lookups'],
+        'peak_served_pregenerated': peak['hits'],
+        'peak_coverage': peak['coverage'],
+        'lookup_us': round(lookup_us, 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
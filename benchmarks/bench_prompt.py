@@ -0,0 +1,174 @@
+"""Prompt tokens per recommendation call, before and after moving the format into a system instruction
+
+Usage:
+    python benchmarks/bench_prompt.py            # four-characters-per-token estimate
+    python benchmarks/bench_prompt.py --live     # Gemini count_tokens, needs GEMINI_API_KEY
+
+The system instruction is still billed as input on every call; the savings
+come from the compact profile, the dedented format and no longer repeating
+the interests, goals and option lists.
+"""
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import fallback_branch_data  # noqa: E402
+from prompts import build_recommendation_prompt, RECOMMENDATION_SYSTEM_INSTRUCTION  # noqa: E402
+
+PROFILES = [
+    ('Computer Science', '2nd Year', 'Artificial Intelligence, Web Development, Cloud', 'Become a machine learning engineer'),
+    ('Mechanical Engineering', '3rd Year', 'Robotics, CAD', 'Design autonomous vehicles'),
+    ('Civil Engineering', '1st Year', 'Sustainability', 'Work on green infrastructure projects'),
+    ('Electrical Engineering', '4th Year', 'Embedded Systems, Renewable Energy, IoT', 'Build smart grid hardware at a utility'),
+]
+
+
+def legacy_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships):
+    """The original prompt: full markdown skeleton and list reprs sent on every call"""
+    return f"""
+        You are an expert college academic advisor. Create comprehensive, personalized recommendations for this student:
+
+        **Student Profile:**
+        - Branch: {branch}
+        - Year: {year}  
+        - Interests: {interests}
+        - Career Goals: {goals}
+
+        **Available Options:**
+        - Electives: {[e[0] for e in electives]}
+        - Clubs: {[c[0] for c in clubs]}
+        - Internships: {[i[0] for i in internships]}
+
+        Create detailed recommendations in this exact markdown format:
+
+        # 🎓 Personalized Academic & Career Recommendations
+
+        ## 📋 Your Profile Summary
+        [Brief analysis of student's profile and how interests align with career goals]
+
+        ## 🎓 Recommended Electives (Top 3)
+
+        ### 1. {electives[0][0]}
+        **Why This Perfectly Fits You:** [Specific connection to their interests and goals]
+        **Key Benefits:**
+        • [Specific skill development]
+        • [Career advantages]
+        • [Industry relevance]
+        **Prerequisites:** {electives[0][1]}
+        **Career Impact:** [How this directly helps achieve their goals]
+
+        ### 2. {electives[1][0] if len(electives) > 1 else '[Second Best Elective]'}
+        **Why This Perfectly Fits You:** [Specific connection]
+        **Key Benefits:**
+        • [Benefits specific to their interests]
+        • [Complementary skills]
+        • [Future opportunities]
+        **Prerequisites:** {electives[1][1] if len(electives) > 1 else '[Prerequisites]'}
+        **Career Impact:** [Specific career benefits]
+
+        ### 3. {electives[2][0] if len(electives) > 2 else '[Third Best Elective]'}
+        **Why This Perfectly Fits You:** [Specific connection]
+        **Key Benefits:**
+        • [Advanced skill development]
+        • [Industry exposure]
+        • [Network building]
+        **Prerequisites:** {electives[2][1] if len(electives) > 2 else '[Prerequisites]'}
+        **Career Impact:** [Long-term career benefits]
+
+        ## 🏛️ Recommended Club
+
+        ### {clubs[0][0]}
+        **Perfect Match Because:** [Why this club aligns with their profile]
+        **What You'll Gain:**
+        • [Specific networking opportunities]
+        • [Skill development activities]
+        • [Leadership experiences]
+        • [Industry connections]
+
+        ## 💼 Recommended Internship Path
+
+        ### {internships[0][0]}
+        **Ideal Match Because:** [Connection to interests and goals]
+        **Experience You'll Gain:**
+        • [Hands-on technical experience]
+        • [Industry exposure]
+        • [Professional skills]
+        • [Network building]
+        **Skills to Develop First:** {internships[0][1]}
+        **Application Strategy:** [Specific advice for securing this internship]
+
+        ## 🎯 Personalized Action Plan
+
+        **Immediate Steps (Next 4 weeks):**
+        1. [Specific first action]
+        2. [Specific second action]
+        3. [Specific third action]
+
+        **Short-term Goals (3-6 months):**
+        1. [Specific goal with timeline]
+        2. [Specific goal with timeline]
+        3. [Specific goal with timeline]
+
+        **Long-term Vision (1-2 years):**
+        1. [Major milestone]
+        2. [Career positioning goal]
+        3. [Expertise development target]
+
+        ## 📈 Success Strategies
+
+        **Skill Development Priority:**
+        [Top 3 skills to focus on based on their interests and goals]
+
+        **Networking Approach:**
+        [Specific networking strategies for their field]
+
+        **Portfolio Building:**
+        [What they should include in their portfolio]
+
+        Make every recommendation highly specific to their interests ({interests}) and career goals ({goals}). Be actionable and practical.
+        """
+
+
+def build_models(live):
+    if live:
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ['GEMINI_API_KEY'])
+        plain = genai.GenerativeModel('gemini-2.0-flash-exp')
+        instructed = genai.GenerativeModel('gemini-2.0-flash-exp', system_instruction=RECOMMENDATION_SYSTEM_INSTRUCTION)
+    else:
+        from benchmarks.fakes import FakeGenerativeModel
+        plain = FakeGenerativeModel()
+        instructed = FakeGenerativeModel(system_instruction=RECOMMENDATION_SYSTEM_INSTRUCTION)
+    return plain, instructed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--live', action='store_true', help='count with the Gemini API instead of estimating')
+    args = parser.parse_args()
+    plain, instructed = build_models(args.live)
+
+    before, after, chars_before, chars_after = [], [], [], []
+    for branch, year, interests, goals in PROFILES:
+        electives, clubs, internships = fallback_branch_data(branch)
+        old = legacy_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships)
+        new = build_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships)
+        before.append(plain.count_tokens(old).total_tokens)
+        after.append(instructed.count_tokens(new).total_tokens)
+        chars_before.append(len(old))
+        chars_after.append(len(new) + len(RECOMMENDATION_SYSTEM_INSTRUCTION))
+
+    instruction = plain.count_tokens(RECOMMENDATION_SYSTEM_INSTRUCTION).total_tokens
+    mean_before, mean_after = statistics.mean(before), statistics.mean(after)
+    print(f"counted with:             {'Gemini count_tokens' if args.live else 'estimate (4 chars/token)'}")
+    print(f"prompt tokens before:     {mean_before:.0f} ({statistics.mean(chars_before):.0f} chars)")
+    print(f"prompt tokens after:      {mean_after:.0f} ({statistics.mean(chars_after):.0f} chars), "
+          f"of which {instruction} system instruction")
+    print(f"reduction:                {(1 - mean_after / mean_before) * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
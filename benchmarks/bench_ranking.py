@@ -0,0 +1,95 @@
+"""Build, incremental rebuild and per-profile latency of the catalog ranker
+
+Generates a synthetic catalog of --items electives, clubs and internships
+in one branch, builds the ranker, rebuilds it after --changed new items,
+and times ranking for a mix of student profiles:
+
+    python benchmarks/bench_ranking.py --items 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadtest import INTERESTS  # noqa: E402
+from ranking import CatalogRanker  # noqa: E402
+from suggest import SEED_GOALS  # noqa: E402
+
+BRANCH = 'Computer Science'
+TOPICS = [
+    'machine learning', 'deep learning', 'web development', 'cloud computing', 'cybersecurity', 'data science',
+    'robotics', 'embedded systems', 'renewable energy', 'computer vision', 'databases', 'distributed systems',
+    'mobile apps', 'blockchain', 'game development', 'compilers', 'networking', 'quantum computing',
+    'entrepreneurship', 'product design', 'signal processing', 'statistics', 'devops', 'ui ux design'
+]
+LEVELS = ['Introduction to', 'Advanced', 'Applied', 'Foundations of', 'Seminar in', 'Projects in']
+
+
+def build_index(items, seed):
+    rng = random.Random(seed)
+
+    def topic_pair():
+        return rng.sample(TOPICS, 2)
+
+    electives, clubs, internships = [], [], []
+    for i in range(items):
+        a, b = topic_pair()
+        electives.append((f"{rng.choice(LEVELS)} {a.title()} {i}", f"Basics of {b}", f"Hands-on {a} with {b} projects"))
+        a, b = topic_pair()
+        clubs.append((f"{a.title()} Club {i}", f"Students building {a} and {b}", "Workshops, hackathons"))
+        a, b = topic_pair()
+        internships.append((f"{a.title()} Intern {i}", f"Python, {b}", f"Work on {a} products", 'Industry'))
+    return {BRANCH: (tuple(electives), tuple(clubs), tuple(internships))}
+
+
+def profiles(count, seed):
+    rng = random.Random(seed)
+    return [(', '.join(rng.sample(INTERESTS, rng.randint(1, 3))), rng.choice(SEED_GOALS)) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000, help='items per section')
+    parser.add_argument('--changed', type=int, default=1000, help='items added before the incremental rebuild')
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    index = build_index(args.items, args.seed)
+    started = time.perf_counter()
+    ranker = CatalogRanker.build(index)
+    build_s = time.perf_counter() - started
+
+    electives, clubs, internships = index[BRANCH]
+    extra = build_index(args.changed, args.seed + 1)[BRANCH]
+    index = {BRANCH: (electives + extra[0], clubs + extra[1], internships + extra[2])}
+    started = time.perf_counter()
+    ranker = CatalogRanker.build(index, previous=ranker)
+    rebuild_s = time.perf_counter() - started
+
+    sections = index[BRANCH]
+    samples = []
+    for interests, goals in profiles(args.queries, args.seed):
+        started = time.perf_counter()
+        ranked = ranker.rank(BRANCH, sections, interests, goals)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+
+    interests, goals = 'Artificial Intelligence, Robotics', 'Become a machine learning engineer'
+    print(f"items per section: {len(sections[0])}, postings: {ranker.stats()['postings']}")
+    print(f"full build: {build_s:.2f}s, rebuild after {args.changed} new items: {rebuild_s:.2f}s")
+    print(f"rank per profile: p50 {statistics.median(samples):.3f} ms, "
+          f"p99 {samples[int(len(samples) * 0.99) - 1]:.3f} ms, max {samples[-1]:.3f} ms")
+    print(f"\nTop picks for '{interests}' / '{goals}':")
+    for name, section in zip(('electives', 'clubs', 'internships'), ranker.rank(BRANCH, sections, interests, goals)):
+        for item in section:
+            print(f"  {name:<12}{item[0]}")
+    del ranked
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Rows archived per second by the recommendation retention job
+
+Seeds --rows recommendations spread over the past --months months into a
+SQLite stand-in (or MySQL with --mysql), then runs one retention pass that
+keeps --days days:
+
+    python benchmarks/bench_retention.py --rows 100000 --days 90
+    python benchmarks/bench_retention.py --mysql --rows 100000     # MYSQL_* env vars, partitioned table
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector  # noqa: E402
+
+from benchmarks.fakes import SQLiteConnection  # noqa: E402
+from compression import compress_text  # noqa: E402
+from retention import RetentionJob  # noqa: E402
+from schema import initialize_database  # noqa: E402
+from writer import INSERT_SQL  # noqa: E402
+
+
+def seed(get_connection, rows, months, seed_value):
+    rng = random.Random(seed_value)
+    body = compress_text("# 🎓 Personalized Academic & Career Recommendations\n" + "- Practical advice.\n" * 150)
+    now = datetime.now()
+    conn = get_connection()
+    cursor = conn.cursor()
+    batch = []
+    for i in range(rows):
+        created = now - timedelta(seconds=rng.randint(0, months * 30 * 86400))
+        batch.append((f"session-{i % 5000}", 'Computer Science', '2nd Year', 'AI', 'Become an ML engineer',
+                      body, 'Summary', 'gemini', created.strftime('%Y-%m-%d %H:%M:%S')))
+        if len(batch) == 1000:
+            cursor.executemany(INSERT_SQL, batch)
+            batch = []
+    if batch:
+        cursor.executemany(INSERT_SQL, batch)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def count_rows(get_connection):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM recommendations")
+    count = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--months', type=int, default=12, help='spread seeded rows over this many months')
+    parser.add_argument('--days', type=int, default=90, help='retention period')
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--mysql', action='store_true', help='use MySQL from the MYSQL_* env vars')
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-retention-')
+    if args.mysql:
+        import services
+        config = services.mysql_config()
+
+        def get_connection():
+            return mysql.connector.connect(**config)
+    else:
+        path = os.path.join(workdir, 'bench.sqlite3')
+
+        def get_connection():
+            return SQLiteConnection(path, error_class=mysql.connector.Error)
+
+    initialize_database(get_connection)
+    seed(get_connection, args.rows, args.months, args.seed)
+    before = count_rows(get_connection)
+
+    job = RetentionJob(get_connection, os.path.join(workdir, 'archive'), retain_days=args.days,
+                       batch_size=args.batch_size)
+    started = time.monotonic()
+    stats = job.run_once()
+    elapsed = time.monotonic() - started
+
+    archived_lines = 0
+    archive_bytes = 0
+    for name in os.listdir(job.archive_dir):
+        file_path = os.path.join(job.archive_dir, name)
+        archive_bytes += os.path.getsize(file_path)
+        with gzip.open(file_path, 'rt', encoding='utf-8') as f:
+            archived_lines += sum(1 for _ in f)
+
+    print(json.dumps(dict(
+        stats,
+        rows_before=before,
+        rows_after=count_rows(get_connection),
+        archived_lines=archived_lines,
+        archive_mb=round(archive_bytes / 1e6, 2),
+        wall_seconds=round(elapsed, 3)
+    ), indent=2))
+
+
+if __name__ == '__main__':
+    main()
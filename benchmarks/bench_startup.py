@@ -0,0 +1,128 @@
+"""Startup time of the real app: cold import, and gunicorn launch to the first 200 on /health
+
+Runs app.py itself (no stand-ins) with MySQL pointed at --mysql-host. The
+default is a blackholed address, so every connect attempt stalls for
+DB_CONNECT_TIMEOUT the way it does when the MySQL host is unreachable:
+
+    python benchmarks/bench_startup.py --runs 3 --workers 2
+    python benchmarks/bench_startup.py --mysql-host 127.0.0.1     # MySQL refusing or reachable
+
+Each gunicorn mode is timed from spawning the server to the first 200:
+post_fork is the default config, preload adds --preload, and import sets
+DEFER_WORKER_INIT=0 to build everything while the module is imported.
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'post_fork': ([], {}),
+    'preload': (['--preload'], {}),
+    'import': ([], {'DEFER_WORKER_INIT': '0'}),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def health_ok(port):
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+        conn.request('GET', '/health')
+        return conn.getresponse().status == 200
+    except OSError:
+        return False
+
+
+def time_import(env):
+    """Seconds for a fresh interpreter to import app without setting a worker up"""
+    started = time.monotonic()
+    subprocess.run([sys.executable, '-c', 'import app'], env=dict(env, DEFER_WORKER_INIT='1'), cwd=ROOT, check=True)
+    return time.monotonic() - started
+
+
+def time_first_health(env, workers, extra_args, timeout):
+    port = free_port()
+    command = [
+        sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f"127.0.0.1:{port}",
+        '--chdir', ROOT, '--log-level', 'warning'
+    ] + extra_args + ['app:app']
+    started = time.monotonic()
+    server = subprocess.Popen(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.monotonic() - started < timeout:
+            if health_ok(port):
+                return time.monotonic() - started
+            time.sleep(0.01)
+        return None
+    finally:
+        # Only boot is measured; workers flushing to an unreachable MySQL would drag out a graceful stop
+        server.send_signal(signal.SIGQUIT)
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def summary(samples):
+    samples = [s for s in samples if s is not None]
+    if not samples:
+        return None
+    return {'median_s': round(statistics.median(samples), 3), 'min_s': round(min(samples), 3), 'runs': len(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--mysql-host', default='10.255.255.1', help='default: unroutable, connects stall')
+    parser.add_argument('--modes', default=','.join(MODES), help='comma-separated subset of ' + ', '.join(MODES))
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--output', help='write the result JSON here')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    env = dict(os.environ)
+    env.update({
+        'MYSQL_HOST': args.mysql_host,
+        'GEMINI_API_KEY': env.get('GEMINI_API_KEY', 'fake-key'),
+        'LOG_LEVEL': 'WARNING',
+        'SUGGESTION_INDEX_PATH': os.path.join(workdir, 'suggestion_index.json'),
+        'RECOMMENDATION_SPILL_DIR': os.path.join(workdir, 'spill'),
+        # Startup of the workers alone; the one-off migrate step is a separate cost
+        'DB_MIGRATE_ON_START': '0',
+    })
+
+    result = {
+        'mysql_host': args.mysql_host,
+        'workers': args.workers,
+        'cold_import': summary([time_import(env) for _ in range(args.runs)])
+    }
+    for mode in args.modes.split(','):
+        extra_args, overrides = MODES[mode]
+        samples = [time_first_health(dict(env, **overrides), args.workers, extra_args, args.timeout)
+                   for _ in range(args.runs)]
+        result[mode] = summary(samples)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,597 @@
+"""Local stand-ins for Gemini and MySQL used by the benchmarks
+
+FakeGenerativeModel mimics google.generativeai.GenerativeModel with configurable
+latency, error rate and streaming. SQLitePool mimics MySQLConnectionPool on
+top of a SQLite file shared by all gunicorn workers, translating the MySQL
+dialect used by app.py and recording how long callers wait for a connection.
+
+Behaviour is configured through environment variables so gunicorn workers
+pick it up:
+
+    FAKE_GEMINI_LATENCY_MS      median latency of a call (default 800)
+    FAKE_GEMINI_JITTER          lognormal sigma applied to the latency (default 0.35)
+    FAKE_GEMINI_ERROR_RATE      probability a call raises ServiceUnavailable (default 0)
+    FAKE_GEMINI_TTFT_MS         time to first chunk when streaming (default 250)
+    FAKE_GEMINI_STREAM_CHUNKS   number of streamed chunks (default 20)
+    FAKE_GEMINI_RESPONSE_BYTES  approximate size of a recommendation (default 4000)
+    FAKE_GEMINI_RPM             calls per rolling minute before ResourceExhausted (429), per process (default 0, unlimited)
+    FAKE_GEMINI_TAIL_RATE       probability a call is a straggler (default 0)
+    FAKE_GEMINI_TAIL_MS         median latency of a straggler (default 6000)
+    FAKE_GEMINI_LATENCY_SCRIPT  comma-separated latencies in ms, replayed in order instead of sampling
+    FAKE_GEMINI_MODELS          JSON of per-model overrides of the settings above, keyed by model name:
+                                {"gemini-1.5-flash": {"latency_ms": 1200, "tail_rate": 0.02}}
+    FAKE_POOL_BLOCKING          1 to wait for a free connection instead of failing (default 0)
+    BENCH_STATS_DIR             where workers write their pool statistics
+
+AsyncSQLitePool and generate_content_async do the same for async_app.py.
+"""
+import asyncio
+import atexit
+import collections
+import fcntl
+import functools
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    from google.api_core import exceptions as api_exceptions
+except ImportError:  # pragma: no cover - only when google-api-core is missing
+    api_exceptions = None
+
+
+def env_float(name, default):
+    return float(os.getenv(name, default))
+
+
+def model_settings(model_name):
+    """This model's entry in FAKE_GEMINI_MODELS, or {}"""
+    return json.loads(os.getenv('FAKE_GEMINI_MODELS') or '{}').get(model_name, {})
+
+
+class FakeUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class FakeTokenCount:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+
+class FakeResponse:
+    def __init__(self, text, prompt=None):
+        self.text = text
+        # Roughly four characters per token, like Gemini's English tokenizer
+        self.usage_metadata = FakeUsage(len(prompt or '') // 4, len(text) // 4)
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel with scripted latency and failures"""
+
+    def __init__(self, model_name='fake-model', latency_ms=None, jitter=None, error_rate=None,
+                 ttft_ms=None, stream_chunks=None, response_bytes=None, rpm=None, seed=None,
+                 tail_rate=None, tail_ms=None, latency_script=None, **kwargs):
+        settings = model_settings(model_name)
+
+        def setting(value, key, env, default):
+            if value is not None:
+                return value
+            return settings[key] if key in settings else env_float(env, default)
+
+        self.model_name = model_name
+        self.latency_ms = setting(latency_ms, 'latency_ms', 'FAKE_GEMINI_LATENCY_MS', 800)
+        self.jitter = setting(jitter, 'jitter', 'FAKE_GEMINI_JITTER', 0.35)
+        self.error_rate = setting(error_rate, 'error_rate', 'FAKE_GEMINI_ERROR_RATE', 0)
+        self.ttft_ms = setting(ttft_ms, 'ttft_ms', 'FAKE_GEMINI_TTFT_MS', 250)
+        self.stream_chunks = int(setting(stream_chunks, 'stream_chunks', 'FAKE_GEMINI_STREAM_CHUNKS', 20))
+        self.response_bytes = int(setting(response_bytes, 'response_bytes', 'FAKE_GEMINI_RESPONSE_BYTES', 4000))
+        self.rpm = int(setting(rpm, 'rpm', 'FAKE_GEMINI_RPM', 0))
+        self.tail_rate = setting(tail_rate, 'tail_rate', 'FAKE_GEMINI_TAIL_RATE', 0)
+        self.tail_ms = setting(tail_ms, 'tail_ms', 'FAKE_GEMINI_TAIL_MS', 6000)
+        if latency_script is None:
+            latency_script = settings.get('latency_script', os.getenv('FAKE_GEMINI_LATENCY_SCRIPT', ''))
+        if isinstance(latency_script, str):
+            latency_script = [float(ms) for ms in latency_script.split(',') if ms.strip()]
+        self.latency_script = list(latency_script)
+        self.kwargs = kwargs
+        self._random = random.Random(seed)
+        self._recent_calls = collections.deque()
+        self._quota_lock = threading.Lock()
+        self._script_position = 0
+        self.calls = 0
+        self.rate_limited = 0
+
+    def sample_latency(self):
+        """Seconds for one call: the next scripted latency, or lognormal around the median with stragglers"""
+        if self.latency_script:
+            with self._quota_lock:
+                latency_ms = self.latency_script[self._script_position % len(self.latency_script)]
+                self._script_position += 1
+            return latency_ms / 1000.0
+        median_ms = self.tail_ms if self.tail_rate and self._random.random() < self.tail_rate else self.latency_ms
+        return median_ms / 1000.0 * self._random.lognormvariate(0, self.jitter)
+
+    def _fail(self, message):
+        if api_exceptions is not None:
+            raise api_exceptions.ServiceUnavailable(message)
+        raise RuntimeError(message)
+
+    def _check_quota(self):
+        """Reject the call like Gemini does once the per-minute request quota is used up"""
+        if not self.rpm:
+            return
+        now = time.monotonic()
+        with self._quota_lock:
+            while self._recent_calls and now - self._recent_calls[0] >= 60:
+                self._recent_calls.popleft()
+            if len(self._recent_calls) >= self.rpm:
+                self.rate_limited += 1
+                if api_exceptions is not None:
+                    raise api_exceptions.ResourceExhausted("fake quota exceeded")
+                raise RuntimeError("429 fake quota exceeded")
+            self._recent_calls.append(now)
+
+    def _text_for(self, prompt):
+        if 'career goal suggestions' in prompt:
+            match = re.search(r"interested in: '([^']*)'", prompt)
+            topic = match.group(1) if match else 'technology'
+            return '\n'.join(f"- {template.format(topic)}" for template in (
+                "Become a {} engineer at a product company",
+                "Start a {} focused startup",
+                "Pursue research in {}",
+                "Lead {} teams at a global firm",
+                "Consult on {} for enterprises",
+            ))
+        body = "# 🎓 Personalized Academic & Career Recommendations\n\n## 📋 Your Profile Summary\n"
+        filler = "- Practical, specific advice for this student's interests and goals.\n"
+        return body + filler * max(1, (self.response_bytes - len(body)) // len(filler))
+
+    def _billed_prompt(self, prompt):
+        """Prompt as Gemini bills it, with the model's system instruction in front"""
+        return (self.kwargs.get('system_instruction') or '') + prompt
+
+    def count_tokens(self, contents, **kwargs):
+        """Same four-characters-per-token estimate the fake responses report"""
+        return FakeTokenCount(len(self._billed_prompt(contents if isinstance(contents, str) else str(contents))) // 4)
+
+    def _deadline(self, request_options):
+        if request_options and request_options.get('timeout'):
+            return float(request_options['timeout'])
+        return None
+
+    def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+        self.calls += 1
+        self._check_quota()
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        deadline = self._deadline(request_options)
+        failing = self._random.random() < self.error_rate
+
+        if stream:
+            return self._stream(prompt, deadline, failing)
+
+        latency = self.sample_latency()
+        if deadline is not None and latency > deadline:
+            time.sleep(deadline)
+            if api_exceptions is not None:
+                raise api_exceptions.DeadlineExceeded("fake deadline exceeded")
+            raise TimeoutError("fake deadline exceeded")
+        time.sleep(latency)
+        if failing:
+            self._fail("fake upstream unavailable")
+        return FakeResponse(self._text_for(prompt), self._billed_prompt(prompt))
+
+    def _stream(self, prompt, deadline, failing):
+        text = self._text_for(prompt)
+        ttft = self.ttft_ms / 1000.0 * self._random.lognormvariate(0, self.jitter)
+        if deadline is not None and ttft > deadline:
+            time.sleep(deadline)
+            self._fail("fake deadline exceeded")
+        time.sleep(ttft)
+        if failing:
+            self._fail("fake upstream unavailable")
+        remaining = max(0.0, self.sample_latency() - ttft)
+        size = max(1, len(text) // self.stream_chunks)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        for position, chunk in enumerate(chunks):
+            if position:
+                time.sleep(remaining / len(chunks))
+            yield FakeResponse(chunk)
+
+
+    async def generate_content_async(self, prompt, stream=False, request_options=None, **kwargs):
+        """Async client counterpart of generate_content; sleeps without holding a thread"""
+        self.calls += 1
+        self._check_quota()
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        deadline = self._deadline(request_options)
+        failing = self._random.random() < self.error_rate
+
+        if stream:
+            return self._stream_async(prompt, deadline, failing)
+
+        latency = self.sample_latency()
+        if deadline is not None and latency > deadline:
+            await asyncio.sleep(deadline)
+            if api_exceptions is not None:
+                raise api_exceptions.DeadlineExceeded("fake deadline exceeded")
+            raise TimeoutError("fake deadline exceeded")
+        await asyncio.sleep(latency)
+        if failing:
+            self._fail("fake upstream unavailable")
+        return FakeResponse(self._text_for(prompt), self._billed_prompt(prompt))
+
+    async def _stream_async(self, prompt, deadline, failing):
+        text = self._text_for(prompt)
+        ttft = self.ttft_ms / 1000.0 * self._random.lognormvariate(0, self.jitter)
+        if deadline is not None and ttft > deadline:
+            await asyncio.sleep(deadline)
+            self._fail("fake deadline exceeded")
+        await asyncio.sleep(ttft)
+        if failing:
+            self._fail("fake upstream unavailable")
+        remaining = max(0.0, self.sample_latency() - ttft)
+        size = max(1, len(text) // self.stream_chunks)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        for position, chunk in enumerate(chunks):
+            if position:
+                await asyncio.sleep(remaining / len(chunks))
+            yield FakeResponse(chunk)
+
+
+# MySQL error numbers the schema migrations check for
+ER_DUP_FIELDNAME = 1060
+ER_DUP_KEYNAME = 1061
+ER_DUP_ENTRY = 1062
+
+
+class FakeDatabaseError(Exception):
+    """Stands in for mysql.connector.Error when the connector is not involved"""
+
+    def __init__(self, msg=None, errno=None):
+        super().__init__(msg)
+        self.msg = msg
+        self.errno = errno
+
+
+def translate_sql(sql):
+    """Rewrite the MySQL statements used by the app into SQLite"""
+    sql = sql.replace('%s', '?')
+    sql = re.sub(r'INT AUTO_INCREMENT( PRIMARY KEY)?', 'INTEGER PRIMARY KEY AUTOINCREMENT', sql)
+    sql = re.sub(r',\s*PRIMARY KEY\s*\([^)]*\)', '', sql)
+    sql = re.sub(r'\s*PARTITION BY RANGE.*$', '', sql, flags=re.DOTALL)
+    sql = re.sub(r',\s*(UNIQUE\s+)?(INDEX|KEY)\s+\w+\s*\([^)]*\)', '', sql)
+    sql = re.sub(r'\s+AFTER\s+\w+', '', sql)
+    sql = re.sub(r'ON UPDATE CURRENT_TIMESTAMP', '', sql)
+    # SQLite cannot add a column with a CURRENT_TIMESTAMP default to a table that has rows
+    sql = re.sub(r'(ADD COLUMN \w+ TIMESTAMP) NOT NULL DEFAULT CURRENT_TIMESTAMP', r'\1', sql)
+    sql = re.sub(r'\bDOUBLE\b', 'REAL', sql)
+    if 'ON DUPLICATE KEY UPDATE' in sql:
+        insert, updates = sql.split('ON DUPLICATE KEY UPDATE')
+        sql = insert + 'ON CONFLICT DO UPDATE SET' + re.sub(r'VALUES\((\w+)\)', r'excluded.\1', updates)
+    return sql
+
+
+class SQLiteCursor:
+    def __init__(self, conn, error_class):
+        self._cursor = conn.cursor()
+        self._error_class = error_class
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def _run(self, method, sql, params):
+        try:
+            getattr(self._cursor, method)(translate_sql(sql), params)
+        except sqlite3.OperationalError as e:
+            message = str(e)
+            if 'duplicate column' in message:
+                raise self._error_class(msg=message, errno=ER_DUP_FIELDNAME)
+            if 'already exists' in message and re.match(r'\s*CREATE (UNIQUE )?INDEX', sql, re.IGNORECASE):
+                raise self._error_class(msg=message, errno=ER_DUP_KEYNAME)
+            raise self._error_class(msg=message)
+        except sqlite3.IntegrityError as e:
+            message = str(e)
+            raise self._error_class(msg=message, errno=ER_DUP_ENTRY if 'UNIQUE' in message else None)
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+
+    def execute(self, sql, params=()):
+        self._run('execute', sql, tuple(params or ()))
+
+    def executemany(self, sql, rows):
+        self._run('executemany', sql, [tuple(row) for row in rows])
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Connection handed out by SQLitePool; close() returns it to the pool"""
+
+    # SQLite has no GET_LOCK; jobs take the lock for granted, as in a single process
+    supports_named_locks = False
+
+    def __init__(self, path, pool=None, error_class=FakeDatabaseError):
+        self._conn = sqlite3.connect(path, timeout=10, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._pool = pool
+        self._error_class = error_class
+
+    def cursor(self, *args, **kwargs):
+        return SQLiteCursor(self._conn, self._error_class)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def is_connected(self):
+        return True
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self._conn.execute("SELECT 1")
+
+    def reset_session(self, user_variables=None, session_variables=None):
+        self._conn.rollback()
+
+    def close(self):
+        if self._pool is not None:
+            self._conn.rollback()
+            self._pool._release(self)
+        else:
+            self._conn.close()
+
+
+class SQLitePool:
+    """MySQLConnectionPool look-alike backed by a SQLite file"""
+
+    stats = {'borrows': 0, 'exhausted': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0, 'wait_samples': []}
+    _stats_lock = threading.Lock()
+
+    def __init__(self, pool_name='fake_pool', pool_size=5, path=None, error_class=FakeDatabaseError,
+                 pool_error_class=FakeDatabaseError, **config):
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.path = path or os.environ['BENCH_SQLITE_PATH']
+        self._error_class = error_class
+        self._pool_error_class = pool_error_class
+        self._idle = [SQLiteConnection(self.path, self, error_class) for _ in range(pool_size)]
+        self._available = threading.Semaphore(pool_size)
+        self._lock = threading.Lock()
+        self.blocking = os.getenv('FAKE_POOL_BLOCKING', '0') == '1'
+
+    def get_connection(self):
+        start = time.perf_counter()
+        acquired = self._available.acquire(blocking=self.blocking, timeout=10 if self.blocking else None)
+        waited_ms = (time.perf_counter() - start) * 1000
+        with SQLitePool._stats_lock:
+            stats = SQLitePool.stats
+            if not acquired:
+                stats['exhausted'] += 1
+            else:
+                stats['borrows'] += 1
+                stats['wait_ms_total'] += waited_ms
+                stats['wait_ms_max'] = max(stats['wait_ms_max'], waited_ms)
+                if len(stats['wait_samples']) < 50000:
+                    stats['wait_samples'].append(waited_ms)
+        if not acquired:
+            # Same failure mode as mysql.connector when every connection is checked out
+            raise self._pool_error_class("Failed getting connection; pool exhausted")
+        with self._lock:
+            return self._idle.pop()
+
+    def _release(self, conn):
+        with self._lock:
+            self._idle.append(conn)
+        self._available.release()
+
+    @classmethod
+    def snapshot(cls):
+        with cls._stats_lock:
+            return dict(cls.stats)
+
+
+class AsyncSQLiteCursor:
+    """aiomysql cursor look-alike; SQLite calls are fast and local so they run inline"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._cursor.close()
+
+    async def execute(self, sql, params=()):
+        self._cursor.execute(sql, params)
+
+    async def fetchone(self):
+        return self._cursor.fetchone()
+
+    async def fetchall(self):
+        return self._cursor.fetchall()
+
+
+class AsyncSQLiteConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return AsyncSQLiteCursor(self._conn.cursor())
+
+
+class AsyncSQLitePool:
+    """aiomysql pool look-alike backed by a SQLite file, sharing SQLitePool's statistics"""
+
+    def __init__(self, maxsize=10, path=None):
+        self.path = path or os.environ['BENCH_SQLITE_PATH']
+        self.maxsize = maxsize
+        self._idle = [SQLiteConnection(self.path) for _ in range(maxsize)]
+        self._available = asyncio.Semaphore(maxsize)
+
+    @property
+    def size(self):
+        return self.maxsize
+
+    @property
+    def freesize(self):
+        return len(self._idle)
+
+    async def acquire(self):
+        start = time.perf_counter()
+        await self._available.acquire()
+        waited_ms = (time.perf_counter() - start) * 1000
+        with SQLitePool._stats_lock:
+            stats = SQLitePool.stats
+            stats['borrows'] += 1
+            stats['wait_ms_total'] += waited_ms
+            stats['wait_ms_max'] = max(stats['wait_ms_max'], waited_ms)
+            if len(stats['wait_samples']) < 50000:
+                stats['wait_samples'].append(waited_ms)
+        return AsyncSQLiteConnection(self._idle.pop())
+
+    def release(self, conn):
+        conn._conn.rollback()
+        self._idle.append(conn._conn)
+        self._available.release()
+
+    def close(self):
+        for conn in self._idle:
+            conn._conn.close()
+
+    async def wait_closed(self):
+        pass
+
+
+async def create_async_pool(minsize=1, maxsize=10, **config):
+    """Stand-in for aiomysql.create_pool"""
+    return AsyncSQLitePool(maxsize=maxsize)
+
+
+CATALOG_SEED = {
+    'electives': [
+        ("Machine Learning & AI", "Computer Science", "Statistics, Python programming", "Hands-on ML projects"),
+        ("Cloud Computing & DevOps", "Computer Science", "Basic networking, Linux", "Deployment strategies"),
+        ("Advanced Algorithms", "Computer Science", "DSA fundamentals", "Algorithm design and analysis"),
+        ("Robotics & Automation", "Mechanical Engineering", "Control systems", "Industrial robotics"),
+        ("Renewable Energy Systems", "Mechanical Engineering", "Thermodynamics", "Solar and wind energy"),
+        ("Embedded Systems Design", "Electrical Engineering", "Microprocessors, C", "IoT projects"),
+    ],
+    'clubs': [
+        ("Coding Club", "Computer Science", "Competitive programming and hackathons", "Weekly contests"),
+        ("Robotics Society", "Mechanical Engineering", "Build and compete with robots", "Robotics competitions"),
+        ("IEEE Student Branch", "Electrical Engineering", "Professional development", "Workshops"),
+    ],
+    'internships': [
+        ("Software Engineering Intern", "Computer Science", "Python, Git, data structures", "Backend services", "Industry"),
+        ("Design Engineering Intern", "Mechanical Engineering", "CAD, FEA", "Product design", "Industry"),
+        ("Embedded Firmware Intern", "Electrical Engineering", "C, microcontrollers", "Firmware development", "Startup"),
+    ],
+}
+
+
+def seed_catalog(conn):
+    """Insert a small catalog if the tables are empty"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM electives")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany(
+            "INSERT INTO electives (name, branch, prerequisites, description) VALUES (%s, %s, %s, %s)",
+            CATALOG_SEED['electives'])
+        cursor.executemany(
+            "INSERT INTO clubs (name, branch, description, activities) VALUES (%s, %s, %s, %s)",
+            CATALOG_SEED['clubs'])
+        cursor.executemany(
+            "INSERT INTO internships (name, branch, skills_required, description, company_type) VALUES (%s, %s, %s, %s, %s)",
+            CATALOG_SEED['internships'])
+        conn.commit()
+    cursor.close()
+
+
+def sqlite_connection_factory(path):
+    """get_db_connection look-alike returning unpooled SQLite connections"""
+    def connect():
+        return SQLiteConnection(path)
+    return connect
+
+
+def install_fakes():
+    """Point the Gemini SDK and MySQL connector at the local stand-ins"""
+    import google.generativeai as genai
+    import mysql.connector
+    import mysql.connector.pooling
+    from mysql.connector import errors
+
+    os.environ.setdefault('GEMINI_API_KEY', 'fake-key')
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+    mysql.connector.pooling.MySQLConnectionPool = functools.partial(
+        SQLitePool, error_class=mysql.connector.Error, pool_error_class=errors.PoolError
+    )
+    mysql.connector.connect = lambda **config: SQLiteConnection(
+        os.environ['BENCH_SQLITE_PATH'], error_class=mysql.connector.Error
+    )
+
+
+def migrate_once():
+    """The schema.py migrate step against the stand-in, serialized across workers; call after install_fakes"""
+    import schema
+
+    with open(os.environ['BENCH_SQLITE_PATH'] + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        schema.migrate()
+
+
+def seed_once(get_connection, branch_catalog):
+    """Seed the catalog once across all workers, then reload this worker's copy"""
+    with open(os.environ['BENCH_SQLITE_PATH'] + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        conn = get_connection()
+        if conn:
+            try:
+                seed_catalog(conn)
+            finally:
+                conn.close()
+    branch_catalog.invalidate()
+
+
+def start_stats_dumper(directory, stats=None, interval=2.0):
+    """Periodically write this worker's pool statistics for the load-test driver
+
+    stats is a callable returning the pool's statistics; by default the
+    SQLite stand-in pools' own counters.
+    """
+    if not directory:
+        return
+    stats = stats or SQLitePool.snapshot
+
+    def dump():
+        with open(os.path.join(directory, f"pool-{os.getpid()}.json"), 'w') as f:
+            json.dump(stats(), f)
+
+    def run():
+        while True:
+            time.sleep(interval)
+            dump()
+    threading.Thread(target=run, name='bench-stats', daemon=True).start()
+    atexit.register(dump)
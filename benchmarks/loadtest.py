@@ -0,0 +1,437 @@
+"""Load test app.py under gunicorn against the local Gemini and MySQL stand-ins
+
+Drives /get_suggestions, /get_recommendations and /get_history with a weighted
+mix and reports throughput, p50/p95/p99 latency and connection-pool wait time.
+Results are written as JSON so runs can be compared across commits:
+
+    python benchmarks/loadtest.py --duration 30 --output results/$(git rev-parse --short HEAD).json
+    python benchmarks/loadtest.py --compare results/old.json --output results/new.json
+
+--mode async runs async_app.py under uvicorn instead. Both modes report the
+server's memory (PSS, summed over its processes) and how many requests it
+held in flight on average, so the two can be compared per MB:
+
+    python benchmarks/loadtest.py --mode sync --concurrency 256 --output results/sync.json
+    python benchmarks/loadtest.py --mode async --concurrency 256 --compare results/sync.json
+"""
+import argparse
+import glob
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from suggest import SEED_GOALS  # noqa: E402
+
+BRANCHES = ['Computer Science', 'Mechanical Engineering', 'Electrical Engineering', 'Civil Engineering']
+YEARS = ['1st Year', '2nd Year', '3rd Year', '4th Year']
+INTERESTS = ['Artificial Intelligence', 'Web Development', 'Robotics', 'Cloud Computing', 'Cybersecurity',
+             'Data Science', 'Renewable Energy', 'Embedded Systems', 'Entrepreneurship', 'Design']
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(samples, errors, duration):
+    ordered = sorted(samples)
+    return {
+        'requests': len(samples) + errors,
+        'errors': errors,
+        'throughput_rps': round((len(samples) + errors) / duration, 2),
+        'p50_ms': round(percentile(ordered, 0.50), 2) if ordered else None,
+        'p95_ms': round(percentile(ordered, 0.95), 2) if ordered else None,
+        'p99_ms': round(percentile(ordered, 0.99), 2) if ordered else None,
+        'max_ms': round(ordered[-1], 2) if ordered else None,
+    }
+
+
+class Client:
+    """One simulated student with a keep-alive connection and a session cookie"""
+
+    def __init__(self, host, port, rng, profile_pool):
+        self.host = host
+        self.port = port
+        self.rng = rng
+        self.profile_pool = profile_pool
+        self.cookie = None
+        self.conn = http.client.HTTPConnection(host, port, timeout=120)
+
+    def request(self, method, path, form=None):
+        headers = {}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        for attempt in range(2):
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Server closed the keep-alive connection; reconnect once
+                self.conn.close()
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+                if attempt:
+                    raise
+        set_cookie = response.getheader('Set-Cookie')
+        if set_cookie:
+            self.cookie = set_cookie.split(';', 1)[0]
+        return response.status
+
+    def start_session(self):
+        self.request('GET', '/')
+
+    def suggestions(self):
+        goal = self.rng.choice(SEED_GOALS).lower()
+        # A prefix of a real goal, like a user part way through typing
+        query = goal[:self.rng.randint(3, min(len(goal), 18))]
+        return self.request('POST', '/get_suggestions', {'field': 'goals', 'query': query})
+
+    def recommendations(self):
+        branch, year, interests, goals = self.rng.choice(self.profile_pool)
+        return self.request('POST', '/get_recommendations', {
+            'branch': branch, 'year': year, 'interests-value': interests, 'goals': goals
+        })
+
+    def history(self):
+        return self.request('GET', '/get_history')
+
+
+def build_profiles(rng, count):
+    """Distinct profiles; drawing from a finite pool gives a realistic share of repeats"""
+    profiles = []
+    for _ in range(count):
+        interests = ', '.join(rng.sample(INTERESTS, rng.randint(1, 3)))
+        profiles.append((rng.choice(BRANCHES), rng.choice(YEARS), interests, rng.choice(SEED_GOALS)))
+    return profiles
+
+
+def wait_for_health(host, port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def merge_pool_stats(stats_dir):
+    merged = {'borrows': 0, 'exhausted': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0}
+    samples = []
+    for path in glob.glob(os.path.join(stats_dir, 'pool-*.json')):
+        with open(path) as f:
+            data = json.load(f)
+        for key in ('borrows', 'exhausted', 'wait_ms_total'):
+            merged[key] += data[key]
+        merged['wait_ms_max'] = max(merged['wait_ms_max'], data['wait_ms_max'])
+        samples.extend(data.get('wait_samples', []))
+    samples.sort()
+    merged['wait_ms_mean'] = round(merged['wait_ms_total'] / merged['borrows'], 3) if merged['borrows'] else 0.0
+    merged['wait_ms_p99'] = round(percentile(samples, 0.99), 3) if samples else None
+    merged['wait_ms_total'] = round(merged['wait_ms_total'], 3)
+    merged['wait_ms_max'] = round(merged['wait_ms_max'], 3)
+    return merged
+
+
+def handler_seconds(port):
+    """Total seconds spent inside request handlers so far, from the app's /metrics"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', '/metrics')
+    total = 0.0
+    for line in conn.getresponse().read().decode('utf-8').splitlines():
+        if line.startswith('mentor_request_seconds_sum{') and 'route="metrics"' not in line:
+            total += float(line.rsplit(' ', 1)[1])
+    return total
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def process_tree(pid):
+    """pid and all of its descendants, read from /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        pending.extend(children.get(current, []))
+    return pids
+
+
+def memory_kb(pid):
+    """Proportional set size of one process, so pages shared after fork are not double counted"""
+    for path, field in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return 0
+
+
+class MemorySampler:
+    """Tracks the peak memory of the server process tree while the load runs"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, sum(memory_kb(pid) for pid in process_tree(self.pid)))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def start_server(args, env):
+    if args.mode == 'async':
+        command = [
+            sys.executable, '-m', 'uvicorn',
+            '--workers', str(args.workers),
+            '--host', '127.0.0.1',
+            '--port', str(args.port),
+            '--log-level', 'warning',
+            'benchmarks.bench_async_app:app'
+        ]
+        return subprocess.Popen(command, env=env, cwd=ROOT,
+                                stdout=subprocess.DEVNULL if args.quiet else None,
+                                stderr=subprocess.DEVNULL if args.quiet else None)
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '--workers', str(args.workers),
+        '--threads', str(args.threads),
+        '--bind', f"127.0.0.1:{args.port}",
+        '--chdir', ROOT,
+        '--log-level', 'warning',
+        'benchmarks.bench_app:app'
+    ]
+    if args.worker_class:
+        command[3:3] = ['--worker-class', args.worker_class]
+    if args.preload:
+        command[3:3] = ['--preload']
+    return subprocess.Popen(command, env=env, cwd=ROOT,
+                            stdout=subprocess.DEVNULL if args.quiet else None,
+                            stderr=subprocess.DEVNULL if args.quiet else None)
+
+
+def run_load(args):
+    rng = random.Random(args.seed)
+    profiles = build_profiles(rng, args.profiles)
+    mix = parse_mix(args.mix)
+    endpoints = list(mix)
+    weights = [mix[name] for name in endpoints]
+    samples = {name: [] for name in endpoints}
+    errors = {name: 0 for name in endpoints}
+    lock = threading.Lock()
+    stop_at = time.time() + args.warmup + args.duration
+    measure_from = time.time() + args.warmup
+
+    def worker(worker_id):
+        client = Client('127.0.0.1', args.port, random.Random(args.seed + worker_id), profiles)
+        client.start_session()
+        while time.time() < stop_at:
+            name = client.rng.choices(endpoints, weights)[0]
+            start = time.perf_counter()
+            try:
+                status = getattr(client, name)()
+                ok = status < 500
+            except Exception:
+                ok = False
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if time.time() >= measure_from:
+                with lock:
+                    if ok:
+                        samples[name].append(elapsed_ms)
+                    else:
+                        errors[name] += 1
+
+    handler_start = {}
+    timer = threading.Timer(args.warmup, lambda: handler_start.setdefault('seconds', handler_seconds(args.port)))
+    timer.start()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    timer.join()
+    handled = handler_seconds(args.port) - handler_start.get('seconds', 0.0)
+
+    results = {name: summarize(samples[name], errors[name], args.duration) for name in endpoints}
+    results['overall'] = summarize(
+        [value for name in endpoints for value in samples[name]], sum(errors.values()), args.duration
+    )
+    # Little's law on server-side handler time: requests the server was actually working on at once,
+    # excluding those still waiting in the listen backlog
+    results['overall']['in_flight_mean'] = round(handled / args.duration, 2)
+    return results
+
+
+def print_report(report, baseline=None):
+    print(f"\n{'endpoint':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in report['endpoints'].items():
+        line = f"{name:<18}{result['throughput_rps']:>10}{str(result['p50_ms']):>10}{str(result['p95_ms']):>10}{str(result['p99_ms']):>10}{result['errors']:>8}"
+        if baseline and name in baseline.get('endpoints', {}) and baseline['endpoints'][name]['p95_ms']:
+            before = baseline['endpoints'][name]
+            delta = (result['p95_ms'] or 0) / before['p95_ms'] - 1
+            line += f"   p95 {delta:+.0%} vs {baseline.get('commit')}"
+        print(line)
+    memory = report['memory']
+    print(f"\n{report['config']['mode']} server: peak {memory['peak_mb']} MB, "
+          f"{report['endpoints']['overall']['in_flight_mean']} requests in flight on average, "
+          f"{memory['in_flight_per_mb']} per MB")
+    if baseline and baseline.get('memory', {}).get('in_flight_per_mb'):
+        print(f"  vs {baseline['config'].get('mode', 'sync')} {baseline.get('commit')}: "
+              f"{baseline['memory']['in_flight_per_mb']} per MB")
+    pool = report['pool']
+    print(f"\npool: {pool['borrows']} borrows, {pool['exhausted']} exhausted, "
+          f"wait mean {pool['wait_ms_mean']} ms, p99 {pool['wait_ms_p99']} ms, max {pool['wait_ms_max']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before measuring')
+    parser.add_argument('--concurrency', type=int, default=32, help='simulated clients')
+    parser.add_argument('--mode', choices=('sync', 'async'), default='sync',
+                        help='sync: app.py under gunicorn; async: async_app.py under uvicorn')
+    parser.add_argument('--workers', type=int, default=4, help='server worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--worker-class', default=None, help='gunicorn worker class')
+    parser.add_argument('--preload', action='store_true', help='import the app in the gunicorn master before forking')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--mix', default='suggestions=70,recommendations=20,history=10')
+    parser.add_argument('--profiles', type=int, default=200, help='distinct student profiles to draw from')
+    parser.add_argument('--latency-ms', type=float, default=800, help='median fake Gemini latency')
+    parser.add_argument('--jitter', type=float, default=0.35, help='lognormal sigma of fake Gemini latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fake Gemini failure probability')
+    parser.add_argument('--ttft-ms', type=float, default=250, help='fake time to first streamed chunk')
+    parser.add_argument('--fake-rpm', type=int, default=0, help='fake Gemini quota per worker per minute, 0 for none')
+    parser.add_argument('--gemini-rpm', type=float, default=0, help='GEMINI_RPM for the app scheduler, 0 to disable')
+    parser.add_argument('--gemini-tpm', type=float, default=0, help='GEMINI_TPM for the app scheduler, 0 to disable')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', help='previous results JSON to compare against')
+    parser.add_argument('--quiet', action='store_true', help='hide gunicorn output')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='mentor-bench-')
+    stats_dir = os.path.join(workdir, 'stats')
+    os.makedirs(stats_dir)
+    metrics_dir = os.path.join(workdir, 'metrics')
+    os.makedirs(metrics_dir)
+    env = dict(os.environ)
+    env.update({
+        'BENCH_SQLITE_PATH': os.path.join(workdir, 'bench.sqlite3'),
+        'BENCH_STATS_DIR': stats_dir,
+        'FAKE_GEMINI_LATENCY_MS': str(args.latency_ms),
+        'FAKE_GEMINI_JITTER': str(args.jitter),
+        'FAKE_GEMINI_ERROR_RATE': str(args.error_rate),
+        'FAKE_GEMINI_TTFT_MS': str(args.ttft_ms),
+        'FAKE_GEMINI_RPM': str(args.fake_rpm),
+        'GEMINI_RPM': str(args.gemini_rpm),
+        'GEMINI_TPM': str(args.gemini_tpm),
+        'SUGGESTION_INDEX_PATH': os.path.join(workdir, 'suggestion_index.json'),
+        'RECOMMENDATION_SPILL_DIR': os.path.join(workdir, 'spill'),
+        'PROMETHEUS_MULTIPROC_DIR': metrics_dir,
+        'GEMINI_API_KEY': 'fake-key',
+        # Workers create the stand-in tables themselves (fakes.seed_once)
+        'DB_MIGRATE_ON_START': '0',
+    })
+
+    server = start_server(args, env)
+    try:
+        if not wait_for_health('127.0.0.1', args.port):
+            raise SystemExit(f"{args.mode} server did not become healthy")
+        with MemorySampler(server.pid) as memory:
+            endpoints = run_load(args)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'quiet')},
+        'endpoints': endpoints,
+        'pool': merge_pool_stats(stats_dir),
+        'memory': {
+            'peak_mb': round(memory.peak_kb / 1024, 1),
+            'in_flight_per_mb': round(endpoints['overall']['in_flight_mean'] / (memory.peak_kb / 1024), 3)
+            if memory.peak_kb else None,
+        },
+    }
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
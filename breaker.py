@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open"""
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by error rate and latency over a rolling window
+
+    A call counts as failed if it raised or took longer than slow_call_threshold
+    seconds. When the failure rate over the last `window` calls reaches
+    failure_rate the circuit opens for open_duration seconds, then lets a few
+    probe calls through (half-open) before closing again.
+
+    The breaker also derives an adaptive deadline from observed latency: a
+    multiple of p95, clamped between min_deadline and max_deadline.
+    """
+
+    def __init__(self, name, max_deadline, min_deadline=1.0, slow_call_threshold=None,
+                 failure_rate=0.5, window=50, min_calls=10, open_duration=30.0,
+                 half_open_max_calls=1, deadline_multiplier=2.0):
+        self.name = name
+        self.max_deadline = max_deadline
+        self.min_deadline = min_deadline
+        self.slow_call_threshold = slow_call_threshold or max_deadline
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self.deadline_multiplier = deadline_multiplier
+        self._outcomes = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = None
+        self._probes = 0
+        self._deadline = max_deadline
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_duration:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    def allow(self):
+        """Return True if a call may go upstream now"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def release(self):
+        """Give back a call allowed through whose outcome will never be known, e.g. the client went away"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def deadline(self):
+        """Current per-call timeout in seconds"""
+        with self._lock:
+            return self._deadline
+
+    def record(self, latency, ok):
+        with self._lock:
+            failed = not ok or latency > self.slow_call_threshold
+            self._stats['calls'] += 1
+            if failed:
+                self._stats['failures'] += 1
+            self._outcomes.append(failed)
+            if ok:
+                self._latencies.append(latency)
+                p95 = percentile(sorted(self._latencies), 0.95)
+                self._deadline = min(self.max_deadline, max(self.min_deadline, p95 * self.deadline_multiplier))
+
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed:
+                    self._trip()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+            elif self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._stats['opened'] += 1
+        # Give the upstream the full budget again once it recovers
+        self._deadline = self.max_deadline
+
+    def call(self, fn):
+        """Run fn(deadline) through the breaker, raising CircuitOpenError when open"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        deadline = self.deadline()
+        start = time.monotonic()
+        try:
+            result = fn(deadline)
+        except Exception:
+            self.record(time.monotonic() - start, ok=False)
+            raise
+        self.record(time.monotonic() - start, ok=True)
+        return result
+
+    async def call_async(self, fn):
+        """Await fn(deadline) through the breaker; the asyncio counterpart of call()"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        deadline = self.deadline()
+        start = time.monotonic()
+        try:
+            result = await fn(deadline)
+        except Exception:
+            self.record(time.monotonic() - start, ok=False)
+            raise
+        self.record(time.monotonic() - start, ok=True)
+        return result
+
+    def stats(self):
+        with self._lock:
+            self._maybe_half_open()
+            latencies = sorted(self._latencies)
+            outcomes = list(self._outcomes)
+            stats = dict(self._stats)
+            stats.update({
+                'state': self._state,
+                'deadline_s': round(self._deadline, 3),
+                'error_rate': round(sum(outcomes) / len(outcomes), 3) if outcomes else 0.0,
+                'latency_p50_s': percentile(latencies, 0.5),
+                'latency_p95_s': percentile(latencies, 0.95),
+            })
+        return stats
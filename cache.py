@@ -0,0 +1,317 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from compression import decompress_text
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache with a per-entry time to live"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCacheBackend:
+    """Shared cache stored in a local SQLite file so gunicorn workers share hits"""
+
+    def __init__(self, path, ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + (ttl if ttl is not None else self.ttl))
+        )
+        conn.commit()
+
+
+class MySQLCacheBackend:
+    """Shared cache stored in a MySQL table, for workers spread across hosts"""
+
+    def __init__(self, get_connection, ttl=3600, table='response_cache'):
+        self.get_connection = get_connection
+        self.ttl = ttl
+        self.table = table
+        conn = self.get_connection()
+        if not conn:
+            raise RuntimeError("Database not available for shared cache")
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'''CREATE TABLE IF NOT EXISTS {self.table} (
+                cache_key VARCHAR(255) PRIMARY KEY,
+                value MEDIUMTEXT NOT NULL,
+                expires_at DOUBLE NOT NULL
+            )''')
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def get(self, key):
+        conn = self.get_connection()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT value FROM {self.table} WHERE cache_key = %s AND expires_at > %s",
+                (key, time.time())
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            return json.loads(row[0]) if row else None
+        finally:
+            conn.close()
+
+    def set(self, key, value, ttl=None):
+        conn = self.get_connection()
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"REPLACE INTO {self.table} (cache_key, value, expires_at) VALUES (%s, %s, %s)",
+                (key, json.dumps(value), time.time() + (ttl if ttl is not None else self.ttl))
+            )
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+
+def normalize_query(text):
+    """Lowercase and collapse whitespace so equivalent queries share a key"""
+    return re.sub(r'\s+', ' ', (text or '').strip().lower())
+
+
+class SuggestionCache:
+    """Two-tier cache for autocomplete suggestions keyed on (field, normalized query)
+
+    Lookups check the in-process LRU first, then the optional shared backend.
+    When neither has the exact query, the longest cached prefix of it is
+    returned instead so the caller can serve it while refreshing in the
+    background. Prefix reuse is per worker: only the in-process LRU is
+    searched, since probing the shared backend once per prefix length would
+    cost more round trips than the refresh it saves.
+    """
+
+    def __init__(self, maxsize=2048, ttl=900, shared=None, min_prefix=4):
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.min_prefix = min_prefix
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'shared_hits': 0, 'prefix_hits': 0, 'misses': 0, 'shared_errors': 0}
+
+    @staticmethod
+    def key(field, query):
+        return f"{normalize_query(field)}:{normalize_query(query)}"
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, field, query):
+        """Return (suggestions, kind) where kind is 'hit', 'prefix' or None"""
+        key = self.key(field, query)
+        value = self.local.get(key)
+        if value is not None:
+            self._count('hits')
+            return value, 'hit'
+
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except Exception as e:
+                self._count('shared_errors')
+                logger.warning("Shared suggestion cache read failed: %s", e)
+                value = None
+            if value is not None:
+                self.local.set(key, value)
+                self._count('shared_hits')
+                return value, 'hit'
+
+        # Prefix-aware reuse: "machine learn" can answer "machine learning"
+        normalized = normalize_query(query)
+        field_key = normalize_query(field)
+        for end in range(len(normalized) - 1, self.min_prefix - 1, -1):
+            value = self.local.get(f"{field_key}:{normalized[:end].rstrip()}")
+            if value is not None:
+                self._count('prefix_hits')
+                return value, 'prefix'
+
+        self._count('misses')
+        return None, None
+
+    def set(self, field, query, suggestions):
+        key = self.key(field, query)
+        self.local.set(key, suggestions)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, suggestions)
+            except Exception as e:
+                self._count('shared_errors')
+                logger.warning("Shared suggestion cache write failed: %s", e)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['size'] = len(self.local)
+        stats['backend'] = type(self.shared).__name__ if self.shared is not None else 'memory'
+        return stats
+
+
+def build_shared_backend(kind, get_connection=None, ttl=3600):
+    """Create the shared cache backend named by SUGGESTION_CACHE_BACKEND"""
+    kind = (kind or '').lower()
+    try:
+        if kind == 'sqlite':
+            path = os.getenv('CACHE_SQLITE_PATH', os.path.join(os.path.dirname(__file__), 'cache.sqlite3'))
+            return SQLiteCacheBackend(path, ttl=ttl)
+        if kind == 'mysql' and get_connection is not None:
+            return MySQLCacheBackend(get_connection, ttl=ttl)
+    except Exception as e:
+        logger.warning("Shared cache backend '%s' not available: %s", kind, e)
+    return None
+
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from i in into is it my of on or so the to with'.split()
+)
+
+
+def canonical_interests(interests):
+    """Lowercased, de-duplicated and sorted interests list"""
+    return sorted({normalize_query(i) for i in (interests or '').split(',') if i.strip()})
+
+
+def canonical_goals(goals):
+    """Goals text reduced to its content words so rephrasings share a key"""
+    words = re.findall(r'[a-z0-9+#]+', (goals or '').lower())
+    return ' '.join(w for w in words if w not in STOPWORDS)
+
+
+def profile_key(branch, year, interests, goals):
+    """Cache key for a student profile"""
+    goals_hash = hashlib.sha1(canonical_goals(goals).encode('utf-8')).hexdigest()[:16]
+    return '|'.join([
+        normalize_query(branch),
+        normalize_query(year),
+        ','.join(canonical_interests(interests)),
+        goals_hash
+    ])
+
+
+class RecommendationCache:
+    """LRU + TTL cache for generated recommendations keyed on a canonical profile"""
+
+    def __init__(self, maxsize=512, ttl=6 * 3600):
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'warmed': 0}
+
+    def get(self, branch, year, interests, goals):
+        value = self.local.get(profile_key(branch, year, interests, goals))
+        with self._lock:
+            self._stats['hits' if value is not None else 'misses'] += 1
+        return value
+
+    def set(self, branch, year, interests, goals, recommendation):
+        self.local.set(profile_key(branch, year, interests, goals), recommendation)
+
+    def warm(self, get_connection, limit=500):
+        """Load the most recent AI-generated recommendations from the database"""
+        conn = get_connection()
+        if not conn:
+            return 0
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT branch, year, interests, goals, recommendation FROM recommendations "
+                "WHERE source = 'gemini' AND year IS NOT NULL ORDER BY created_at DESC LIMIT %s",
+                (limit,)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        # Oldest first so the newest answer for a profile wins
+        for branch, year, interests, goals, recommendation in reversed(rows):
+            if recommendation:
+                self.set(branch, year, interests, goals, decompress_text(recommendation))
+        with self._lock:
+            self._stats['warmed'] += len(rows)
+        return len(rows)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['size'] = len(self.local)
+        return stats
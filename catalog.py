@@ -0,0 +1,221 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+from types import MappingProxyType
+
+import metrics
+from cache import normalize_query
+from ranking import CatalogRanker, np
+
+logger = logging.getLogger(__name__)
+
+CATALOG_QUERIES = {
+    'electives': "SELECT branch, name, prerequisites, description FROM electives",
+    'clubs': "SELECT branch, name, description, activities FROM clubs",
+    'internships': "SELECT branch, name, skills_required, description, company_type FROM internships",
+}
+
+# updated_at moves on inserts and on in-place updates, such as an ingestion upsert
+SIGNATURE_QUERY = (
+    "SELECT 'electives', COUNT(*), MAX(updated_at) FROM electives "
+    "UNION ALL SELECT 'clubs', COUNT(*), MAX(updated_at) FROM clubs "
+    "UNION ALL SELECT 'internships', COUNT(*), MAX(updated_at) FROM internships"
+)
+
+CS_ELECTIVES = (
+    ("Advanced Algorithms & Data Structures", "Basic programming, DSA fundamentals", "Deep dive into complex algorithms and optimization"),
+    ("Machine Learning & AI", "Statistics, Python programming", "Hands-on ML projects and AI applications"),
+    ("Cloud Computing & DevOps", "Basic networking, Linux", "AWS/Azure certification and deployment strategies")
+)
+
+MECHANICAL_ELECTIVES = (
+    ("Advanced CAD & Simulation", "Engineering graphics, basic CAD", "SolidWorks, ANSYS simulation projects"),
+    ("Renewable Energy Systems", "Thermodynamics, fluid mechanics", "Solar, wind, and hybrid energy solutions"),
+    ("Robotics & Automation", "Control systems, programming", "Industrial robotics and automation projects")
+)
+
+ELECTRICAL_ELECTIVES = (
+    ("Embedded Systems Design", "Microprocessors, C programming", "IoT projects and embedded applications"),
+    ("Power Systems & Smart Grid", "Circuit analysis, power electronics", "Modern power distribution and smart grid tech"),
+    ("VLSI Design", "Digital electronics, HDL", "Chip design and semiconductor applications")
+)
+
+# Substring rules for branches without catalog rows, checked in order
+FALLBACK_ELECTIVE_RULES = (
+    (("Computer Science", "IT", "Software"), CS_ELECTIVES),
+    (("Mechanical", "Automobile"), MECHANICAL_ELECTIVES),
+    (("Electrical", "Electronics"), ELECTRICAL_ELECTIVES),
+)
+
+
+@lru_cache(maxsize=256)
+def fallback_branch_data(branch):
+    """Default electives, clubs and internships for a branch with no catalog rows"""
+    electives = None
+    for keywords, rule_electives in FALLBACK_ELECTIVE_RULES:
+        if any(keyword in branch for keyword in keywords):
+            electives = rule_electives
+            break
+    if electives is None:
+        electives = (
+            (f"Advanced {branch} Applications", "Core subject completion", "Specialized applications in your field"),
+            ("Research Methodology", "Basic coursework", "Scientific research and publication techniques"),
+            ("Industry Integration", "Foundational knowledge", "Real-world applications and case studies")
+        )
+
+    clubs = (
+        (f"{branch} Professional Society", f"Professional development in {branch}", "Industry workshops, guest lectures, networking events"),
+        ("Innovation & Entrepreneurship Club", "Startup incubation and innovation projects", "Pitch competitions, business plan development, mentorship"),
+        ("Technical Research Club", "Academic research and publication support", "Research projects, paper presentations, conference participation")
+    )
+
+    internships = (
+        (f"Industry Internship - {branch}", "Technical skills, communication, teamwork", f"Practical experience in {branch} industry", "Industry"),
+        ("Research Internship", "Analytical thinking, research methodology", "Academic research with faculty guidance", "Research Institute"),
+        ("Startup Internship", "Adaptability, multi-tasking, innovation mindset", "Dynamic startup environment experience", "Startup")
+    )
+
+    return electives, clubs, internships
+
+
+class BranchCatalog:
+    """Immutable in-memory index of electives, clubs and internships keyed by branch
+
+    The whole catalog is loaded in one pass and swapped in atomically. A
+    background thread polls row counts and MAX(updated_at) and reloads only
+    when they change, so lookups never touch the database.
+    """
+
+    def __init__(self, get_connection, refresh_interval=300):
+        self.get_connection = get_connection
+        self.refresh_interval = refresh_interval
+        self._index = MappingProxyType({})
+        self._signature = None
+        self._loaded_at = None
+        self._reloads = 0
+        self._ranker = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _fetch_signature(self, cursor):
+        cursor.execute(SIGNATURE_QUERY)
+        return tuple((row[0], row[1], str(row[2])) for row in cursor.fetchall())
+
+    def load(self, force=False):
+        """Reload the catalog if it changed; returns True when a new index was installed"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+        with self._lock:
+            try:
+                cursor = conn.cursor()
+                signature = self._fetch_signature(cursor)
+                if not force and signature == self._signature:
+                    cursor.close()
+                    return False
+
+                # Keyed like MySQL's case- and trailing-space-insensitive `branch = %s`,
+                # keeping the first spelling seen for the fallback sections
+                index = {}
+                spellings = {}
+                for position, table in enumerate(('electives', 'clubs', 'internships')):
+                    with metrics.stage(f'catalog_query_{table}', 'background'):
+                        cursor.execute(CATALOG_QUERIES[table])
+                        rows = cursor.fetchall()
+                    for row in rows:
+                        if table == 'electives':
+                            item = (row[1], row[2] or 'None', row[3] or '')
+                        elif table == 'clubs':
+                            item = (row[1], row[2] or '', row[3] or '')
+                        else:
+                            item = (row[1], row[2] or '', row[3] or '', row[4] or '')
+                        key = normalize_query(row[0])
+                        spellings.setdefault(key, row[0])
+                        index.setdefault(key, ([], [], []))[position].append(item)
+                cursor.close()
+            finally:
+                conn.close()
+
+            # Fill empty sections from the precomputed fallbacks so lookups are a single dict get
+            frozen = {}
+            for key, sections in index.items():
+                defaults = fallback_branch_data(spellings[key])
+                frozen[key] = tuple(
+                    tuple(items) if items else defaults[position]
+                    for position, items in enumerate(sections)
+                )
+
+            self._index = MappingProxyType(frozen)
+            self._ranker = self._build_ranker(frozen)
+            self._signature = signature
+            self._loaded_at = time.time()
+            self._reloads += 1
+        logger.info("Branch catalog loaded: %s branches", len(frozen))
+        return True
+
+    def _build_ranker(self, index):
+        if np is None:
+            return None
+        try:
+            with metrics.stage('catalog_ranker_build', 'background'):
+                return CatalogRanker.build(index, previous=self._ranker)
+        except Exception as e:
+            logger.error("Failed to build catalog ranker: %s", e)
+            return None
+
+    def get(self, branch):
+        """Return (electives, clubs, internships) for a branch without touching the database
+
+        Branch names match regardless of case and surrounding whitespace.
+        """
+        data = self._index.get(normalize_query(branch))
+        if data is None:
+            return fallback_branch_data(branch)
+        return data
+
+    def ranked(self, branch, interests, goals):
+        """Like get, cut to the items shown to the student with the best matches for their profile first"""
+        key = normalize_query(branch)
+        sections = self._index.get(key)
+        if sections is None:
+            return fallback_branch_data(branch)
+        ranker = self._ranker
+        if ranker is None:
+            return sections
+        return ranker.rank(key, sections, interests, goals)
+
+    def invalidate(self):
+        """Force a reload on the next poll"""
+        with self._lock:
+            self._signature = None
+        self._wakeup.set()
+
+    def _poll(self):
+        while True:
+            self._wakeup.wait(self.refresh_interval)
+            self._wakeup.clear()
+            try:
+                self.load()
+            except Exception as e:
+                logger.error("Branch catalog refresh failed: %s", e)
+
+    def start(self, load=True):
+        """Load the catalog (unless the caller loads it later) and start the change-detection thread"""
+        if load:
+            try:
+                self.load(force=True)
+            except Exception as e:
+                logger.error("Failed to load branch catalog: %s", e)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._poll, name='branch-catalog', daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        return {
+            'branches': len(self._index),
+            'reloads': self._reloads,
+            'loaded_at': self._loaded_at,
+            'ranker': self._ranker.stats() if self._ranker else None
+        }
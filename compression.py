@@ -0,0 +1,111 @@
+"""Compression for stored recommendations and for HTTP responses
+
+Stored recommendations are UTF-8 bytes, optionally prefixed with a marker
+naming the codec. Text written before compression existed has no marker and
+is returned as-is, so old and new rows can be read side by side.
+
+zstandard and brotli are optional; without them storage falls back to zlib
+and responses to gzip.
+"""
+import gzip
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Valid UTF-8 markdown never starts with a NUL byte
+ZLIB_MARKER = b'\x00z1'
+ZSTD_MARKER = b'\x00zs'
+
+# Below this many bytes compression saves little and costs CPU on every read
+MIN_STORED_BYTES = 256
+MIN_RESPONSE_BYTES = 1024
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript', 'text/markdown'
+}
+
+_local = threading.local()
+
+
+def _zstd_compressor():
+    # Zstd contexts are not thread-safe, so each thread keeps its own
+    if not hasattr(_local, 'compressor'):
+        _local.compressor = zstandard.ZstdCompressor(level=6)
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.compressor, _local.decompressor
+
+
+def resolve_codec(codec):
+    """zstd, zlib or none; zstd becomes zlib when zstandard is not installed"""
+    codec = (codec or 'zstd').lower()
+    if codec == 'zstd' and zstandard is None:
+        return 'zlib'
+    if codec not in ('zstd', 'zlib', 'none'):
+        raise ValueError(f"Unknown compression codec {codec!r}")
+    return codec
+
+
+def compress_text(text, codec='zstd', min_size=MIN_STORED_BYTES):
+    """Encode text for a binary column, compressed with a format marker when it is large enough"""
+    if text is None:
+        return None
+    data = text.encode('utf-8')
+    codec = resolve_codec(codec)
+    if codec == 'none' or len(data) < min_size:
+        return data
+    if codec == 'zstd':
+        return ZSTD_MARKER + _zstd_compressor()[0].compress(data)
+    return ZLIB_MARKER + zlib.compress(data, 6)
+
+
+def decompress_text(value):
+    """Inverse of compress_text; plain text and unmarked bytes from older rows pass through"""
+    if value is None or isinstance(value, str):
+        return value
+    data = bytes(value)
+    if data.startswith(ZSTD_MARKER):
+        if zstandard is None:
+            raise RuntimeError("Row is zstd-compressed but zstandard is not installed")
+        data = _zstd_compressor()[1].decompress(data[len(ZSTD_MARKER):])
+    elif data.startswith(ZLIB_MARKER):
+        data = zlib.decompress(data[len(ZLIB_MARKER):])
+    return data.decode('utf-8')
+
+
+def choose_encoding(accept_encoding):
+    """Best content coding the client accepts: br when brotli is installed, then gzip, else None"""
+    accepted = set()
+    for part in (accept_encoding or '').lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress_body(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def compressible(status_code, mimetype, headers):
+    """Whether a complete (non-streamed) response is worth encoding"""
+    return (
+        200 <= status_code < 300 and status_code != 204
+        and mimetype in COMPRESSIBLE_MIMETYPES
+        and 'Content-Encoding' not in headers
+    )
@@ -0,0 +1,332 @@
+import logging
+import os
+import threading
+import time
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseUnavailable(Exception):
+    """Raised without attempting a connection while MySQL is marked down"""
+
+
+class PooledConnection:
+    """Borrowed connection; close() hands it back to the pool instead of disconnecting"""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        # Named locks taken through try_named_lock and not released yet
+        self.named_locks = 0
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw, self.named_locks)
+
+
+class Backoff:
+    """Up/down state of a MySQL server, shared by everything borrowing connections to it
+
+    A failed connect marks the server down, and check() then fails at once
+    without trying it until the backoff expires, when a single caller is let
+    through to probe it. The backoff doubles on each failed probe, up to maximum.
+    """
+
+    def __init__(self, initial=0.5, maximum=30.0):
+        self.initial = initial
+        self.maximum = maximum
+        self._lock = threading.Lock()
+        self._backoff = 0.0
+        self._down_until = 0.0
+        self._down_since = None
+        self._probing = False
+        self._last_error = None
+        self._fast_failures = 0
+
+    def check(self):
+        """True when this caller should probe; raises DatabaseUnavailable while MySQL is marked down"""
+        with self._lock:
+            if not self._backoff:
+                return False
+            if time.monotonic() < self._down_until or self._probing:
+                self._fast_failures += 1
+                raise DatabaseUnavailable(f"MySQL marked down: {self._last_error}")
+            self._probing = True
+            return True
+
+    def probed(self):
+        """End the probe check() handed out, whatever its outcome"""
+        with self._lock:
+            self._probing = False
+
+    def mark_down(self, error):
+        with self._lock:
+            self._backoff = min(self.maximum, self._backoff * 2 if self._backoff else self.initial)
+            self._down_until = time.monotonic() + self._backoff
+            self._down_since = self._down_since or time.time()
+            self._last_error = str(error)
+            backoff = self._backoff
+        logger.warning("MySQL unavailable, retrying in %ss: %s", backoff, error)
+
+    def mark_up(self):
+        with self._lock:
+            if self._backoff:
+                logger.info("MySQL reachable again after %.0fs", time.time() - self._down_since)
+            self._backoff = 0.0
+            self._down_since = None
+
+    @property
+    def state(self):
+        return 'down' if self._backoff else 'up'
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'fast_failures': self._fast_failures,
+                'retry_in_s': round(max(0.0, self._down_until - time.monotonic()), 2) if self._backoff else None,
+                'last_error': self._last_error if self._backoff else None
+            }
+
+
+class ConnectionPool:
+    """Thread-safe MySQL pool with borrow timeouts, idle pre-ping and a cached down state
+
+    Connections are opened lazily up to pool_size and reused LIFO, so rarely
+    used ones age out and get pinged before reuse. A connection returned
+    clean goes straight back; one still in a transaction is rolled back, and
+    one holding a named lock taken through try_named_lock is reset
+    (COM_RESET_CONNECTION), so neither leaks to the next borrower. When a connect attempt
+    fails the pool is marked down (see Backoff) and every borrow fails
+    immediately until a probe gets through again.
+    """
+
+    def __init__(self, config, pool_size=5, borrow_timeout=2.0, ping_after=30.0,
+                 backoff_initial=0.5, backoff_max=30.0, connect_timeout=3):
+        self.config = config
+        self.pool_size = pool_size
+        self.borrow_timeout = borrow_timeout
+        self.ping_after = ping_after
+        self.backoff = Backoff(backoff_initial, backoff_max)
+        self.connect_timeout = connect_timeout
+        self._idle = []
+        self._created = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'borrows': 0, 'waits': 0, 'exhausted': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0,
+            'connects': 0, 'connect_failures': 0, 'pings': 0, 'ping_failures': 0,
+            'rollbacks': 0, 'resets': 0, 'discarded': 0
+        }
+
+    def _mark_down(self, error):
+        self.backoff.mark_down(error)
+        # Idle connections to a server that refuses new ones are most likely dead too
+        with self._cond:
+            stale, self._idle = self._idle, []
+            self._created -= len(stale)
+        for raw, _ in stale:
+            self._close_quietly(raw)
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _open(self):
+        try:
+            raw = mysql.connector.connect(connection_timeout=self.connect_timeout, **self.config)
+        except Exception as e:
+            with self._cond:
+                self._stats['connect_failures'] += 1
+            self._mark_down(e)
+            raise
+        with self._cond:
+            self._stats['connects'] += 1
+        self.backoff.mark_up()
+        return raw
+
+    def _discard(self, raw):
+        self._close_quietly(raw)
+        with self._cond:
+            self._created -= 1
+            self._stats['discarded'] += 1
+            self._cond.notify()
+
+    def _take_slot(self, start, timeout):
+        """Return (raw, last_used) for an idle connection or (None, None) for a reserved new slot"""
+        with self._cond:
+            waited = False
+            while True:
+                if self._idle:
+                    raw, last_used = self._idle.pop()
+                    break
+                if self._created < self.pool_size:
+                    self._created += 1
+                    raw = last_used = None
+                    break
+                remaining = start + timeout - time.monotonic()
+                if remaining <= 0:
+                    self._stats['exhausted'] += 1
+                    raise PoolError(f"No connection free after {timeout}s; pool size {self.pool_size}")
+                if not waited:
+                    self._stats['waits'] += 1
+                    waited = True
+                self._cond.wait(remaining)
+            waited_ms = (time.monotonic() - start) * 1000
+            self._stats['borrows'] += 1
+            self._stats['wait_ms_total'] += waited_ms
+            self._stats['wait_ms_max'] = max(self._stats['wait_ms_max'], waited_ms)
+        return raw, last_used
+
+    def get_connection(self, timeout=None):
+        """Borrow a connection, waiting up to timeout seconds for one to free up
+
+        Raises DatabaseUnavailable while MySQL is marked down and PoolError when
+        every connection stays checked out for the whole timeout.
+        """
+        timeout = self.borrow_timeout if timeout is None else timeout
+        start = time.monotonic()
+        probe = self.backoff.check()
+        try:
+            while True:
+                raw, last_used = self._take_slot(start, timeout)
+                if raw is None:
+                    try:
+                        raw = self._open()
+                    except Exception:
+                        with self._cond:
+                            self._created -= 1
+                            self._cond.notify()
+                        raise
+                    return PooledConnection(self, raw)
+
+                if probe or time.monotonic() - last_used > self.ping_after:
+                    try:
+                        raw.ping(reconnect=False)
+                    except Exception as e:
+                        with self._cond:
+                            self._stats['ping_failures'] += 1
+                        self._discard(raw)
+                        if probe:
+                            self._mark_down(e)
+                            raise DatabaseUnavailable(f"MySQL marked down: {e}")
+                        continue
+                    with self._cond:
+                        self._stats['pings'] += 1
+                    if probe:
+                        self.backoff.mark_up()
+                return PooledConnection(self, raw)
+        finally:
+            if probe:
+                self.backoff.probed()
+
+    def _release(self, raw, named_locks=0):
+        try:
+            if named_locks:
+                raw.reset_session()
+                counter = 'resets'
+            elif getattr(raw, 'in_transaction', False):
+                raw.rollback()
+                counter = 'rollbacks'
+            else:
+                counter = None
+        except Exception as e:
+            # Unread results or a dead connection; a fresh one is cheaper than guessing its state
+            logger.debug("Discarding connection that could not be cleaned up: %s", e)
+            self._discard(raw)
+            return
+        with self._cond:
+            if counter:
+                self._stats[counter] += 1
+            self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+
+    @property
+    def state(self):
+        return self.backoff.state
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self.pool_size,
+                'open': self._created,
+                'idle': len(self._idle),
+                'in_use': self._created - len(self._idle),
+                'wait_ms_mean': round(stats['wait_ms_total'] / stats['borrows'], 3) if stats['borrows'] else 0.0
+            })
+            stats['wait_ms_total'] = round(stats['wait_ms_total'], 3)
+            stats['wait_ms_max'] = round(stats['wait_ms_max'], 3)
+        stats.update(self.backoff.stats())
+        return stats
+
+
+def try_named_lock(conn, cursor, name):
+    """Take the MySQL named lock on this connection without waiting; True when this session holds it
+
+    Errors propagate, so a MySQL hiccup skips the caller's run instead of
+    letting every worker in. Only connections that declare they have no named
+    locks (the SQLite stand-in, supports_named_locks = False) always get it,
+    which is safe in a single process only.
+    """
+    if not getattr(conn, 'supports_named_locks', True):
+        return True
+    cursor.execute("SELECT GET_LOCK(%s, 0)", (name,))
+    if cursor.fetchone()[0] != 1:
+        return False
+    if isinstance(conn, PooledConnection):
+        # Until released, returning the connection resets its session to drop the lock
+        conn.named_locks += 1
+    return True
+
+
+def release_named_lock(conn, cursor, name):
+    """Release a lock taken by try_named_lock; a failure is logged, and the pool's reset on return frees it"""
+    if not getattr(conn, 'supports_named_locks', True):
+        return
+    try:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+        released = cursor.fetchone()[0] == 1
+    except Exception as e:
+        logger.error("Could not release MySQL named lock %s: %s", name, e)
+        return
+    if released and isinstance(conn, PooledConnection):
+        conn.named_locks -= 1
+
+
+def background_borrowers():
+    """Connections a worker's background threads can hold at once, besides request threads"""
+    # Catalog refresh, suggestion index sync, the recommendation writer, pregenerated-entry
+    # refresh, the boot-time warm-up and the two suggestion refresh threads
+    count = 7
+    # Retention and pregeneration hold theirs for a whole run, pregeneration for the off-peak window
+    if int(os.getenv('RETENTION_DAYS', '0')) > 0:
+        count += 1
+    if int(os.getenv('PREGEN_LIMIT', '0')) > 0:
+        count += 1
+    return count
+
+
+def pool_size_from_env():
+    """DB_POOL_SIZE, or one connection per request thread plus the background threads
+
+    gunicorn.conf.py exports WORKER_THREADS and WEB_CONCURRENCY. When
+    DB_MAX_CONNECTIONS is set, the size is capped so all workers together stay
+    within it.
+    """
+    if os.getenv('DB_POOL_SIZE'):
+        return int(os.getenv('DB_POOL_SIZE'))
+    size = int(os.getenv('WORKER_THREADS', '1')) + background_borrowers()
+    if os.getenv('DB_MAX_CONNECTIONS'):
+        workers = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+        size = min(size, max(2, int(os.getenv('DB_MAX_CONNECTIONS')) // workers))
+    return size
@@ -0,0 +1,233 @@
+import os
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+TEMPLATE_FILES = {
+    'unavailable': 'fallback_recommendation.md',
+    'error': 'fallback_error_recommendation.md',
+}
+
+
+def load_templates():
+    """The Jinja templates the renderers below are written from, for tests and benchmarks"""
+    from jinja2 import Environment, FileSystemLoader, StrictUndefined
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=False, undefined=StrictUndefined)
+    return {kind: env.get_template(name) for kind, name in TEMPLATE_FILES.items()}
+
+
+# The fallback documents are authored as templates/fallback_*.md but rendered with these
+# f-strings: a single string build beats any template fill. Keep both in step;
+# tests/test_fallback.py checks that they render the same text.
+
+def _render_unavailable(branch, year, interests, goals, primary_interest, electives, clubs, internships):
+    """Mirrors templates/fallback_recommendation.md"""
+    return f"""
+# 🎓 Personalized Academic & Career Recommendations
+
+## 📋 Your Profile
+- **Branch:** {branch}
+- **Year:** {year}
+- **Interests:** {interests}
+- **Career Goals:** {goals}
+
+## 🎓 Recommended Electives
+
+### 1. {electives[0][0]}
+**Why This Fits:** This course aligns perfectly with your interests in {primary_interest} and supports your career goals.
+
+**Key Benefits:**
+- Develops critical skills relevant to your field
+- Provides hands-on experience with industry tools
+- Opens pathways to specialized career opportunities
+
+**Prerequisites:** {electives[0][1]}
+
+### 2. {electives[1][0] if len(electives) > 1 else 'Advanced Specialization Course'}
+**Why This Fits:** Complements your interests while building analytical and technical skills.
+
+**Key Benefits:**
+- Enhances problem-solving capabilities
+- Provides theoretical foundation for practical applications
+- Builds portfolio of relevant projects
+
+**Prerequisites:** {electives[1][1] if len(electives) > 1 else 'Core coursework completion'}
+
+### 3. {electives[2][0] if len(electives) > 2 else 'Industry-Focused Elective'}
+**Why This Fits:** Bridges the gap between academic knowledge and real-world applications.
+
+**Key Benefits:**
+- Exposure to cutting-edge technologies
+- Networking opportunities with professionals
+- Capstone project experience
+
+**Prerequisites:** {electives[2][1] if len(electives) > 2 else 'Advanced foundation courses'}
+
+## 🏛️ Recommended Club
+
+### {clubs[0][0]}
+**Why This Club:** Perfect match for your interests and career aspirations in {branch}.
+
+**Activities & Benefits:**
+- Technical workshops and skill development
+- Networking with alumni and industry professionals
+- Competitions and project showcases
+- Leadership development opportunities
+
+## 💼 Recommended Internship
+
+### {internships[0][0]}
+**Perfect Match Because:** Aligns with your interests in {primary_interest} and career goals.
+
+**What You'll Gain:**
+- Real-world application of academic knowledge
+- Industry-specific tools and technology experience
+- Professional network and mentorship opportunities
+- Resume-building practical experience
+
+**Required Skills:** {internships[0][1]}
+
+## 🎯 Action Plan
+
+**Immediate Steps (This Semester):**
+1. Enroll in the top recommended elective for next semester
+2. Join the recommended club and attend orientation sessions
+3. Start building relevant skills through online courses
+
+**Medium-term Goals (Next 6-12 months):**
+1. Complete at least 2 recommended electives
+2. Take active role in club activities and projects
+3. Begin internship application process early
+
+**Long-term Vision (1-2 years):**
+1. Secure internship opportunity in your field
+2. Build strong professional network
+3. Develop expertise that sets you apart
+
+## 📈 Additional Recommendations
+
+**Skill Development Focus:**
+- Technical skills related to {primary_interest}
+- Communication and presentation skills  
+- Project management and teamwork
+
+**Networking Strategy:**
+- Attend industry conferences and webinars
+- Connect with alumni in your field
+- Join professional associations
+
+**Portfolio Building:**
+- Document all projects and achievements
+- Create online presence (LinkedIn, GitHub, personal website)
+- Collect recommendations from professors and supervisors
+
+---
+*Remember: Success comes from consistent effort and strategic choices. Focus on quality over quantity and always align decisions with your long-term career goals.*
+            """
+
+
+def _render_error(branch, year, interests, goals, primary_interest, electives, clubs, internships):
+    """Mirrors templates/fallback_error_recommendation.md"""
+    return f"""
+# 🎓 Personalized Academic & Career Recommendations
+
+## 📋 Your Profile
+- **Branch:** {branch}
+- **Year:** {year}
+- **Interests:** {interests}
+- **Career Goals:** {goals}
+
+## 🎓 Recommended Electives
+
+### 1. {electives[0][0]}
+**Why This Fits:** This course aligns with your interests in {primary_interest} and supports your career aspirations.
+
+**Key Benefits:**
+- Develops critical technical skills
+- Provides hands-on project experience  
+- Opens specialized career pathways
+
+**Prerequisites:** {electives[0][1]}
+
+### 2. {electives[1][0] if len(electives) > 1 else 'Advanced Specialization'}
+**Why This Fits:** Complements your interests while building analytical capabilities.
+
+**Key Benefits:**
+- Enhances problem-solving skills
+- Provides theoretical foundation
+- Builds relevant project portfolio
+
+### 3. {electives[2][0] if len(electives) > 2 else 'Industry Applications'}
+**Why This Fits:** Bridges academic knowledge with real-world applications.
+
+**Key Benefits:**
+- Exposure to cutting-edge technology
+- Professional networking opportunities
+- Practical project experience
+
+## 🏛️ Recommended Club
+
+### {clubs[0][0]}
+**Why This Club:** Excellent match for your {branch} background and career interests.
+
+**What You'll Gain:**
+- Technical workshops and skill development
+- Networking with industry professionals
+- Leadership and teamwork experience
+- Project collaboration opportunities
+
+## 💼 Recommended Internship
+
+### {internships[0][0]}
+**Perfect Match:** Aligns with your interests and career goals in {branch}.
+
+**Benefits:**
+- Real-world application of your studies
+- Industry tools and technology exposure
+- Professional mentorship and networking
+- Competitive resume building
+
+**Required Skills:** {internships[0][1]}
+
+## 🎯 Action Plan
+
+**This Month:**
+1. Research and apply to recommended club
+2. Plan course selection for next semester  
+3. Start building relevant technical skills
+
+**Next 3-6 Months:**
+1. Enroll in top recommended electives
+2. Take active role in club activities
+3. Begin internship preparation and applications
+
+**Long-term (1-2 years):**
+1. Secure internship in your field
+2. Build strong professional network
+3. Develop specialized expertise
+
+## 📈 Additional Recommendations
+
+**Focus Areas:**
+- Technical skills: {primary_interest}
+- Professional skills: Communication, teamwork, project management
+- Industry knowledge: Stay updated with latest trends
+
+**Success Tips:**
+- Quality over quantity in activities
+- Build meaningful professional relationships
+- Document achievements and create portfolio
+- Align all activities with career goals
+
+*Note: This recommendation was generated with limited AI assistance. For more detailed guidance, ensure your system configuration is complete.*
+            """
+
+
+RENDERERS = {
+    'unavailable': _render_unavailable,
+    'error': _render_error,
+}
+
+
+def render_fallback(kind, branch, year, interests, goals, electives, clubs, internships):
+    """Render the fallback recommendation for kind ('unavailable' or 'error')"""
+    return RENDERERS[kind](branch, year, interests, goals, interests.split(',', 1)[0].strip(),
+                           electives, clubs, internships)
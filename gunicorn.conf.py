@@ -0,0 +1,50 @@
+"""gunicorn settings picked up automatically from the project directory
+
+Tables are created or upgraded once in the master at startup (DB_MIGRATE_ON_START=0
+skips it, e.g. when deploys run python schema.py). Importing the app opens no
+connections; each worker builds its own MySQL pool, Gemini clients and
+background threads in post_fork, so --preload is safe and only shares
+imported code.
+
+When PROMETHEUS_MULTIPROC_DIR is set the directory is emptied at startup and
+each worker's metric files are retired when it exits, so /metrics aggregates
+only live and finished workers of this server.
+"""
+import importlib
+import os
+import shutil
+
+# Read by app.py at import; create_app() runs in post_fork instead
+os.environ.setdefault('DEFER_WORKER_INIT', '1')
+
+
+def on_starting(server):
+    # Workers size their MySQL pool from these (see dbpool.pool_size_from_env)
+    os.environ.setdefault('WORKER_THREADS', str(server.cfg.threads))
+    os.environ.setdefault('WEB_CONCURRENCY', str(server.cfg.workers))
+
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+    if os.getenv('DB_MIGRATE_ON_START', '1') == '1':
+        import schema
+        schema.migrate()
+
+    if server.cfg.preload_app:
+        # Importing the SDK opens nothing, so workers can share it; clients are still made per worker
+        import google.generativeai  # noqa: F401
+
+
+def post_fork(server, worker):
+    # Imports the app module here when it was not preloaded, then sets this worker up
+    module = importlib.import_module(server.app.app_uri.split(':')[0])
+    create_app = getattr(module, 'create_app', None)
+    if create_app:
+        create_app()
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_process_dead(worker.pid)
@@ -0,0 +1,324 @@
+"""Hedged requests across an ordered list of Gemini model tiers
+
+HedgedModel stands in for a GenerativeModel. A call goes to the first tier;
+if it has not answered within that tier's observed latency quantile (p90 by
+default), the same request is sent to the next tier, and so on down the
+list. The first valid response wins and the calls still running are
+cancelled. A tier that fails or returns an empty response hands over to the
+next one at once, without waiting.
+
+Each tier keeps a rolling window of its own latencies, so the hedge delays
+follow the models as they speed up or slow down. A cancelled call records
+the time it had run so far, a lower bound that keeps the slow calls hedging
+cuts short in the window. Until a tier has min_samples latencies it is not
+hedged, only failed over. Hedges are capped at max_hedge_ratio of recent
+calls, so a slow period cannot multiply the quota spent. When admit is set,
+each hedge must also get a ticket from admit(prompt, priority), where
+priority is the caller's class passed to generate_content, and the ticket
+goes to settle(ticket, response, called) once the hedge ends
+(services.charge_hedges points both at the Gemini scheduler).
+
+Sync calls run on a small thread pool so the caller can wait for whichever
+finishes first; a losing sync call cannot be interrupted and is left to finish
+in the background with its result discarded. Async calls are real tasks
+and losers are cancelled. Streaming calls go to the first tier unhedged.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+from breaker import percentile
+
+logger = logging.getLogger(__name__)
+
+
+def valid_response(response):
+    """True if the response has non-empty text; blocked or empty candidates do not count"""
+    try:
+        return bool(response.text and response.text.strip())
+    except Exception:
+        return False
+
+
+class ModelTier:
+    """One model of a HedgedModel with a rolling window of its latencies"""
+
+    def __init__(self, name, model, window=200, min_samples=20):
+        self.name = name
+        self.model = model
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'errors': 0, 'wins': 0, 'cancelled': 0, 'abandoned': 0}
+
+    def count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def record(self, latency, result):
+        """result is ok, error, or cancelled for a call stopped after latency seconds"""
+        with self._lock:
+            self._stats['calls'] += 1
+            if result == 'error':
+                self._stats['errors'] += 1
+            else:
+                self._latencies.append(latency)
+        metrics.GEMINI_MODEL_SECONDS.labels(self.name, result).observe(latency)
+
+    def hedge_delay(self, quantile, min_delay):
+        """Seconds to wait for this tier before hedging, or None while too few latencies are known"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return max(min_delay, percentile(latencies, quantile))
+
+    def stats(self, quantile):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = dict(self._stats)
+        stats.update({
+            'latency_p50_s': percentile(latencies, 0.5),
+            f"latency_p{round(quantile * 100)}_s": percentile(latencies, quantile),
+            'samples': len(latencies),
+        })
+        return stats
+
+
+class HedgedModel:
+    """generate_content and generate_content_async over model tiers, hedged at each tier's latency quantile"""
+
+    def __init__(self, tiers, quantile=0.9, min_delay=0.2, max_hedge_ratio=0.1, window=200, threads=32,
+                 admit=None, settle=None):
+        self.tiers = tiers
+        self.admit = admit
+        self.settle = settle
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='gemini-hedge')
+        self._stats = {'requests': 0, 'hedged': 0, 'failovers': 0, 'hedges_won': 0, 'hedges_skipped': 0,
+                       'hedges_no_quota': 0}
+
+    def __getattr__(self, name):
+        # count_tokens and the rest of the model API come from the first tier
+        return getattr(self.tiers[0].model, name)
+
+    def _may_hedge(self, prompt, priority):
+        """(True, quota ticket or None) when a hedge may start now, (False, None) otherwise"""
+        with self._lock:
+            allowed = sum(self._recent) < self.max_hedge_ratio * max(len(self._recent), 1)
+            if not allowed:
+                self._stats['hedges_skipped'] += 1
+                return False, None
+        if self.admit is None:
+            return True, None
+        ticket = self.admit(prompt, priority)
+        if ticket is None:
+            with self._lock:
+                self._stats['hedges_no_quota'] += 1
+            return False, None
+        return True, ticket
+
+    def _settle(self, ticket, response=None, called=True):
+        if ticket is not None and self.settle is not None:
+            self.settle(ticket, response, called)
+
+    def _finish(self, hedged, failovers, winner):
+        with self._lock:
+            self._recent.append(hedged)
+            self._stats['requests'] += 1
+            self._stats['hedged'] += hedged
+            self._stats['failovers'] += failovers
+            self._stats['hedges_won'] += bool(hedged and winner)
+        if hedged:
+            metrics.GEMINI_HEDGES.labels('hedge' if winner else 'primary').inc()
+
+    def _options(self, request_options, started):
+        """Request options for a tier started now, with what is left of the caller's timeout"""
+        options = dict(request_options or {})
+        if options.get('timeout'):
+            options['timeout'] = max(0.1, options['timeout'] - (time.monotonic() - started))
+        return options
+
+    def _next_wait(self, position, launched_at):
+        """Seconds until the next tier should be hedged in, or None to wait for the running calls"""
+        if position >= len(self.tiers):
+            return None
+        delay = self.tiers[position - 1].hedge_delay(self.quantile, self.min_delay)
+        if delay is None:
+            return None
+        return max(0.0, launched_at + delay - time.monotonic())
+
+    def _call(self, tier, prompt, options, kwargs, ticket):
+        start = time.monotonic()
+        try:
+            response = tier.model.generate_content(prompt, request_options=options, **kwargs)
+        except Exception:
+            tier.record(time.monotonic() - start, 'error')
+            self._settle(ticket)
+            raise
+        tier.record(time.monotonic() - start, 'ok')
+        # Abandoned hedges get here too, after the caller has moved on
+        self._settle(ticket, response)
+        return response
+
+    def generate_content(self, prompt, stream=False, request_options=None, priority=None, **kwargs):
+        if stream or len(self.tiers) == 1:
+            return self.tiers[0].model.generate_content(
+                prompt, stream=stream, request_options=request_options, **kwargs
+            )
+        started = time.monotonic()
+        running = {}
+        position = 0
+        launched_at = started
+        hedged = False
+        failovers = 0
+        first_error = None
+        fallback_response = None
+
+        tickets = {}
+
+        def launch(ticket=None):
+            nonlocal position, launched_at
+            tier = self.tiers[position]
+            future = self._executor.submit(self._call, tier, prompt, self._options(request_options, started), kwargs, ticket)
+            running[future] = position
+            tickets[future] = ticket
+            position += 1
+            launched_at = time.monotonic()
+
+        launch()
+        while running:
+            done, _ = wait(running, timeout=self._next_wait(position, launched_at), return_when=FIRST_COMPLETED)
+            if not done:
+                allowed, ticket = self._may_hedge(prompt, priority)
+                if allowed:
+                    hedged = True
+                    launch(ticket)
+                else:
+                    # Over budget or out of quota: let the running calls finish
+                    position = len(self.tiers)
+                continue
+            for future in done:
+                index = running.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logger.warning("Gemini model %s failed: %s", self.tiers[index].name, e)
+                    first_error = first_error or e
+                    response = None
+                if response is not None and valid_response(response):
+                    for loser in running:
+                        # A call already running cannot be stopped; it records its own latency when it ends
+                        if loser.cancel():
+                            self.tiers[running[loser]].count('cancelled')
+                            self._settle(tickets[loser], called=False)
+                        else:
+                            self.tiers[running[loser]].count('abandoned')
+                    self.tiers[index].count('wins')
+                    self._finish(hedged, failovers, index > 0)
+                    return response
+                fallback_response = fallback_response if fallback_response is not None else response
+                if not running and position < len(self.tiers):
+                    failovers += 1
+                    launch()
+        self._finish(hedged, failovers, False)
+        if fallback_response is not None:
+            return fallback_response
+        raise first_error
+
+    async def _call_async(self, tier, prompt, options, kwargs, ticket):
+        start = time.monotonic()
+        try:
+            response = await tier.model.generate_content_async(prompt, request_options=options, **kwargs)
+        except asyncio.CancelledError:
+            # Lost the race: at least this long, which keeps slow calls in the window
+            tier.record(time.monotonic() - start, 'cancelled')
+            self._settle(ticket)
+            raise
+        except Exception:
+            tier.record(time.monotonic() - start, 'error')
+            self._settle(ticket)
+            raise
+        tier.record(time.monotonic() - start, 'ok')
+        self._settle(ticket, response)
+        return response
+
+    async def generate_content_async(self, prompt, stream=False, request_options=None, priority=None, **kwargs):
+        if stream or len(self.tiers) == 1:
+            return await self.tiers[0].model.generate_content_async(
+                prompt, stream=stream, request_options=request_options, **kwargs
+            )
+        started = time.monotonic()
+        running = {}
+        position = 0
+        launched_at = started
+        hedged = False
+        failovers = 0
+        first_error = None
+        fallback_response = None
+
+        def launch(ticket=None):
+            nonlocal position, launched_at
+            tier = self.tiers[position]
+            task = asyncio.ensure_future(
+                self._call_async(tier, prompt, self._options(request_options, started), kwargs, ticket)
+            )
+            running[task] = position
+            position += 1
+            launched_at = time.monotonic()
+
+        launch()
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running, timeout=self._next_wait(position, launched_at), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    allowed, ticket = self._may_hedge(prompt, priority)
+                    if allowed:
+                        hedged = True
+                        launch(ticket)
+                    else:
+                        position = len(self.tiers)
+                    continue
+                for task in done:
+                    index = running.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        logger.warning("Gemini model %s failed: %s", self.tiers[index].name, e)
+                        first_error = first_error or e
+                        response = None
+                    if response is not None and valid_response(response):
+                        self.tiers[index].count('wins')
+                        self._finish(hedged, failovers, index > 0)
+                        return response
+                    fallback_response = fallback_response if fallback_response is not None else response
+                    if not running and position < len(self.tiers):
+                        failovers += 1
+                        launch()
+        finally:
+            # The winner returned, the caller was cancelled, or everything failed: stop the rest
+            for task, index in running.items():
+                task.cancel()
+                self.tiers[index].count('cancelled')
+        self._finish(hedged, failovers, False)
+        if fallback_response is not None:
+            return fallback_response
+        raise first_error
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            recent = list(self._recent)
+        stats['hedge_rate'] = round(sum(recent) / len(recent), 4) if recent else 0.0
+        stats['tiers'] = {tier.name: tier.stats(self.quantile) for tier in self.tiers}
+        return stats
@@ -0,0 +1,99 @@
+import base64
+import logging
+import re
+from datetime import datetime
+
+from compression import decompress_text
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_LENGTH = 300
+MAX_PAGE_SIZE = 20
+
+HEADING_PATTERN = re.compile(r'^#{3}\s*(?:\d+\.\s*)?(.+?)\s*$', re.MULTILINE)
+MARKDOWN_PATTERN = re.compile(r'[#*_`>\[\]]+')
+
+
+def summarize_recommendation(recommendation):
+    """Short plain-text preview: the recommended elective, club and internship names"""
+    if not recommendation:
+        return ''
+    names = [name for name in HEADING_PATTERN.findall(recommendation) if not name.startswith('[')]
+    if names:
+        summary = ' · '.join(names)
+    else:
+        summary = re.sub(r'\s+', ' ', MARKDOWN_PATTERN.sub('', recommendation)).strip()
+    if len(summary) > SUMMARY_LENGTH:
+        summary = summary[:SUMMARY_LENGTH - 1].rstrip() + '…'
+    return summary
+
+
+def encode_cursor(created_at, row_id):
+    """Opaque cursor for the (created_at, id) position of the last row on a page"""
+    raw = f"{created_at.strftime('%Y-%m-%d %H:%M:%S')}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) or raise ValueError for a malformed cursor"""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S'), int(row_id)
+    except Exception:
+        raise ValueError("Invalid history cursor")
+
+
+def history_page_query(session_id, limit, after=None):
+    """SQL and parameters for one page of history metadata, newest first, using keyset pagination
+
+    The LONGBLOB body is only selected for rows written before the summary
+    column existed; those are decompressed and summarized in Python.
+    """
+    sql = (
+        "SELECT id, branch, year, interests, goals, "
+        "summary, CASE WHEN summary IS NULL THEN recommendation END, created_at "
+        "FROM recommendations WHERE session_id = %s"
+    )
+    params = [session_id]
+    if after is not None:
+        created_at, row_id = after
+        sql += " AND (created_at < %s OR (created_at = %s AND id < %s))"
+        params.extend([created_at, created_at, row_id])
+    sql += " ORDER BY created_at DESC, id DESC LIMIT %s"
+    params.append(limit + 1)
+    return sql, tuple(params)
+
+
+def _legacy_summary(stored):
+    """Summary for a row that predates the summary column, from its stored body"""
+    try:
+        return summarize_recommendation(decompress_text(stored))
+    except Exception as e:
+        logger.warning("Could not summarize a stored recommendation: %s", e)
+        return ''
+
+
+def history_page_from_rows(rows, limit):
+    """Turn rows from history_page_query into (items, next_cursor)"""
+    items = []
+    for row in rows[:limit]:
+        items.append({
+            'id': row[0],
+            'branch': row[1],
+            'year': row[2],
+            'interests': row[3],
+            'goals': row[4],
+            'summary': row[5] if row[5] is not None else _legacy_summary(row[6]),
+            'created_at': row[7].strftime('%Y-%m-%d %H:%M:%S') if row[7] else 'Unknown'
+        })
+
+    next_cursor = None
+    if len(rows) > limit and rows[limit - 1][7]:
+        next_cursor = encode_cursor(rows[limit - 1][7], rows[limit - 1][0])
+    return items, next_cursor
+
+
+def fetch_history_page(cursor, session_id, limit, after=None):
+    """Fetch one page of history metadata with a DB-API cursor"""
+    cursor.execute(*history_page_query(session_id, limit, after))
+    return history_page_from_rows(cursor.fetchall(), limit)
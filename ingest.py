@@ -0,0 +1,242 @@
+"""Bulk loading of electives, clubs and internships from CSV or JSONL feeds
+
+Rows are streamed in chunks, validated, and upserted on the (branch, name)
+natural key, so re-running a feed updates rows in place instead of adding
+duplicates. Chunks are committed together up to --transaction-rows rows.
+With --load-data each chunk goes through LOAD DATA LOCAL INFILE into a
+temporary staging table instead of a batched INSERT (the server must allow
+local_infile).
+
+    python ingest.py electives electives.csv
+    python ingest.py internships internships.jsonl --load-data --rejects rejected.jsonl
+
+Running workers pick up the changes on their next catalog poll
+(CATALOG_REFRESH_INTERVAL); in-process callers can pass their BranchCatalog
+to have it reloaded right away.
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+# Columns per table in load order; the first two form the natural key
+CATALOG_COLUMNS = {
+    'electives': ('branch', 'name', 'prerequisites', 'description'),
+    'clubs': ('branch', 'name', 'description', 'activities'),
+    'internships': ('branch', 'name', 'skills_required', 'description', 'company_type'),
+}
+# VARCHAR(255) columns; the rest are TEXT
+BOUNDED_COLUMNS = ('branch', 'name', 'company_type')
+MAX_LENGTH = 255
+TEXT_MAX_LENGTH = 65535
+
+
+def upsert_sql(table, source=None):
+    """INSERT ... ON DUPLICATE KEY UPDATE of the non-key columns, from VALUES or from a staging table"""
+    columns = CATALOG_COLUMNS[table]
+    updates = ', '.join(f"{column} = VALUES({column})" for column in columns[2:])
+    if source:
+        rows = f"SELECT {', '.join(columns)} FROM {source}"
+    else:
+        rows = f"VALUES ({', '.join(['%s'] * len(columns))})"
+    return f"INSERT INTO {table} ({', '.join(columns)}) {rows} ON DUPLICATE KEY UPDATE {updates}"
+
+
+def read_rows(path, file_format=None):
+    """Yield (line number, dict) from a CSV file with a header row or a JSONL file"""
+    file_format = file_format or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if file_format == 'csv':
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield line, row
+            return
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as e:
+                yield line, {'_error': f"invalid JSON: {e}"}
+                continue
+            yield line, row if isinstance(row, dict) else {'_error': 'not a JSON object'}
+
+
+def validate_row(table, row):
+    """(values tuple, None) for a loadable row, or (None, reason)"""
+    if '_error' in row:
+        return None, row['_error']
+    values = []
+    for column in CATALOG_COLUMNS[table]:
+        value = row.get(column)
+        if value is not None and not isinstance(value, str):
+            if isinstance(value, (dict, list)):
+                return None, f"{column} must be text"
+            value = str(value)
+        value = (value or '').strip() or None
+        limit = MAX_LENGTH if column in BOUNDED_COLUMNS else TEXT_MAX_LENGTH
+        if value is not None and len(value.encode('utf-8')) > limit:
+            return None, f"{column} longer than {limit} bytes"
+        values.append(value)
+    if not values[0] or not values[1]:
+        return None, 'branch and name are required'
+    return tuple(values), None
+
+
+def _tsv_field(value):
+    if value is None:
+        return '\\N'
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+class CatalogIngestor:
+    """Validates and upserts catalog rows into one table in sized transactions"""
+
+    def __init__(self, get_connection, table, chunk_size=1000, transaction_rows=10000, load_data=False,
+                 rejects_path=None):
+        if table not in CATALOG_COLUMNS:
+            raise ValueError(f"Unknown catalog table: {table}")
+        self.get_connection = get_connection
+        self.table = table
+        self.chunk_size = chunk_size
+        self.transaction_rows = max(transaction_rows, chunk_size)
+        self.load_data = load_data
+        self.rejects_path = rejects_path
+
+    def _prepare_chunk(self, numbered_rows, rejects):
+        """Valid rows of a chunk, the last one winning per (branch, name), and the count of duplicates dropped"""
+        rows = {}
+        count = 0
+        for line, row in numbered_rows:
+            values, reason = validate_row(self.table, row)
+            if values is None:
+                rejects.append((line, reason, row))
+                continue
+            rows[values[:2]] = values
+            count += 1
+        return list(rows.values()), count - len(rows)
+
+    def _staging_table(self, cursor):
+        staging = f"ingest_{self.table}"
+        cursor.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging} LIKE {self.table}")
+        return staging
+
+    def _write_chunk(self, cursor, rows, staging):
+        if staging is None:
+            cursor.executemany(upsert_sql(self.table), rows)
+            return
+        with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', newline='\n', delete=False) as f:
+            for row in rows:
+                f.write('\t'.join(map(_tsv_field, row)) + '\n')
+        try:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {staging} CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(CATALOG_COLUMNS[self.table])})",
+                (f.name,)
+            )
+            cursor.execute(upsert_sql(self.table, source=staging))
+            cursor.execute(f"DELETE FROM {staging}")
+        finally:
+            os.remove(f.name)
+
+    def _write_rejects(self, rejects):
+        if not self.rejects_path or not rejects:
+            return
+        with open(self.rejects_path, 'a', encoding='utf-8') as f:
+            for line, reason, row in rejects:
+                f.write(json.dumps({'line': line, 'reason': reason, 'row': row}, default=str) + '\n')
+
+    def run(self, numbered_rows, catalog=None):
+        """Load (line number, dict) rows; returns counts and rows per second
+
+        A failed chunk rolls back the open transaction and raises; rows committed
+        before it stay, and re-running the feed is safe.
+        """
+        started = time.monotonic()
+        stats = {'table': self.table, 'rows_read': 0, 'rows_written': 0, 'rows_rejected': 0,
+                 'duplicates_in_feed': 0, 'transactions': 0}
+        conn = self.get_connection()
+        if not conn:
+            raise ConnectionError("Database not available")
+        numbered_rows = iter(numbered_rows)
+        pending = 0
+        try:
+            cursor = conn.cursor()
+            staging = self._staging_table(cursor) if self.load_data else None
+            try:
+                while True:
+                    chunk = list(itertools.islice(numbered_rows, self.chunk_size))
+                    if not chunk:
+                        break
+                    rejects = []
+                    rows, duplicates = self._prepare_chunk(chunk, rejects)
+                    stats['rows_read'] += len(chunk)
+                    stats['rows_rejected'] += len(rejects)
+                    stats['duplicates_in_feed'] += duplicates
+                    for line, reason, _ in rejects[:5]:
+                        logger.warning("Rejected %s row at line %s: %s", self.table, line, reason)
+                    self._write_rejects(rejects)
+                    if rows:
+                        self._write_chunk(cursor, rows, staging)
+                        pending += len(rows)
+                    if pending >= self.transaction_rows:
+                        conn.commit()
+                        stats['rows_written'] += pending
+                        stats['transactions'] += 1
+                        pending = 0
+                if pending:
+                    conn.commit()
+                    stats['rows_written'] += pending
+                    stats['transactions'] += 1
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
+
+        if catalog is not None and stats['rows_written']:
+            catalog.invalidate()
+        elapsed = time.monotonic() - started
+        stats['seconds'] = round(elapsed, 3)
+        stats['rows_per_second'] = round(stats['rows_read'] / elapsed, 1) if elapsed else None
+        logger.info("Ingested %s rows into %s (%s rejected, %s rows/s)",
+                    stats['rows_written'], self.table, stats['rows_rejected'], stats['rows_per_second'])
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load electives, clubs or internships from a CSV or JSONL feed')
+    parser.add_argument('table', choices=sorted(CATALOG_COLUMNS))
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='default: from the file extension')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='rows per batched statement')
+    parser.add_argument('--transaction-rows', type=int, default=10000, help='rows per commit')
+    parser.add_argument('--load-data', action='store_true', help='stage chunks with LOAD DATA LOCAL INFILE')
+    parser.add_argument('--rejects', help='append rejected rows here as JSONL')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    import mysql.connector
+    import services
+
+    def get_connection():
+        return mysql.connector.connect(allow_local_infile=args.load_data, **services.mysql_config())
+
+    ingestor = CatalogIngestor(get_connection, args.table, chunk_size=args.chunk_size,
+                               transaction_rows=args.transaction_rows, load_data=args.load_data,
+                               rejects_path=args.rejects)
+    stats = ingestor.run(read_rows(args.path, args.format))
+    print(json.dumps(stats))
+    return 0 if stats['rows_read'] == 0 or stats['rows_written'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""Non-blocking logging: request threads enqueue records, one listener thread writes them
+
+Records are queued unformatted, so %-style arguments are only rendered by
+the listener, and only for records that survive sampling. When the queue is
+full, info and debug records are dropped instead of stalling the request.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+
+import metrics
+
+# Attributes every LogRecord has; anything else was passed through extra=
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def parse_sample_rates(text):
+    """Parse 'Message prefix=0.1,Other prefix=0.5' into a dict"""
+    rates = {}
+    for part in (text or '').split(','):
+        if '=' in part:
+            prefix, rate = part.rsplit('=', 1)
+            rates[prefix.strip()] = float(rate)
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the timestamp, level, logger, message and any extra fields"""
+
+    def format(self, record):
+        data = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of high-volume info lines, matched by message template prefix"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = tuple(rates.items())
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not isinstance(record.msg, str):
+            return True
+        for prefix, rate in self.rates:
+            if record.msg.startswith(prefix):
+                if random.random() < rate:
+                    record.sample_rate = rate
+                    return True
+                self.sampled_out += 1
+                metrics.LOG_RECORDS_DROPPED.labels('sampled').inc()
+                return False
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers formatting to the listener and never blocks on info records"""
+
+    def __init__(self, log_queue, warning_timeout=0.5):
+        super().__init__(log_queue)
+        self.warning_timeout = warning_timeout
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener runs in this process, so the record can be handed over as is
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.put(record, timeout=self.warning_timeout)
+                return
+            except queue.Full:
+                pass
+        self.dropped += 1
+        metrics.LOG_RECORDS_DROPPED.labels('queue_full').inc()
+
+
+class LogPipeline:
+    """Owns the queue, the listener thread and the handlers it writes to"""
+
+    def __init__(self, handler, listener, sampler):
+        self.handler = handler
+        self.listener = listener
+        self.sampler = sampler
+        # The listener thread only runs in the process that started it, not in forked children
+        self.pid = os.getpid()
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def stop(self):
+        """Flush queued records and stop the listener"""
+        with self._lock:
+            if self._stopped or self.pid != os.getpid():
+                return
+            self._stopped = True
+        self.listener.stop()
+
+    def stats(self):
+        return {
+            'queued': self.handler.queue.qsize(),
+            'dropped': self.handler.dropped,
+            'sampled_out': self.sampler.sampled_out
+        }
+
+
+def build_file_handler(log_file, rotation, max_bytes, backup_count, when):
+    if rotation == 'size':
+        return logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+    if rotation == 'time':
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file, when=when, backupCount=backup_count, encoding='utf-8'
+        )
+    # Rotated by an external tool such as logrotate; reopen when the file is moved
+    return logging.handlers.WatchedFileHandler(log_file, encoding='utf-8')
+
+
+def configure_logging(log_file, level=logging.INFO, log_format='json', rotation='size',
+                      max_bytes=10 * 1024 * 1024, backup_count=5, when='midnight',
+                      queue_size=10000, sample_rates=None):
+    """Route the root logger through a bounded queue to file and console handlers"""
+    if log_format == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s')
+
+    file_handler = build_file_handler(log_file, rotation, max_bytes, backup_count, when)
+    console_handler = logging.StreamHandler()
+    for target in (file_handler, console_handler):
+        target.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    sampler = SamplingFilter(sample_rates or {})
+    handler.addFilter(sampler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    return LogPipeline(handler, listener, sampler)
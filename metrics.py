@@ -0,0 +1,86 @@
+"""Prometheus metrics shared by the app and its background workers
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory
+before starting; every worker then writes its samples there and /metrics
+aggregates them, so a scrape hitting any worker sees the whole server.
+"""
+import os
+
+from flask import has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0
+)
+
+REQUEST_SECONDS = Histogram(
+    'mentor_request_seconds', 'End-to-end request latency', ['route', 'status'], buckets=LATENCY_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    'mentor_stage_seconds', 'Latency of one stage of request handling', ['route', 'stage'], buckets=LATENCY_BUCKETS
+)
+GEMINI_TOKENS = Counter(
+    'mentor_gemini_tokens_total', 'Tokens reported by Gemini usage metadata', ['route', 'kind']
+)
+GEMINI_MODEL_SECONDS = Histogram(
+    'mentor_gemini_model_seconds', 'Latency of each Gemini model call, hedges and losing calls included',
+    ['model', 'result'], buckets=LATENCY_BUCKETS
+)
+GEMINI_HEDGES = Counter(
+    'mentor_gemini_hedges_total', 'Hedged Gemini requests by which call answered first', ['winner']
+)
+FALLBACKS = Counter(
+    'mentor_fallback_total', 'Responses served from fallback content instead of Gemini', ['route', 'reason']
+)
+POOL_EXHAUSTED = Counter(
+    'mentor_db_pool_exhausted_total', 'Connection requests rejected because the pool was exhausted'
+)
+PREGENERATED_LOOKUPS = Counter(
+    'mentor_pregenerated_lookups_total', 'Recommendation requests checked against pregenerated entries',
+    ['period', 'result']
+)
+LOG_RECORDS_DROPPED = Counter(
+    'mentor_log_records_dropped_total', 'Log records not written because of sampling or a full log queue', ['reason']
+)
+
+
+def current_route():
+    """Flask endpoint name for the current request, or 'background' outside one"""
+    if has_request_context() and request.endpoint:
+        return request.endpoint
+    return 'background'
+
+
+def stage(name, route=None):
+    """Context manager timing one stage into mentor_stage_seconds"""
+    return STAGE_SECONDS.labels(route or current_route(), name).time()
+
+
+def record_tokens(route, response):
+    """Count prompt and output tokens from a Gemini response, if it reports them"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+    output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+    if prompt_tokens:
+        GEMINI_TOKENS.labels(route, 'prompt').inc(prompt_tokens)
+    if output_tokens:
+        GEMINI_TOKENS.labels(route, 'output').inc(output_tokens)
+
+
+def render_metrics():
+    """Exposition payload and content type for /metrics"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Drop a dead gunicorn worker's live gauges from the shared directory"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
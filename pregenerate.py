@@ -0,0 +1,364 @@
+"""Off-peak pre-generation of recommendations for the most requested profiles
+
+The job mines recent rows of the recommendations table for the most frequent
+(branch, year, interest set) combinations, and within each the most frequent
+goals. During the off-peak window it generates a recommendation for every
+such profile that has no fresh entry yet, in the scheduler's batch class and
+behind a rate limiter, and stores it in pregenerated_recommendations. Each
+entry is committed as soon as it is generated, so a run that is cut short by
+the end of the window, a call budget or Gemini errors resumes where it left
+off the next time.
+
+Workers hold the entries in memory (PregeneratedStore) and answer matching
+profiles from them before calling Gemini. Coverage, the share of
+recommendation requests answered from pregenerated entries, is counted
+separately for peak (outside the window) and off-peak requests.
+
+Run it standalone from cron:
+
+    python pregenerate.py --limit 500 --max-calls 400
+    python pregenerate.py --ignore-window     # run now, whatever the hour
+"""
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from types import MappingProxyType
+
+import metrics
+from cache import canonical_goals, canonical_interests, normalize_query, profile_key
+from compression import compress_text, decompress_text
+from dbpool import release_named_lock, try_named_lock
+from prompts import build_recommendation_prompt
+from scheduler import BATCH
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'pregenerated_recommendations'
+# Only one worker across the deployment runs the job at a time
+LOCK_NAME = 'mentor_recommendation_pregeneration'
+# Consecutive failed calls after which a run gives up until next time
+MAX_CONSECUTIVE_ERRORS = 5
+
+UPSERT_SQL = (
+    f"INSERT INTO {TABLE} "
+    "(profile_hash, branch, year, interests, goals, recommendation, request_count, generated_at) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE branch = VALUES(branch), year = VALUES(year), interests = VALUES(interests), "
+    "goals = VALUES(goals), recommendation = VALUES(recommendation), request_count = VALUES(request_count), "
+    "generated_at = VALUES(generated_at)"
+)
+
+
+def profile_hash(branch, year, interests, goals):
+    """Fixed-width key of the recommendation cache's canonical profile"""
+    return hashlib.sha1(profile_key(branch, year, interests, goals).encode('utf-8')).hexdigest()
+
+
+def parse_window(text):
+    """'1-6' -> (1, 6): local hours from start (inclusive) to end (exclusive), wrapping past midnight"""
+    start, end = (int(part) for part in text.split('-'))
+    if not (0 <= start < 24 and 0 <= end <= 24) or start == end:
+        raise ValueError(f"Invalid off-peak window {text!r}")
+    return start, end
+
+
+def in_window(window, now=None):
+    hour = (now or datetime.now()).hour
+    start, end = window
+    return start <= hour < end if start < end else hour >= start or hour < end
+
+
+class PregeneratedStore:
+    """Pregenerated recommendations held compressed in memory, reloaded when the table changes"""
+
+    def __init__(self, get_connection, window=(1, 6), refresh_interval=600):
+        self.get_connection = get_connection
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self._entries = MappingProxyType({})
+        self._signature = None
+        self._loaded_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counts = {'peak': [0, 0], 'off_peak': [0, 0]}
+
+    def load(self, force=False):
+        """Reload the entries if the table changed; returns True when a new set was installed"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*), MAX(generated_at) FROM {TABLE}")
+            signature = tuple(map(str, cursor.fetchone()))
+            if not force and signature == self._signature:
+                cursor.close()
+                return False
+            cursor.execute(f"SELECT profile_hash, recommendation FROM {TABLE}")
+            entries = {row[0]: bytes(row[1]) for row in cursor.fetchall() if row[1]}
+            cursor.close()
+        finally:
+            conn.close()
+        self._entries = MappingProxyType(entries)
+        self._signature = signature
+        self._loaded_at = time.time()
+        logger.info("Pregenerated recommendations loaded: %s entries", len(entries))
+        return True
+
+    def add(self, key, stored):
+        """Install one entry generated in this process without waiting for the next reload"""
+        entries = dict(self._entries)
+        entries[key] = stored
+        self._entries = MappingProxyType(entries)
+
+    def get(self, branch, year, interests, goals):
+        """Pregenerated recommendation for a profile or None, counted towards coverage"""
+        stored = self._entries.get(profile_hash(branch, year, interests, goals))
+        period = 'off_peak' if in_window(self.window) else 'peak'
+        with self._lock:
+            counts = self._counts[period]
+            counts[0] += 1
+            counts[1] += stored is not None
+        metrics.PREGENERATED_LOOKUPS.labels(period, 'hit' if stored is not None else 'miss').inc()
+        return decompress_text(stored) if stored is not None else None
+
+    def _poll(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.load()
+            except Exception as e:
+                logger.error("Pregenerated recommendations refresh failed: %s", e)
+
+    def start(self, load=True):
+        """Load the entries (unless warm_up does it later) and start the refresh thread"""
+        if load:
+            try:
+                self.load(force=True)
+            except Exception as e:
+                logger.error("Failed to load pregenerated recommendations: %s", e)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._poll, name='pregenerated-refresh', daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        with self._lock:
+            counts = {period: list(values) for period, values in self._counts.items()}
+        stats = {'entries': len(self._entries), 'loaded_at': self._loaded_at,
+                 'off_peak_window': '%s-%s' % self.window}
+        for period, (lookups, hits) in counts.items():
+            stats[period] = {'lookups': lookups, 'hits': hits,
+                             'coverage': round(hits / lookups, 4) if lookups else 0.0}
+        return stats
+
+
+class PregenerationJob:
+    """Generates and stores recommendations for the most requested profiles during off-peak hours
+
+    generate is the app's generate_content(prompt, endpoint, priority). Calls
+    go in the scheduler's batch class, so they only use quota that
+    interactive requests leave free.
+    """
+
+    def __init__(self, get_connection, generate, get_branch_data, store, limit=500, goals_per_combination=3,
+                 min_count=3, lookback_days=30, max_age_days=7, rate=0.5, max_calls=None,
+                 compression='zstd', interval=900):
+        self.get_connection = get_connection
+        self.generate = generate
+        self.get_branch_data = get_branch_data
+        self.store = store
+        self.limit = limit
+        self.goals_per_combination = goals_per_combination
+        self.min_count = min_count
+        self.lookback_days = lookback_days
+        self.max_age_days = max_age_days
+        self.call_spacing = 1.0 / rate if rate > 0 else 0.0
+        self.max_calls = max_calls
+        self.compression = compression
+        self.interval = interval
+        self._next_call = 0.0
+        self._thread = None
+        self._last_run = None
+
+    def mine(self, cursor, now=None):
+        """([profile dict], requests seen): the most frequent profiles, most requested combination first"""
+        since = (now or datetime.now()) - timedelta(days=self.lookback_days)
+        cursor.execute(
+            "SELECT branch, year, interests, goals FROM recommendations "
+            "WHERE created_at >= %s AND year IS NOT NULL",
+            (since.strftime('%Y-%m-%d %H:%M:%S'),)
+        )
+        combinations = Counter()
+        goal_counts = {}
+        latest = {}
+        total = 0
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            for branch, year, interests, goals in rows:
+                if not (branch and interests and goals):
+                    continue
+                total += 1
+                combination = (normalize_query(branch), normalize_query(year), tuple(canonical_interests(interests)))
+                combinations[combination] += 1
+                goal = canonical_goals(goals)
+                goal_counts.setdefault(combination, Counter())[goal] += 1
+                # The latest wording of a profile is the one sent to Gemini
+                latest[combination, goal] = (branch, year, interests, goals)
+
+        profiles = []
+        for combination, count in combinations.most_common():
+            if count < self.min_count or len(profiles) >= self.limit:
+                break
+            for goal, goal_count in goal_counts[combination].most_common(self.goals_per_combination):
+                if goal_count < self.min_count or len(profiles) >= self.limit:
+                    break
+                branch, year, interests, goals = latest[combination, goal]
+                profiles.append({
+                    'key': profile_hash(branch, year, interests, goals), 'branch': branch, 'year': year,
+                    'interests': interests, 'goals': goals, 'count': goal_count
+                })
+        return profiles, total
+
+    def fresh_keys(self, cursor, now=None):
+        cutoff = (now or datetime.now()) - timedelta(days=self.max_age_days)
+        cursor.execute(f"SELECT profile_hash FROM {TABLE} WHERE generated_at >= %s",
+                       (cutoff.strftime('%Y-%m-%d %H:%M:%S'),))
+        return {row[0] for row in cursor.fetchall()}
+
+    def _generate(self, profile):
+        branch, year, interests, goals = profile['branch'], profile['year'], profile['interests'], profile['goals']
+        electives, clubs, internships = self.get_branch_data(branch, interests, goals)
+        prompt = build_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships)
+        # Calls are made one at a time, so spacing them out is all the throttling needed
+        wait = self._next_call - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._next_call = time.monotonic() + self.call_spacing
+        return self.generate(prompt, 'recommendations', priority=BATCH).text
+
+    def run_once(self, ignore_window=False, max_calls=None):
+        """Generate missing and stale entries while the window lasts; returns counts and coverage
+
+        historical_coverage is the share of the mined requests whose profile now
+        has a fresh entry, an estimate of the coverage the next peak will see.
+        """
+        started = time.monotonic()
+        max_calls = max_calls if max_calls is not None else self.max_calls
+        stats = {'candidates': 0, 'fresh': 0, 'generated': 0, 'errors': 0, 'requests_mined': 0,
+                 'historical_coverage': 0.0, 'stopped': None, 'skipped': False}
+        if not ignore_window and not in_window(self.store.window):
+            stats['skipped'] = True
+            return stats
+        conn = self.get_connection()
+        if not conn:
+            raise ConnectionError("Database not available")
+        try:
+            cursor = conn.cursor()
+            if not try_named_lock(conn, cursor, LOCK_NAME):
+                logger.info("Pregeneration already running elsewhere, skipping")
+                stats['skipped'] = True
+                return stats
+            try:
+                profiles, stats['requests_mined'] = self.mine(cursor)
+                fresh = self.fresh_keys(cursor)
+                stats['candidates'] = len(profiles)
+                stats['fresh'] = sum(profile['key'] in fresh for profile in profiles)
+                consecutive_errors = 0
+                for profile in profiles:
+                    if profile['key'] in fresh:
+                        continue
+                    if not ignore_window and not in_window(self.store.window):
+                        stats['stopped'] = 'window_closed'
+                        break
+                    if max_calls is not None and stats['generated'] + stats['errors'] >= max_calls:
+                        stats['stopped'] = 'max_calls'
+                        break
+                    try:
+                        recommendation = self._generate(profile)
+                    except Exception as e:
+                        logger.error("Gemini API error in pregeneration: %s", e)
+                        stats['errors'] += 1
+                        consecutive_errors += 1
+                        if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                            stats['stopped'] = 'errors'
+                            break
+                        continue
+                    consecutive_errors = 0
+                    stored = compress_text(recommendation, self.compression)
+                    cursor.execute(UPSERT_SQL, (
+                        profile['key'], profile['branch'], profile['year'], profile['interests'], profile['goals'],
+                        stored, profile['count'], datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    ))
+                    # Committed one at a time, so an interrupted run loses at most one call
+                    conn.commit()
+                    self.store.add(profile['key'], stored)
+                    fresh.add(profile['key'])
+                    stats['generated'] += 1
+                covered = sum(profile['count'] for profile in profiles if profile['key'] in fresh)
+                if stats['requests_mined']:
+                    stats['historical_coverage'] = round(covered / stats['requests_mined'], 4)
+            finally:
+                release_named_lock(conn, cursor, LOCK_NAME)
+                cursor.close()
+        finally:
+            conn.close()
+
+        stats['seconds'] = round(time.monotonic() - started, 3)
+        self._last_run = dict(stats, finished_at=datetime.now().isoformat(timespec='seconds'))
+        logger.info("Pregeneration run generated %s of %s profiles (%s errors, historical coverage %s)",
+                    stats['generated'], stats['candidates'], stats['errors'], stats['historical_coverage'])
+        return stats
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not in_window(self.store.window):
+                continue
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Recommendation pregeneration run failed: %s", e)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='recommendation-pregeneration', daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        return {'limit': self.limit, 'interval_s': self.interval, 'last_run': self._last_run}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pregenerate recommendations for the most requested profiles')
+    parser.add_argument('--limit', type=int, help='profiles to keep pregenerated (default PREGEN_LIMIT or 500)')
+    parser.add_argument('--max-calls', type=int, help='Gemini calls allowed in this run')
+    parser.add_argument('--ignore-window', action='store_true', help='run outside PREGEN_WINDOW as well')
+    args = parser.parse_args(argv)
+
+    # Importing the app connects to MySQL and configures Gemini
+    import app
+    import services
+
+    if not app.model:
+        print("Gemini API is not configured", file=sys.stderr)
+        return 1
+    app.branch_catalog.load(force=True)
+    job = services.build_pregeneration_job(
+        app.get_db_connection, app.generate_content, app.get_branch_data, app.pregenerated_store, start=False
+    )
+    if args.limit:
+        job.limit = args.limit
+    print(json.dumps(job.run_once(ignore_window=args.ignore_window, max_calls=args.max_calls)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+SUGGESTION_MARKERS = ('-', '•', '*')
+
+
+def build_suggestion_prompt(query):
+    """Build the Gemini prompt for career goal suggestions"""
+    return f"""
+    Generate 5 concise, relevant career goal suggestions for a college student interested in: '{query}'.
+    Focus on realistic, achievable career paths and professional development goals.
+    Return only a simple list format without any extra formatting or explanations.
+    Example format:
+    - Become a data scientist at a tech company
+    - Start a fintech startup
+    - Pursue PhD in machine learning
+    - Work as AI consultant for Fortune 500
+    - Lead data teams at innovative companies
+    """
+
+
+def parse_suggestions(text):
+    """Pull the bulleted suggestions out of a Gemini response; None if there are fewer than three"""
+    suggestions = []
+    for line in text.strip().split('\n'):
+        line = line.strip()
+        if line and line.startswith(SUGGESTION_MARKERS):
+            suggestion = line[1:].strip()
+            if suggestion:
+                suggestions.append(suggestion)
+    if len(suggestions) < 3:
+        return None
+    return suggestions[:5]
+
+
+# Sent once per model as its system instruction; only the compact profile below changes per request
+RECOMMENDATION_SYSTEM_INSTRUCTION = """You are an expert college academic advisor. Each message gives a student's profile and the electives, clubs and internships available in their branch, best matches first. Write personalized recommendations in exactly this markdown format, filling every [bracket] with advice specific to the student's interests and career goals:
+
+# 🎓 Personalized Academic & Career Recommendations
+
+## 📋 Your Profile Summary
+[Brief analysis of the profile and how the interests align with the career goals]
+
+## 🎓 Recommended Electives (Top 3)
+
+For each of the first three electives listed, or your best suggestion if fewer are listed:
+
+### [n]. [Elective name]
+**Why This Perfectly Fits You:** [Specific connection to their interests and goals]
+**Key Benefits:**
+• [Specific skill development]
+• [Career advantages]
+• [Industry relevance]
+**Prerequisites:** [Prerequisites as listed]
+**Career Impact:** [How this directly helps achieve their goals]
+
+## 🏛️ Recommended Club
+
+### [First club listed]
+**Perfect Match Because:** [Why this club aligns with their profile]
+**What You'll Gain:**
+• [Networking opportunities]
+• [Skill development activities]
+• [Leadership experiences]
+• [Industry connections]
+
+## 💼 Recommended Internship Path
+
+### [First internship listed]
+**Ideal Match Because:** [Connection to interests and goals]
+**Experience You'll Gain:**
+• [Hands-on technical experience]
+• [Industry exposure]
+• [Professional skills]
+• [Network building]
+**Skills to Develop First:** [Skills as listed]
+**Application Strategy:** [Specific advice for securing this internship]
+
+## 🎯 Personalized Action Plan
+
+**Immediate Steps (Next 4 weeks):** three numbered, specific actions
+**Short-term Goals (3-6 months):** three numbered goals with timelines
+**Long-term Vision (1-2 years):** a major milestone, a career positioning goal and an expertise target
+
+## 📈 Success Strategies
+
+**Skill Development Priority:** [Top 3 skills to focus on]
+**Networking Approach:** [Networking strategies for their field]
+**Portfolio Building:** [What to include in their portfolio]
+
+Be actionable and practical."""
+
+
+def build_recommendation_prompt(branch, year, interests, goals, electives, clubs, internships):
+    """Compact per-request profile sent with RECOMMENDATION_SYSTEM_INSTRUCTION"""
+    lines = [
+        f"Branch: {branch}",
+        f"Year: {year}",
+        f"Interests: {interests}",
+        f"Career goals: {goals}",
+        "Electives (name | prerequisites):"
+    ]
+    lines += [f"- {name} | {prerequisites}" for name, prerequisites, *_ in electives[:3]]
+    lines.append("Club:")
+    lines += [f"- {name}" for name, *_ in clubs[:1]]
+    lines.append("Internship (name | skills):")
+    lines += [f"- {name} | {skills}" for name, skills, *_ in internships[:1]]
+    return '\n'.join(lines)
@@ -0,0 +1,164 @@
+"""Local relevance ranking of catalog items against a student's interests and goals
+
+Each section (electives, clubs, internships) of each branch is held as a
+sparse hashed TF-IDF matrix in compressed-column form: for every hashed term,
+the items containing it and their L2-normalized weights, heaviest first and
+capped at MAX_POSTINGS. Scoring a profile is one sparse matrix-vector product
+over the postings of the query's terms followed by a partial sort for the
+top k, so its cost depends on the query, not on the size of the catalog.
+
+On a catalog reload only sections whose items changed are rebuilt, and only
+items not seen before are tokenized.
+
+NumPy is optional; without it items keep their catalog order.
+"""
+import array
+import logging
+import re
+
+from cache import STOPWORDS
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Items per section that reach the prompt and the fallback templates
+TOP_K = (3, 1, 1)
+# Postings kept per term; very common terms only score their best-matching items
+MAX_POSTINGS = 512
+HASH_BITS = 24
+_MASK = (1 << HASH_BITS) - 1
+_WORD = re.compile(r'[a-z0-9+#]+')
+
+
+def terms(text):
+    """Hashed unigram and bigram ids of the content words in text, as int32 bytes
+
+    Uses the built-in string hash, so ids are only comparable within one process.
+    """
+    hashes = [hash(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+    grams = [h & _MASK for h in hashes] + [(a * 1000003 ^ b) & _MASK for a, b in zip(hashes, hashes[1:])]
+    return array.array('i', grams).tobytes()
+
+
+def item_text(item):
+    # The name counts twice; it is the most specific field
+    return ' '.join((item[0],) + tuple(item))
+
+
+class SectionMatrix:
+    """Hashed TF-IDF matrix for one section of one branch, stored column by column"""
+
+    def __init__(self, items, tokens):
+        self.items = items
+        self._top = {}
+        lengths = np.fromiter((len(tokens[item]) // 4 for item in items), dtype=np.int64, count=len(items))
+        ids = np.frombuffer(b''.join(tokens[item] for item in items), dtype=np.int32).astype(np.int64)
+        rows = np.repeat(np.arange(len(items), dtype=np.int64), lengths)
+
+        # Term frequency per (item, term) pair, then document frequency per term
+        pairs, tf = np.unique((rows << HASH_BITS) | ids, return_counts=True)
+        rows, ids = pairs >> HASH_BITS, pairs & _MASK
+        self.term_ids, columns, df = np.unique(ids, return_inverse=True, return_counts=True)
+        self.idf = (np.log((1 + len(items)) / (1 + df)) + 1).astype(np.float32)
+        weights = tf * self.idf[columns]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(items)))
+        weights = weights / np.maximum(norms[rows], 1e-12)
+
+        # Column by column, heaviest first, each column cut to MAX_POSTINGS
+        order = np.lexsort((-weights, columns))
+        starts = np.cumsum(df) - df
+        keep = order[np.arange(len(order)) - np.repeat(starts, df) < MAX_POSTINGS]
+        self.rows, self.weights = rows[keep].astype(np.int32), weights[keep].astype(np.float32)
+        self.term_indptr = np.concatenate(([0], np.cumsum(np.minimum(df, MAX_POSTINGS))))
+
+    def _selection(self, indices):
+        # Identical selections share one tuple instead of building one per request
+        key = tuple(indices)
+        selected = self._top.get(key)
+        if selected is None:
+            if len(self._top) >= 4096:
+                self._top.clear()
+            selected = self._top[key] = tuple(self.items[i] for i in key)
+        return selected
+
+    def top(self, query_ids, query_counts, k):
+        """The k best-scoring items, best first; ties and unmatched items keep catalog order"""
+        n = len(self.items)
+        k = min(k, n)
+        matched = np.zeros(0, np.int64)
+        if n > 1 and len(self.term_ids) and len(query_ids):
+            positions = np.minimum(np.searchsorted(self.term_ids, query_ids), len(self.term_ids) - 1)
+            found = self.term_ids[positions] == query_ids
+            positions = positions[found]
+            if len(positions):
+                query_weights = query_counts[found] * self.idf[positions]
+                starts = self.term_indptr[positions]
+                lengths = self.term_indptr[positions + 1] - starts
+                # Gather every posting of the query's terms at once
+                offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+                matched, inverse = np.unique(self.rows[offsets], return_inverse=True)
+                scores = np.bincount(inverse, weights=self.weights[offsets] * np.repeat(query_weights, lengths))
+                if len(matched) > k:
+                    best = np.argpartition(-scores, k - 1)[:k]
+                    matched, scores = matched[best], scores[best]
+                matched = matched[np.lexsort((matched, -scores))]
+        order = matched.tolist()
+        if len(order) < k:
+            chosen = set(order)
+            order += [i for i in range(2 * k) if i not in chosen][:k - len(order)]
+        return self._selection(order)
+
+
+class CatalogRanker:
+    """Ranks each section of a branch's catalog against a student profile"""
+
+    def __init__(self, matrices, tokens):
+        self._matrices = matrices
+        self._tokens = tokens
+
+    @classmethod
+    def build(cls, index, previous=None):
+        """Build from a BranchCatalog index, reusing unchanged sections and item tokens from previous"""
+        old_matrices = previous._matrices if previous is not None else {}
+        old_tokens = previous._tokens if previous is not None else {}
+        matrices = {}
+        tokens = {}
+        rebuilt = 0
+        for branch, sections in index.items():
+            for position, items in enumerate(sections):
+                for item in items:
+                    if item not in tokens:
+                        tokens[item] = old_tokens.get(item) or terms(item_text(item))
+                old = old_matrices.get((branch, position))
+                if old is not None and old.items == items:
+                    old.items = items
+                    matrices[(branch, position)] = old
+                    continue
+                matrices[(branch, position)] = SectionMatrix(items, tokens)
+                rebuilt += 1
+        logger.info("Catalog ranker built: %s items, %s of %s sections rebuilt", len(tokens), rebuilt, len(matrices))
+        return cls(matrices, tokens)
+
+    def rank(self, branch, sections, interests, goals):
+        """(electives, clubs, internships) cut to TOP_K, most relevant first
+
+        Sections this ranker was not built from are returned unchanged.
+        """
+        query_ids, query_counts = np.unique(
+            np.frombuffer(terms(f"{interests} {goals}"), dtype=np.int32).astype(np.int64), return_counts=True
+        )
+        ranked = []
+        for position, items in enumerate(sections):
+            matrix = self._matrices.get((branch, position))
+            if matrix is None or matrix.items is not items:
+                ranked.append(items)
+                continue
+            ranked.append(matrix.top(query_ids, query_counts, TOP_K[position]))
+        return tuple(ranked)
+
+    def stats(self):
+        return {'items': len(self._tokens), 'postings': sum(len(m.rows) for m in self._matrices.values())}
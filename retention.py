@@ -0,0 +1,318 @@
+"""Monthly partitions for the recommendations table and a retention job that archives old rows
+
+The table is range-partitioned on UNIX_TIMESTAMP(created_at), one partition
+per calendar month plus a catch-all pmax. The retention job keeps upcoming
+months split out of pmax, then writes every partition that ended before the
+retention cutoff to a gzipped JSONL file and drops it. Tables that are not
+partitioned, such as installs created before partitioning or the SQLite
+stand-in, are archived row by row with batched deletes instead.
+
+Run it standalone from cron:
+
+    python retention.py --days 90 --archive-dir /var/lib/mentor/archive
+    python retention.py --partition      # one-off conversion of an existing table
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from compression import decompress_text
+from dbpool import release_named_lock, try_named_lock
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'recommendations'
+ARCHIVE_COLUMNS = (
+    'id', 'session_id', 'branch', 'year', 'interests', 'goals', 'recommendation', 'summary', 'source', 'created_at'
+)
+# Only one worker across the deployment runs the job at a time
+LOCK_NAME = 'mentor_recommendation_retention'
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+def partition_definition(month):
+    """Partition holding rows created in the given month"""
+    return (f"PARTITION {partition_name(month)} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{next_month(month).isoformat()} 00:00:00'))")
+
+
+def partition_clause(first_month, months_ahead=3, today=None):
+    """PARTITION BY clause with monthly partitions from first_month through months_ahead past today"""
+    month = month_start(first_month)
+    last = month_start(today or date.today())
+    for _ in range(months_ahead):
+        last = next_month(last)
+    definitions = []
+    while month <= last:
+        definitions.append(partition_definition(month))
+        month = next_month(month)
+    definitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (\n    " + ",\n    ".join(definitions) + "\n)"
+
+
+def list_partitions(cursor):
+    """[(name, upper bound as a unix timestamp or None for MAXVALUE)], empty when not partitioned"""
+    try:
+        cursor.execute(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            (TABLE,)
+        )
+        rows = cursor.fetchall()
+    except Exception:
+        return []
+    partitions = []
+    for name, description in rows:
+        name = name.decode() if isinstance(name, (bytes, bytearray)) else name
+        description = description.decode() if isinstance(description, (bytes, bytearray)) else description
+        partitions.append((name, None if description == 'MAXVALUE' else int(description)))
+    return partitions
+
+
+def _archive_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (bytes, bytearray)):
+        return decompress_text(value)
+    return value
+
+
+def _replace_durably(source, target):
+    """os.replace, then fsync the directory so the new name survives a crash"""
+    os.replace(source, target)
+    fd = os.open(os.path.dirname(os.path.abspath(target)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class RetentionJob:
+    """Archives recommendations older than retain_days to gzipped JSONL and removes them"""
+
+    def __init__(self, get_connection, archive_dir, retain_days=90, batch_size=2000,
+                 months_ahead=3, interval=86400):
+        self.get_connection = get_connection
+        self.archive_dir = archive_dir
+        self.retain_days = retain_days
+        self.batch_size = batch_size
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self._thread = None
+        self._last_run = None
+
+    def cutoff(self, now=None):
+        return (now or datetime.now()) - timedelta(days=self.retain_days)
+
+    def ensure_partitions(self, cursor, partitions):
+        """Split months up to months_ahead out of pmax so new rows never land there"""
+        bounded = [bound for _, bound in partitions if bound is not None]
+        if not bounded or partitions[-1][1] is not None:
+            return 0
+        month = month_start(datetime.fromtimestamp(max(bounded)).date())
+        last = month_start(date.today())
+        for _ in range(self.months_ahead):
+            last = next_month(last)
+        definitions = []
+        while month <= last:
+            definitions.append(partition_definition(month))
+            month = next_month(month)
+        if definitions:
+            cursor.execute(
+                f"ALTER TABLE {TABLE} REORGANIZE PARTITION pmax INTO "
+                f"({', '.join(definitions)}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+            )
+            logger.info("Added %s monthly partitions to %s", len(definitions), TABLE)
+        return len(definitions)
+
+    def _archive_path(self, label):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        return os.path.join(self.archive_dir, f"{TABLE}-{label}.jsonl.gz")
+
+    def _copy_rows(self, cursor, out, condition, params, last_id, partition=None):
+        """Write the next batch of matching rows to out in id order and return them"""
+        source = f"{TABLE} PARTITION ({partition})" if partition else TABLE
+        cursor.execute(
+            f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM {source} WHERE {condition} id > %s ORDER BY id LIMIT %s",
+            tuple(params) + (last_id, self.batch_size)
+        )
+        rows = cursor.fetchall()
+        for row in rows:
+            out.write(json.dumps(dict(zip(ARCHIVE_COLUMNS, map(_archive_value, row)))) + '\n')
+        return rows
+
+    def _archive_partition(self, conn, cursor, name):
+        path = self._archive_path(name)
+        count = 0
+        last_id = 0
+        with open(path + '.tmp', 'wb') as raw:
+            with gzip.open(raw, 'wt', encoding='utf-8') as out:
+                while True:
+                    rows = self._copy_rows(cursor, out, '', (), last_id, partition=name)
+                    if not rows:
+                        break
+                    count += len(rows)
+                    last_id = rows[-1][0]
+            # The gzip trailer is written on close; sync the whole file before it is renamed
+            raw.flush()
+            os.fsync(raw.fileno())
+        _replace_durably(path + '.tmp', path)
+        # Only drop once the archive and its name are safely on disk
+        cursor.execute(f"ALTER TABLE {TABLE} DROP PARTITION {name}")
+        conn.commit()
+        logger.info("Archived %s rows from partition %s to %s", count, name, path)
+        return count
+
+    def _archive_rows(self, conn, cursor, cutoff):
+        """Batch-archive and delete rows older than cutoff from an unpartitioned table"""
+        path = self._archive_path(f"before-{cutoff:%Y%m%d}-{int(time.time())}")
+        count = 0
+        last_id = 0
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as out:
+            while True:
+                rows = self._copy_rows(cursor, out, "created_at < %s AND", (cutoff,), last_id)
+                if not rows:
+                    break
+                # Rows must be on disk before they are deleted
+                out.flush()
+                os.fsync(out.fileno())
+                ids = [row[0] for row in rows]
+                cursor.execute(
+                    f"DELETE FROM {TABLE} WHERE id IN ({', '.join(['%s'] * len(ids))})", tuple(ids)
+                )
+                conn.commit()
+                count += len(rows)
+                last_id = ids[-1]
+        if count:
+            _replace_durably(path + '.tmp', path)
+            logger.info("Archived %s rows older than %s to %s", count, cutoff, path)
+        else:
+            os.remove(path + '.tmp')
+        return count
+
+    def run_once(self, now=None):
+        """Archive everything past the cutoff; returns counts and rows archived per second"""
+        started = time.monotonic()
+        stats = {'rows_archived': 0, 'partitions_dropped': 0, 'partitions_added': 0, 'mode': None, 'skipped': False}
+        conn = self.get_connection()
+        if not conn:
+            raise ConnectionError("Database not available")
+        try:
+            cursor = conn.cursor()
+            if not try_named_lock(conn, cursor, LOCK_NAME):
+                logger.info("Retention job already running elsewhere, skipping")
+                stats['skipped'] = True
+                return stats
+            try:
+                partitions = list_partitions(cursor)
+                cutoff = self.cutoff(now)
+                if partitions:
+                    stats['mode'] = 'partitions'
+                    stats['partitions_added'] = self.ensure_partitions(cursor, partitions)
+                    cutoff_ts = cutoff.timestamp()
+                    for name, bound in partitions:
+                        if bound is not None and bound <= cutoff_ts:
+                            stats['rows_archived'] += self._archive_partition(conn, cursor, name)
+                            stats['partitions_dropped'] += 1
+                else:
+                    stats['mode'] = 'rows'
+                    stats['rows_archived'] = self._archive_rows(conn, cursor, cutoff)
+            finally:
+                release_named_lock(conn, cursor, LOCK_NAME)
+                cursor.close()
+        finally:
+            conn.close()
+
+        elapsed = time.monotonic() - started
+        stats['seconds'] = round(elapsed, 3)
+        stats['rows_per_second'] = round(stats['rows_archived'] / elapsed, 1) if elapsed else None
+        self._last_run = dict(stats, finished_at=datetime.now().isoformat(timespec='seconds'))
+        logger.info("Retention run archived %s rows (%s rows/s)", stats['rows_archived'], stats['rows_per_second'])
+        return stats
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Recommendation retention run failed: %s", e)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='recommendation-retention', daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        return {'retain_days': self.retain_days, 'interval_s': self.interval, 'last_run': self._last_run}
+
+
+def partition_existing_table(get_connection, months_ahead=3):
+    """Convert an unpartitioned recommendations table in place; rebuilds the table once"""
+    conn = get_connection()
+    if not conn:
+        raise ConnectionError("Database not available")
+    try:
+        cursor = conn.cursor()
+        if list_partitions(cursor):
+            logger.info("%s is already partitioned", TABLE)
+            return False
+        cursor.execute(f"SELECT MIN(created_at) FROM {TABLE}")
+        oldest = cursor.fetchone()[0] or datetime.now()
+        # MySQL requires the partitioning column in every unique key, the primary key included
+        cursor.execute(
+            f"ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at) "
+            + partition_clause(oldest.date(), months_ahead)
+        )
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    logger.info("Partitioned %s by month from %s", TABLE, oldest.date())
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Archive and drop old recommendations')
+    parser.add_argument('--days', type=int, default=int(os.getenv('RETENTION_DAYS') or 0) or 90,
+                        help='keep this many days of recommendations (default RETENTION_DAYS or 90)')
+    parser.add_argument('--archive-dir', default=os.getenv('RETENTION_ARCHIVE_DIR', 'archive'))
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--partition', action='store_true', help='partition an existing table by month and exit')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    import mysql.connector
+    import services
+
+    def get_connection():
+        return mysql.connector.connect(**services.mysql_config())
+
+    if args.partition:
+        partition_existing_table(get_connection)
+        return 0
+    job = RetentionJob(get_connection, args.archive_dir, retain_days=args.days, batch_size=args.batch_size)
+    print(json.dumps(job.run_once()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import threading
+import time
+
+from prompts import RECOMMENDATION_SYSTEM_INSTRUCTION
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+AUTOCOMPLETE = 'autocomplete'
+BATCH = 'batch'
+
+# Lower number wins when several classes are waiting
+PRIORITIES = {INTERACTIVE: 0, AUTOCOMPLETE: 1, BATCH: 2}
+
+# Default class for each generate_content endpoint
+ENDPOINT_PRIORITIES = {'recommendations': INTERACTIVE, 'suggestions': AUTOCOMPLETE}
+
+# Rough output size per endpoint, reserved up front and corrected from usage metadata
+EXPECTED_OUTPUT_TOKENS = {'recommendations': 2000, 'suggestions': 150}
+
+# System instruction tokens billed with every call besides the prompt itself
+INSTRUCTION_TOKENS = {'recommendations': len(RECOMMENDATION_SYSTEM_INSTRUCTION) // 4}
+
+
+class QuotaExceeded(Exception):
+    """Raised when a Gemini call cannot be admitted within its queue deadline"""
+
+
+def estimate_tokens(prompt, endpoint):
+    """Prompt and instruction tokens at roughly four characters each plus the expected output"""
+    return len(prompt) // 4 + INSTRUCTION_TOKENS.get(endpoint, 0) + EXPECTED_OUTPUT_TOKENS.get(endpoint, 500)
+
+
+def is_rate_limited(error):
+    """True for a 429 / RESOURCE_EXHAUSTED error from the Gemini API"""
+    return getattr(error, 'code', None) == 429 or type(error).__name__ == 'ResourceExhausted'
+
+
+class TokenBucket:
+    """Refills at rate units per second up to capacity; the level may go negative after a correction"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, amount, floor):
+        """Seconds until amount can be taken while leaving floor in the bucket"""
+        missing = amount + floor - self.level
+        return max(0.0, missing / self.rate) if self.rate else float('inf')
+
+
+class Ticket:
+    def __init__(self, priority, tokens):
+        self.priority = priority
+        self.tokens = tokens
+
+
+class GeminiScheduler:
+    """Admits Gemini calls against per-minute request and token quotas
+
+    Two token buckets track requests and (estimated) tokens. Each priority
+    class may only draw a bucket down to its reserve, a fraction of capacity
+    kept for the classes above it, so batch work is shed first, then
+    autocomplete, and interactive recommendations get whatever quota is left.
+    While a higher class is waiting, lower classes are not admitted at all.
+
+    A caller that cannot be admitted within its class's queue deadline gets
+    QuotaExceeded and is expected to fall back. Token estimates are corrected
+    with the real usage once the call returns; a 429 from upstream empties the
+    request bucket so everyone backs off until it refills.
+
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, rpm=0, tpm=0, burst_seconds=10.0, reserves=None, max_wait=None):
+        self.reserves = reserves or {INTERACTIVE: 0.0, AUTOCOMPLETE: 0.2, BATCH: 0.5}
+        self.buckets = {}
+        if rpm > 0:
+            # Big enough that every class can take a whole request above its reserve
+            floor = 1.0 / (1.0 - max(self.reserves.values()))
+            self.buckets['requests'] = TokenBucket(rpm / 60.0, max(floor, rpm / 60.0 * burst_seconds))
+        if tpm > 0:
+            self.buckets['tokens'] = TokenBucket(tpm / 60.0, tpm / 60.0 * burst_seconds)
+        self.max_wait = max_wait or {INTERACTIVE: 5.0, AUTOCOMPLETE: 0.5, BATCH: 30.0}
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        self._cond = threading.Condition()
+        self._stats = {
+            priority: {'admitted': 0, 'shed': 0, 'queued': 0, 'wait_s_total': 0.0, 'wait_s_max': 0.0}
+            for priority in PRIORITIES
+        }
+        self._stats_extra = {'rate_limited': 0, 'token_corrections': 0}
+
+    @property
+    def enabled(self):
+        return bool(self.buckets)
+
+    def _outranked(self, priority):
+        rank = PRIORITIES[priority]
+        return any(count for other, count in self._waiting.items() if PRIORITIES[other] < rank)
+
+    def _try_take(self, priority, tokens):
+        """Take from the buckets and return 0, or return seconds to wait; caller holds the lock"""
+        now = time.monotonic()
+        amounts = {'requests': 1, 'tokens': tokens}
+        if 'tokens' in self.buckets:
+            # A prompt larger than the burst allowance still gets through once the bucket is full
+            amounts['tokens'] = min(tokens, self.buckets['tokens'].capacity * (1 - self.reserves[priority]))
+        wait = 0.0
+        for name, bucket in self.buckets.items():
+            bucket.refill(now)
+            wait = max(wait, bucket.wait_for(amounts[name], bucket.capacity * self.reserves[priority]))
+        if wait or self._outranked(priority):
+            return wait or 0.05
+        for name, bucket in self.buckets.items():
+            bucket.level -= amounts[name]
+        return 0.0
+
+    def _admitted(self, priority, waited):
+        stats = self._stats[priority]
+        stats['admitted'] += 1
+        stats['wait_s_total'] += waited
+        stats['wait_s_max'] = max(stats['wait_s_max'], waited)
+
+    def _shed(self, priority, tokens, waited):
+        self._stats[priority]['shed'] += 1
+        raise QuotaExceeded(f"No Gemini quota for a {priority} call of ~{tokens} tokens "
+                            f"within its queue deadline; shed after {waited:.2f}s")
+
+    def acquire(self, priority, tokens, max_wait=None):
+        """Block until the call is admitted and return a Ticket, or raise QuotaExceeded"""
+        if not self.enabled:
+            return Ticket(priority, tokens)
+        max_wait = self.max_wait[priority] if max_wait is None else max_wait
+        start = time.monotonic()
+        with self._cond:
+            wait = self._try_take(priority, tokens)
+            if wait:
+                self._waiting[priority] += 1
+                self._stats[priority]['queued'] += 1
+                try:
+                    while wait:
+                        remaining = start + max_wait - time.monotonic()
+                        # Shed now rather than queue for quota that cannot arrive in time
+                        if wait > remaining:
+                            self._shed(priority, tokens, time.monotonic() - start)
+                        self._cond.wait(wait)
+                        wait = self._try_take(priority, tokens)
+                finally:
+                    self._waiting[priority] -= 1
+                    self._cond.notify_all()
+            self._admitted(priority, time.monotonic() - start)
+        return Ticket(priority, tokens)
+
+    async def acquire_async(self, priority, tokens, max_wait=None):
+        """acquire() for coroutines; waits with asyncio.sleep instead of blocking the loop"""
+        if not self.enabled:
+            return Ticket(priority, tokens)
+        max_wait = self.max_wait[priority] if max_wait is None else max_wait
+        start = time.monotonic()
+        with self._cond:
+            wait = self._try_take(priority, tokens)
+            queued = bool(wait)
+            if queued:
+                self._waiting[priority] += 1
+                self._stats[priority]['queued'] += 1
+        try:
+            while wait:
+                remaining = start + max_wait - time.monotonic()
+                if wait > remaining:
+                    with self._cond:
+                        self._shed(priority, tokens, time.monotonic() - start)
+                await asyncio.sleep(wait)
+                with self._cond:
+                    wait = self._try_take(priority, tokens)
+        finally:
+            if queued:
+                with self._cond:
+                    self._waiting[priority] -= 1
+                    self._cond.notify_all()
+        with self._cond:
+            self._admitted(priority, time.monotonic() - start)
+        return Ticket(priority, tokens)
+
+    def settle(self, ticket, used_tokens=None, called=True):
+        """Correct the token estimate with real usage, or refund a call that never went upstream"""
+        if not self.enabled:
+            return
+        with self._cond:
+            if not called:
+                for name, bucket in self.buckets.items():
+                    bucket.level = min(bucket.capacity, bucket.level + (1 if name == 'requests' else ticket.tokens))
+            elif used_tokens and 'tokens' in self.buckets:
+                self.buckets['tokens'].level += ticket.tokens - used_tokens
+                self._stats_extra['token_corrections'] += 1
+            self._cond.notify_all()
+
+    def rate_limited(self):
+        """Upstream returned 429: stop admitting until the request bucket refills"""
+        with self._cond:
+            self._stats_extra['rate_limited'] += 1
+            bucket = self.buckets.get('requests')
+            if bucket:
+                bucket.level = min(bucket.level, 0.0)
+        logger.warning("Gemini returned 429; pausing admissions until the quota refills")
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            buckets = {}
+            for name, bucket in self.buckets.items():
+                bucket.refill(now)
+                buckets[name] = {'level': round(bucket.level, 1), 'capacity': round(bucket.capacity, 1),
+                                 'per_second': round(bucket.rate, 3)}
+            classes = {}
+            for priority, stats in self._stats.items():
+                stats = dict(stats)
+                stats['waiting'] = self._waiting[priority]
+                stats['wait_s_mean'] = round(stats['wait_s_total'] / stats['admitted'], 4) if stats['admitted'] else 0.0
+                stats['wait_s_total'] = round(stats['wait_s_total'], 3)
+                stats['wait_s_max'] = round(stats['wait_s_max'], 3)
+                classes[priority] = stats
+            return dict(self._stats_extra, enabled=self.enabled, buckets=buckets, classes=classes)
+
+
+def used_tokens(response):
+    """Prompt plus output tokens from a Gemini response's usage metadata, if present"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return None
+    return (getattr(usage, 'prompt_token_count', 0) or 0) + (getattr(usage, 'candidates_token_count', 0) or 0) or None
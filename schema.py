@@ -0,0 +1,217 @@
+"""Table definitions and upgrades, run once per deploy rather than by every worker
+
+    python schema.py                   # create or upgrade the tables, exit status 1 on failure
+    python schema.py --dedupe-catalog  # also delete duplicate (branch, name) catalog rows, keeping the oldest
+
+gunicorn.conf.py runs the same step once in the master before workers start.
+It never deletes rows: a catalog table with duplicate (branch, name) rows
+fails the migration, listing them, until they are fixed or --dedupe-catalog
+is run.
+"""
+import argparse
+import logging
+import sys
+from datetime import date
+
+import mysql.connector
+from mysql.connector import Error
+
+from retention import partition_clause
+from services import mysql_config
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TABLES = ('electives', 'clubs', 'internships')
+
+# Duplicate natural keys listed in the error when a migration stops on them
+DUPLICATES_SHOWN = 20
+
+
+class DuplicateNaturalKeys(Exception):
+    """A catalog table has duplicate (branch, name) rows, so its unique key cannot be added"""
+
+
+def column_type(cursor, table, column):
+    """Lowercased MySQL data type of a column, or None where information_schema is unavailable"""
+    try:
+        cursor.execute(
+            "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+            (table, column)
+        )
+        row = cursor.fetchone()
+    except Error:
+        return None
+    if not row:
+        return None
+    value = row[0]
+    return (value.decode() if isinstance(value, (bytes, bytearray)) else value).lower()
+
+
+def add_natural_key(conn, cursor, table, dedupe=False):
+    """Unique (branch, name) index that catalog ingestion upserts against
+
+    Duplicate rows left by manual inserts raise DuplicateNaturalKeys listing
+    them, unless dedupe is set, which deletes all but the oldest of each.
+    """
+    index_sql = f"CREATE UNIQUE INDEX uq_{table}_branch_name ON {table} (branch, name)"
+    try:
+        cursor.execute(index_sql)
+        return
+    except Error as e:
+        if e.errno == 1061:  # already there
+            return
+        if e.errno != 1062:  # duplicate entry
+            raise
+    if not dedupe:
+        cursor.execute(
+            f"SELECT branch, name, COUNT(*) FROM {table} GROUP BY branch, name HAVING COUNT(*) > 1 "
+            f"ORDER BY COUNT(*) DESC, branch, name LIMIT {DUPLICATES_SHOWN + 1}"
+        )
+        rows = cursor.fetchall()
+        listed = '; '.join(f"{branch!r}/{name!r} x{count}" for branch, name, count in rows[:DUPLICATES_SHOWN])
+        more = ' and more' if len(rows) > DUPLICATES_SHOWN else ''
+        raise DuplicateNaturalKeys(
+            f"{table} has duplicate (branch, name) rows: {listed}{more}. Remove them, or run "
+            f"python schema.py --dedupe-catalog to keep the oldest of each"
+        )
+    cursor.execute(
+        f"DELETE FROM {table} WHERE id NOT IN "
+        f"(SELECT id FROM (SELECT MIN(id) AS id FROM {table} GROUP BY branch, name) AS keep)"
+    )
+    logger.warning("Removed %s duplicate (branch, name) rows from %s", cursor.rowcount, table)
+    conn.commit()
+    cursor.execute(index_sql)
+
+
+def initialize_database(get_connection, dedupe=False):
+    """Initialize database tables if they don't exist; dedupe is passed to add_natural_key"""
+    try:
+        conn = get_connection()
+        if not conn:
+            logger.warning("Database not available - skipping initialization")
+            return False
+        
+        cursor = conn.cursor()
+        
+        # Create tables if they don't exist
+        tables = [
+            '''CREATE TABLE IF NOT EXISTS electives (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                branch VARCHAR(255) NOT NULL,
+                prerequisites TEXT,
+                description TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )''',
+            '''CREATE TABLE IF NOT EXISTS clubs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                branch VARCHAR(255) NOT NULL,
+                description TEXT,
+                activities TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )''',
+            '''CREATE TABLE IF NOT EXISTS internships (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                branch VARCHAR(255) NOT NULL,
+                skills_required TEXT,
+                description TEXT,
+                company_type VARCHAR(255),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )''',
+            # Partitioned by month so the retention job can archive and drop whole months
+            '''CREATE TABLE IF NOT EXISTS recommendations (
+                id INT AUTO_INCREMENT,
+                session_id VARCHAR(255) NOT NULL,
+                branch VARCHAR(255) NOT NULL,
+                year VARCHAR(50),
+                interests TEXT,
+                goals TEXT,
+                recommendation LONGBLOB,
+                summary VARCHAR(500),
+                source VARCHAR(20) NOT NULL DEFAULT 'gemini',
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (id, created_at),
+                INDEX idx_recommendations_session_created (session_id, created_at, id)
+            ) ''' + partition_clause(date.today()),
+            # Keyed by a hash of the canonical profile; see pregenerate.py
+            '''CREATE TABLE IF NOT EXISTS pregenerated_recommendations (
+                profile_hash CHAR(40) NOT NULL PRIMARY KEY,
+                branch VARCHAR(255) NOT NULL,
+                year VARCHAR(50),
+                interests TEXT,
+                goals TEXT,
+                recommendation LONGBLOB,
+                request_count INT NOT NULL DEFAULT 0,
+                generated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )'''
+        ]
+        
+        for table_sql in tables:
+            cursor.execute(table_sql)
+
+        # Columns added after the original schema; ignore "already exists" errors
+        migrations = [
+            "ALTER TABLE recommendations ADD COLUMN year VARCHAR(50) NULL AFTER branch",
+            "ALTER TABLE recommendations ADD COLUMN source VARCHAR(20) NOT NULL DEFAULT 'gemini'",
+            "ALTER TABLE recommendations ADD COLUMN summary VARCHAR(500) NULL AFTER recommendation",
+            "CREATE INDEX idx_recommendations_session_created ON recommendations (session_id, created_at, id)"
+        ] + [
+            # Lets the catalog poll notice rows that were updated in place
+            f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP "
+            "ON UPDATE CURRENT_TIMESTAMP"
+            for table in CATALOG_TABLES
+        ]
+        for migration_sql in migrations:
+            try:
+                cursor.execute(migration_sql)
+            except Error as e:
+                if e.errno not in (1060, 1061):  # duplicate column / duplicate key name
+                    raise
+
+        for table in CATALOG_TABLES:
+            add_natural_key(conn, cursor, table, dedupe=dedupe)
+
+        # Compressed recommendations are binary; existing LONGTEXT rows keep their UTF-8 bytes
+        if column_type(cursor, 'recommendations', 'recommendation') == 'longtext':
+            logger.info("Converting recommendations.recommendation to LONGBLOB")
+            cursor.execute("ALTER TABLE recommendations MODIFY recommendation LONGBLOB")
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        logger.info("Database tables initialized successfully")
+        return True
+        
+    except Exception as e:
+        logger.error("Failed to initialize database: %s", e)
+        return False
+
+
+def migrate(connect_timeout=5, dedupe=False):
+    """initialize_database on a short-lived connection of its own, outside any worker's pool"""
+    def connect():
+        try:
+            return mysql.connector.connect(connection_timeout=connect_timeout, **mysql_config())
+        except Error as e:
+            logger.error("Database connection failed: %s", e)
+            return None
+    return initialize_database(connect, dedupe=dedupe)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create or upgrade the tables')
+    parser.add_argument('--dedupe-catalog', action='store_true',
+                        help='delete duplicate (branch, name) catalog rows, keeping the oldest, before adding the unique key')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    return 0 if migrate(dedupe=args.dedupe_catalog) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,392 @@
+"""Components shared by the WSGI app (app.py) and the ASGI app (async_app.py)
+
+Each builder reads its settings from the environment, so both serving modes
+are tuned by the same variables.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+from breaker import CircuitBreaker, CircuitOpenError
+from cache import SuggestionCache, RecommendationCache, build_shared_backend
+from catalog import BranchCatalog
+from dbpool import ConnectionPool, pool_size_from_env
+from hedging import HedgedModel, ModelTier
+from logpipeline import configure_logging, parse_sample_rates
+from pregenerate import PregeneratedStore, PregenerationJob, parse_window
+from prompts import RECOMMENDATION_SYSTEM_INSTRUCTION
+from retention import RetentionJob
+from scheduler import GeminiScheduler, QuotaExceeded, estimate_tokens, used_tokens, ENDPOINT_PRIORITIES, INTERACTIVE, AUTOCOMPLETE, BATCH
+from suggest import build_suggestion_index, SuggestionIndexSync
+from writer import RecommendationWriter
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+INCOMPLETE_FORM_ERROR = 'Please fill all required fields including selecting at least one interest.'
+RECOMMENDATION_ERROR = 'An error occurred while generating recommendations. Please try again.'
+
+
+def log_rotation():
+    """LOG_ROTATION, or external when several worker processes share the log file
+
+    Size and time rotation happen inside each process on its own view of the
+    file, so workers sharing logs/app.log would rename it out from under each
+    other. gunicorn.conf.py (and uvicorn) export WEB_CONCURRENCY.
+    """
+    rotation = os.getenv('LOG_ROTATION', '').lower()
+    if int(os.getenv('WEB_CONCURRENCY', '1')) <= 1:
+        return rotation or 'size', None
+    if rotation in ('size', 'time'):
+        return 'external', f"LOG_ROTATION={rotation} is only safe in a single process; using external rotation"
+    return rotation or 'external', None
+
+
+def setup_logging():
+    """Queue-backed JSON logging to logs/app.log and the console"""
+    log_dir = os.path.join(BASE_DIR, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    rotation, rotation_warning = log_rotation()
+    log_pipeline = configure_logging(
+        os.path.join(log_dir, 'app.log'),
+        level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO),
+        log_format=os.getenv('LOG_FORMAT', 'json'),
+        rotation=rotation,
+        max_bytes=int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+        backup_count=int(os.getenv('LOG_BACKUP_COUNT', '5')),
+        when=os.getenv('LOG_ROTATE_WHEN', 'midnight'),
+        queue_size=int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+        sample_rates=parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', 'Suggestions generated=0.1'))
+    )
+    atexit.register(log_pipeline.stop)
+    if rotation_warning:
+        logger.warning(rotation_warning)
+    return log_pipeline
+
+
+def gemini_model_names():
+    """GEMINI_MODELS: comma-separated model names, primary first; later ones are hedged in when it is slow"""
+    names = [name.strip() for name in os.getenv('GEMINI_MODELS', 'gemini-2.0-flash-exp').split(',') if name.strip()]
+    return names or ['gemini-2.0-flash-exp']
+
+
+def build_model_tiers(genai, names, **model_kwargs):
+    """A plain GenerativeModel for a single name, otherwise a HedgedModel over one tier per name"""
+    if len(names) == 1:
+        return genai.GenerativeModel(names[0], **model_kwargs)
+    window = int(os.getenv('GEMINI_HEDGE_WINDOW', '200'))
+    return HedgedModel(
+        [ModelTier(name, genai.GenerativeModel(name, **model_kwargs), window=window,
+                   min_samples=int(os.getenv('GEMINI_HEDGE_MIN_SAMPLES', '20'))) for name in names],
+        quantile=float(os.getenv('GEMINI_HEDGE_QUANTILE', '0.9')),
+        min_delay=float(os.getenv('GEMINI_HEDGE_MIN_DELAY', '0.2')),
+        max_hedge_ratio=float(os.getenv('GEMINI_HEDGE_MAX_RATIO', '0.1')),
+        window=window,
+        threads=int(os.getenv('GEMINI_HEDGE_THREADS', '32'))
+    )
+
+
+def build_gemini_models(api_key):
+    """(model, recommendation_model), or (None, None) without a key
+
+    The SDK is imported here rather than at module load; it is the slowest
+    import in the app and only workers need it.
+    """
+    if not api_key:
+        logger.warning("GEMINI_API_KEY not found in environment variables")
+        return None, None
+    try:
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        names = gemini_model_names()
+        model = build_model_tiers(genai, names)
+        # The static recommendation format is sent as a system instruction; prompts carry only the profile
+        recommendation_model = build_model_tiers(genai, names, system_instruction=RECOMMENDATION_SYSTEM_INSTRUCTION)
+        logger.info("Gemini API configured successfully with %s", ', '.join(names))
+        return model, recommendation_model
+    except Exception as e:
+        logger.error("Failed to configure Gemini API: %s", e)
+        return None, None
+
+
+def charge_hedges(model, recommendation_model, gemini_scheduler):
+    """Make each hedged call take quota from the scheduler in its caller's class, skipping it when none is free
+
+    The scheduler admitted the first call already; a hedge is optional, so it
+    never waits for quota. Hedges of batch calls stay behind the batch
+    reserve, and each hedge's ticket is settled with its own usage like the
+    first call's.
+    """
+    def settle(ticket, response=None, called=True):
+        gemini_scheduler.settle(ticket, used_tokens(response) if response is not None else None, called=called)
+
+    for hedged, endpoint in ((model, 'suggestions'), (recommendation_model, 'recommendations')):
+        if not isinstance(hedged, HedgedModel):
+            continue
+
+        def admit(prompt, priority, endpoint=endpoint):
+            try:
+                return gemini_scheduler.acquire(priority or ENDPOINT_PRIORITIES[endpoint],
+                                                estimate_tokens(str(prompt), endpoint), max_wait=0)
+            except QuotaExceeded:
+                return None
+        hedged.admit = admit
+        hedged.settle = settle
+
+
+def hedge_options(gemini, ticket):
+    """generate_content arguments that charge a HedgedModel's hedges to the class of the caller's ticket"""
+    return {'priority': ticket.priority} if isinstance(gemini, HedgedModel) else {}
+
+
+def hedging_stats(model, recommendation_model):
+    """Per-endpoint HedgedModel stats, or None when only one model is configured"""
+    if not isinstance(recommendation_model, HedgedModel):
+        return None
+    return {'suggestions': model.stats(), 'recommendations': recommendation_model.stats()}
+
+
+def mysql_config():
+    return {
+        'host': os.getenv('MYSQL_HOST', 'localhost'),
+        'user': os.getenv('MYSQL_USER', 'root'),
+        'password': os.getenv('MYSQL_PASSWORD', 'root@123'),
+        'database': os.getenv('MYSQL_DB', 'college_mentor')
+    }
+
+
+def build_connection_pool(pool_size=None):
+    """MySQL pool sized from the environment that fails fast while the server is down"""
+    return ConnectionPool(
+        mysql_config(),
+        pool_size=pool_size or pool_size_from_env(),
+        borrow_timeout=float(os.getenv('DB_BORROW_TIMEOUT', '2')),
+        ping_after=float(os.getenv('DB_PING_AFTER', '30')),
+        backoff_max=float(os.getenv('DB_RETRY_MAX', '30')),
+        connect_timeout=int(os.getenv('DB_CONNECT_TIMEOUT', '3'))
+    )
+
+
+def build_branch_catalog(get_connection, load=True):
+    """Catalog loaded now (or by warm_up when load is False) and reloaded in the background when the tables change"""
+    branch_catalog = BranchCatalog(get_connection, refresh_interval=int(os.getenv('CATALOG_REFRESH_INTERVAL', '300')))
+    branch_catalog.start(load=load)
+    return branch_catalog
+
+
+def build_suggestion_cache(get_connection):
+    """In-process LRU plus an optional shared backend (sqlite or mysql)"""
+    return SuggestionCache(
+        maxsize=int(os.getenv('SUGGESTION_CACHE_SIZE', '2048')),
+        ttl=int(os.getenv('SUGGESTION_CACHE_TTL', '900')),
+        shared=build_shared_backend(
+            os.getenv('SUGGESTION_CACHE_BACKEND'),
+            get_connection=get_connection,
+            ttl=int(os.getenv('SUGGESTION_CACHE_SHARED_TTL', '86400'))
+        )
+    )
+
+
+def warm_recommendation_cache(recommendation_cache, get_connection):
+    try:
+        warmed = recommendation_cache.warm(get_connection, limit=int(os.getenv('RECOMMENDATION_CACHE_WARM', '500')))
+        logger.info("Recommendation cache warmed with %s entries", warmed)
+    except Exception as e:
+        logger.warning("Failed to warm recommendation cache: %s", e)
+
+
+def build_recommendation_cache(get_connection, warm=True):
+    """Cache keyed on a canonical (branch, year, interests, goals) profile, warmed from MySQL"""
+    recommendation_cache = RecommendationCache(
+        maxsize=int(os.getenv('RECOMMENDATION_CACHE_SIZE', '512')),
+        ttl=int(os.getenv('RECOMMENDATION_CACHE_TTL', str(6 * 3600)))
+    )
+    if warm:
+        warm_recommendation_cache(recommendation_cache, get_connection)
+    return recommendation_cache
+
+
+def suggestion_index_path():
+    return os.getenv('SUGGESTION_INDEX_PATH', os.path.join(BASE_DIR, 'suggestion_index.json'))
+
+
+def build_local_suggestion_index(get_connection, load=True):
+    """Suggestion index built from submitted goals, snapshotted to disk so workers start warm"""
+    path = suggestion_index_path()
+    suggestion_index = build_suggestion_index(
+        get_connection, path, load_db=load, max_nodes=int(os.getenv('SUGGESTION_INDEX_MAX_NODES', '100000'))
+    )
+    SuggestionIndexSync(
+        suggestion_index, get_connection, path,
+        interval=int(os.getenv('SUGGESTION_INDEX_SYNC_INTERVAL', '60'))
+    ).start()
+    return suggestion_index
+
+
+def build_pregenerated_store(get_connection, load=True):
+    """Pregenerated recommendations for popular profiles, reloaded when the table changes"""
+    pregenerated_store = PregeneratedStore(
+        get_connection,
+        window=parse_window(os.getenv('PREGEN_WINDOW', '1-6')),
+        refresh_interval=int(os.getenv('PREGEN_REFRESH_INTERVAL', '600'))
+    )
+    pregenerated_store.start(load=load)
+    return pregenerated_store
+
+
+def build_pregeneration_job(get_connection, generate, get_branch_data, pregenerated_store, start=True):
+    """Off-peak pregeneration of popular profiles, running in the background when PREGEN_LIMIT is set
+
+    Every worker starts the loop, but a MySQL named lock lets only one of them
+    work at a time. Returns None when it is off; with start=False (the CLI) the
+    job is built regardless, for PREGEN_LIMIT or 500 profiles.
+    """
+    limit = int(os.getenv('PREGEN_LIMIT', '0'))
+    if start and (limit <= 0 or generate is None):
+        return None
+    max_calls = int(os.getenv('PREGEN_MAX_CALLS', '0'))
+    pregeneration_job = PregenerationJob(
+        get_connection, generate, get_branch_data, pregenerated_store,
+        limit=limit if limit > 0 else 500,
+        goals_per_combination=int(os.getenv('PREGEN_GOALS_PER_PROFILE', '3')),
+        min_count=int(os.getenv('PREGEN_MIN_COUNT', '3')),
+        lookback_days=int(os.getenv('PREGEN_LOOKBACK_DAYS', '30')),
+        max_age_days=int(os.getenv('PREGEN_MAX_AGE_DAYS', '7')),
+        rate=float(os.getenv('PREGEN_RATE', '0.5')),
+        max_calls=max_calls if max_calls > 0 else None,
+        compression=os.getenv('RECOMMENDATION_COMPRESSION', 'zstd'),
+        interval=int(os.getenv('PREGEN_INTERVAL', '900'))
+    )
+    if start:
+        pregeneration_job.start()
+    return pregeneration_job
+
+
+def warm_up(get_connection, branch_catalog, recommendation_cache, suggestion_index, pregenerated_store=None):
+    """Load the catalog, recommendation cache, suggestion index and pregenerated entries on a background thread
+
+    Workers serve from the fallback catalog and the on-disk suggestion snapshot
+    until this finishes, so an unreachable MySQL never holds up boot.
+    """
+    def run():
+        started = time.monotonic()
+        try:
+            branch_catalog.load(force=True)
+        except Exception as e:
+            logger.error("Failed to load branch catalog: %s", e)
+        warm_recommendation_cache(recommendation_cache, get_connection)
+        try:
+            if suggestion_index.load_from_db(get_connection):
+                suggestion_index.save(suggestion_index_path())
+        except Exception as e:
+            logger.warning("Could not load goals for suggestion index: %s", e)
+        if pregenerated_store is not None:
+            try:
+                pregenerated_store.load(force=True)
+            except Exception as e:
+                logger.error("Failed to load pregenerated recommendations: %s", e)
+        logger.info("Worker warm-up finished in %.2fs", time.monotonic() - started)
+
+    thread = threading.Thread(target=run, name='worker-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def build_recommendation_writer(get_connection):
+    """Write-behind queue for recommendation inserts, spilling to disk while MySQL is down"""
+    recommendation_writer = RecommendationWriter(
+        get_connection,
+        spill_dir=os.getenv('RECOMMENDATION_SPILL_DIR', os.path.join(BASE_DIR, 'spill')),
+        maxsize=int(os.getenv('RECOMMENDATION_QUEUE_SIZE', '1000')),
+        batch_size=int(os.getenv('RECOMMENDATION_BATCH_SIZE', '50')),
+        compression=os.getenv('RECOMMENDATION_COMPRESSION', 'zstd')
+    )
+    recommendation_writer.start()
+    atexit.register(recommendation_writer.stop)
+    return recommendation_writer
+
+
+def build_retention_job(get_connection):
+    """Archive-and-drop job for old recommendations, running in the background when RETENTION_DAYS is set
+
+    Every worker starts the loop, but a MySQL named lock lets only one of them
+    work at a time. Returns None when retention is off.
+    """
+    retain_days = int(os.getenv('RETENTION_DAYS', '0'))
+    if retain_days <= 0:
+        return None
+    retention_job = RetentionJob(
+        get_connection,
+        archive_dir=os.getenv('RETENTION_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive')),
+        retain_days=retain_days,
+        batch_size=int(os.getenv('RETENTION_BATCH_SIZE', '2000')),
+        interval=int(os.getenv('RETENTION_INTERVAL', '86400'))
+    )
+    retention_job.start()
+    return retention_job
+
+
+def build_gemini_breakers():
+    """Circuit breakers with adaptive deadlines, tight for autocomplete and looser for recommendations"""
+    return {
+        'suggestions': CircuitBreaker(
+            'suggestions',
+            max_deadline=float(os.getenv('SUGGESTION_DEADLINE', '4')),
+            min_deadline=float(os.getenv('SUGGESTION_MIN_DEADLINE', '1'))
+        ),
+        'recommendations': CircuitBreaker(
+            'recommendations',
+            max_deadline=float(os.getenv('RECOMMENDATION_DEADLINE', '45')),
+            min_deadline=float(os.getenv('RECOMMENDATION_MIN_DEADLINE', '10'))
+        )
+    }
+
+
+def build_gemini_scheduler():
+    """Quota-aware admission for Gemini calls, with the project's quota split across workers
+
+    GEMINI_RPM and GEMINI_TPM are the project's per-minute limits. Both are
+    off unless set: a small quota split across workers leaves buckets of one
+    or two requests, which would shed concurrent students to the fallback
+    rather than let Gemini's own 429s pace them. Each gunicorn worker gets an
+    equal share, since WEB_CONCURRENCY workers draw on the same quota.
+    """
+    workers = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+    return GeminiScheduler(
+        rpm=float(os.getenv('GEMINI_RPM', '0')) / workers,
+        tpm=float(os.getenv('GEMINI_TPM', '0')) / workers,
+        burst_seconds=float(os.getenv('GEMINI_BURST_SECONDS', '10')),
+        max_wait={
+            INTERACTIVE: float(os.getenv('GEMINI_QUEUE_TIMEOUT_INTERACTIVE', '5')),
+            AUTOCOMPLETE: float(os.getenv('GEMINI_QUEUE_TIMEOUT_AUTOCOMPLETE', '0.5')),
+            BATCH: float(os.getenv('GEMINI_QUEUE_TIMEOUT_BATCH', '30'))
+        }
+    )
+
+
+def gemini_status(model, gemini_breakers):
+    """Overall Gemini availability derived from the breaker states"""
+    if not model:
+        return 'unavailable'
+    states = {breaker.state for breaker in gemini_breakers.values()}
+    if states == {'closed'}:
+        return 'available'
+    return 'open' if states == {'open'} else 'degraded'
+
+
+def fallback_reason(error):
+    """Metrics label for why a Gemini call fell back"""
+    if isinstance(error, QuotaExceeded):
+        return 'quota'
+    return 'circuit_open' if isinstance(error, CircuitOpenError) else 'api_error'
+
+
+def sse_event(data, event=None):
+    """Format a Server-Sent Events frame with a JSON payload"""
+    frame = f"event: {event}\n" if event else ''
+    return frame + f"data: {json.dumps(data)}\n\n"
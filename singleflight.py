@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one upstream call
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for and share its result or exception. Waiters give up after
+    their own timeout without affecting the leader.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'coalesced': 0, 'timeouts': 0, 'errors': 0}
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['leaders'] += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+                leader = False
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+                with self._lock:
+                    self._stats['errors'] += 1
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight call")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines sharing one event loop
+
+    The leader's call runs as a task, so a waiter timing out or being
+    cancelled never cancels the upstream call the others are waiting on.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {'leaders': 0, 'coalesced': 0, 'timeouts': 0, 'errors': 0}
+
+    def _finished(self, key, task):
+        self._calls.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self._stats['errors'] += 1
+
+    async def do(self, key, fn, timeout=None):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._stats['leaders'] += 1
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self._stats['coalesced'] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self._stats['timeouts'] += 1
+            raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight call")
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['in_flight'] = len(self._calls)
+        return stats
@@ -0,0 +1,343 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SEED_GOALS = [
+    "Become a data scientist at a tech company",
+    "Become a machine learning engineer",
+    "Become a full stack web developer",
+    "Become a software engineer at a product company",
+    "Become a cloud solutions architect",
+    "Become a cybersecurity analyst",
+    "Become a DevOps engineer",
+    "Become a mobile app developer",
+    "Become a product manager in tech",
+    "Become a UI/UX designer",
+    "Become a robotics engineer",
+    "Become an embedded systems engineer",
+    "Become a VLSI design engineer",
+    "Become a renewable energy engineer",
+    "Become a structural engineer",
+    "Become an automotive design engineer",
+    "Become a biomedical engineer",
+    "Become a business analyst",
+    "Become a management consultant",
+    "Become a financial analyst",
+    "Work in artificial intelligence research",
+    "Work on autonomous vehicles",
+    "Work on sustainable infrastructure projects",
+    "Work at a top tech company like Google or Microsoft",
+    "Start a tech startup",
+    "Start a fintech startup",
+    "Start a social impact startup",
+    "Pursue a PhD in machine learning",
+    "Pursue a master's degree abroad",
+    "Pursue an MBA after gaining work experience",
+    "Pursue research in quantum computing",
+    "Crack competitive programming contests",
+    "Contribute to open source projects",
+    "Prepare for GATE and higher studies",
+    "Get a government engineering job",
+    "Lead engineering teams at innovative companies",
+    "Build a career in game development",
+    "Build a career in data engineering",
+    "Build a career in blockchain development",
+    "Build a career in IoT and smart devices",
+]
+
+# Frecency: each use adds 2^((t - epoch) / half_life), so newer uses weigh more and scores only grow
+FRECENCY_EPOCH = 1704067200  # 2024-01-01
+MAX_KEY_LENGTH = 40
+MAX_PHRASE_LENGTH = 120
+TOP_K = 8
+# A phrase is found by its first few words; later ones add nodes for little recall
+MAX_KEYS_PER_PHRASE = 6
+# Nodes per worker, about 300 bytes each; past this, phrases only join paths that already exist
+MAX_NODES = 100000
+
+
+def normalize(text):
+    return re.sub(r'\s+', ' ', (text or '').strip().lower())
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self, children=None, top=None):
+        self.children = children if children is not None else {}
+        self.top = top if top is not None else []
+
+    def copy(self):
+        return _Node(dict(self.children), list(self.top))
+
+
+class SuggestionIndex:
+    """In-process autocomplete index over accepted goals and a curated seed list
+
+    Every phrase is indexed under the word-suffixes starting at its first
+    MAX_KEYS_PER_PHRASE words, so "data sc" matches "Become a data scientist".
+    Each trie node keeps the ids of its best TOP_K phrases by frecency; because
+    scores only increase, those lists can be maintained incrementally as new
+    goals arrive. Writers copy the nodes they change and swap the new root in,
+    so search() walks a trie that is never modified under it and takes no lock.
+    Once max_nodes exist, new phrases only update nodes already in the trie.
+    """
+
+    def __init__(self, half_life_days=30, top_k=TOP_K, max_nodes=MAX_NODES):
+        self.half_life = half_life_days * 86400
+        self.top_k = top_k
+        self.max_nodes = max_nodes
+        self._root = _Node()
+        self._nodes = 1
+        self._ids = {}
+        self._texts = []
+        self._scores = []
+        self.last_row_id = 0
+        self._lock = threading.Lock()
+
+    def _weight(self, timestamp):
+        return math.pow(2.0, (timestamp - FRECENCY_EPOCH) / self.half_life)
+
+    def _keys(self, normalized):
+        starts = [0] + [m.end() for m in re.finditer(r' ', normalized)]
+        return {normalized[start:start + MAX_KEY_LENGTH] for start in starts[:MAX_KEYS_PER_PHRASE]}
+
+    def _promote(self, node, phrase_id):
+        top = node.top
+        if phrase_id in top:
+            top.remove(phrase_id)
+        elif len(top) >= self.top_k and self._scores[top[-1]] >= self._scores[phrase_id]:
+            return
+        score = self._scores[phrase_id]
+        position = len(top)
+        while position > 0 and self._scores[top[position - 1]] < score:
+            position -= 1
+        top.insert(position, phrase_id)
+        del top[self.top_k:]
+
+    def add(self, text, timestamp=None, weight=1.0):
+        """Record one use of a phrase"""
+        self.add_many([(text, timestamp, weight)])
+
+    def add_many(self, uses):
+        """Record (text, timestamp, weight) uses of phrases, publishing them to searches at once"""
+        now = time.time()
+        with self._lock:
+            root = self._root.copy()
+            # Nodes copied or created for this batch; only these are changed
+            fresh = {id(root)}
+            for text, timestamp, weight in uses:
+                text = re.sub(r'\s+', ' ', (text or '').strip())
+                normalized = text.lower()
+                if len(normalized) < 3 or len(normalized) > MAX_PHRASE_LENGTH:
+                    continue
+                increment = weight * self._weight(timestamp if timestamp is not None else now)
+                phrase_id = self._ids.get(normalized)
+                if phrase_id is None:
+                    phrase_id = len(self._texts)
+                    self._ids[normalized] = phrase_id
+                    self._texts.append(text)
+                    self._scores.append(0.0)
+                else:
+                    # Show the most recently used casing
+                    self._texts[phrase_id] = text
+                self._scores[phrase_id] += increment
+
+                for key in self._keys(normalized):
+                    node = root
+                    for char in key:
+                        child = node.children.get(char)
+                        if child is None:
+                            if self._nodes >= self.max_nodes:
+                                break
+                            child = _Node()
+                            self._nodes += 1
+                        elif id(child) not in fresh:
+                            child = child.copy()
+                        else:
+                            node = child
+                            self._promote(node, phrase_id)
+                            continue
+                        fresh.add(id(child))
+                        node.children[char] = child
+                        node = child
+                        self._promote(node, phrase_id)
+            self._root = root
+
+    def search(self, query, limit=5):
+        """Best phrases containing a word that starts with the query"""
+        normalized = normalize(query)
+        if not normalized:
+            return []
+        # One root for the whole walk; writers replace it rather than change it
+        node = self._root
+        for char in normalized[:MAX_KEY_LENGTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        top = list(node.top)
+        if len(normalized) > MAX_KEY_LENGTH:
+            top = [i for i in top if normalized in self._texts[i].lower()]
+        return [self._texts[i] for i in top[:limit]]
+
+    def seed(self, phrases=SEED_GOALS):
+        # Seeds are dated at the epoch so real usage quickly outranks them
+        self.add_many((phrase, FRECENCY_EPOCH, 1.0) for phrase in phrases)
+
+    def load_from_db(self, get_connection, batch_size=5000):
+        """Add goals from recommendation rows newer than the last one seen"""
+        conn = get_connection()
+        if not conn:
+            return 0
+        added = 0
+        try:
+            cursor = conn.cursor()
+            while True:
+                cursor.execute(
+                    "SELECT id, goals, created_at FROM recommendations WHERE id > %s ORDER BY id LIMIT %s",
+                    (self.last_row_id, batch_size)
+                )
+                rows = cursor.fetchall()
+                self.add_many((goals, created_at.timestamp() if created_at else None, 1.0)
+                              for _, goals, created_at in rows)
+                if rows:
+                    self.last_row_id = rows[-1][0]
+                added += len(rows)
+                if len(rows) < batch_size:
+                    break
+            cursor.close()
+        finally:
+            conn.close()
+        return added
+
+    def save(self, path):
+        """Write the phrases and scores to disk atomically"""
+        with self._lock:
+            data = {
+                'half_life': self.half_life,
+                'last_row_id': self.last_row_id,
+                'phrases': [[text, score] for text, score in zip(self._texts, self._scores)]
+            }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, top_k=TOP_K, max_nodes=MAX_NODES):
+        """Rebuild an index from a file written by save()"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(half_life_days=data['half_life'] / 86400, top_k=top_k, max_nodes=max_nodes)
+        index.last_row_id = data['last_row_id']
+        # Replay each stored score as a single use weighted to match it
+        index.add_many((text, FRECENCY_EPOCH, score) for text, score in data['phrases'])
+        return index
+
+    def stats(self):
+        return {'phrases': len(self._texts), 'nodes': self._nodes, 'max_nodes': self.max_nodes,
+                'last_row_id': self.last_row_id}
+
+
+class SuggestionIndexSync:
+    """Background thread that pulls new goals from MySQL and snapshots the index to disk"""
+
+    def __init__(self, index, get_connection, path, interval=60):
+        self.index = index
+        self.get_connection = get_connection
+        self.path = path
+        self.interval = interval
+        self._thread = None
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if self.index.load_from_db(self.get_connection):
+                    self.index.save(self.path)
+            except Exception as e:
+                logger.error("Suggestion index sync failed: %s", e)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='suggestion-index-sync', daemon=True)
+            self._thread.start()
+
+
+def build_suggestion_index(get_connection, path, load_db=True, max_nodes=MAX_NODES):
+    """Load the index from its snapshot if present, then catch up from the database unless load_db is False"""
+    index = None
+    if path and os.path.exists(path):
+        try:
+            index = SuggestionIndex.load(path, max_nodes=max_nodes)
+        except Exception as e:
+            logger.warning("Could not load suggestion index snapshot: %s", e)
+    if index is None:
+        index = SuggestionIndex(max_nodes=max_nodes)
+        index.seed()
+    if not load_db:
+        return index
+    try:
+        if index.load_from_db(get_connection) and path:
+            index.save(path)
+    except Exception as e:
+        logger.warning("Could not load goals for suggestion index: %s", e)
+    return index
+
+
+def merge_suggestions(primary, extra, limit=5):
+    """Combine suggestion lists, dropping case-insensitive duplicates"""
+    merged = []
+    seen = set()
+    for suggestion in list(primary) + list(extra):
+        key = suggestion.lower()
+        if key not in seen:
+            seen.add(key)
+            merged.append(suggestion)
+    return merged[:limit]
+
+
+def template_suggestions(field, query, offline=False):
+    """Suggestions filled in from templates when neither the index nor Gemini has an answer
+
+    offline selects the generic list used when Gemini is not configured at all.
+    """
+    if field == 'goals':
+        return [
+            f"Become a {query} specialist in leading tech companies",
+            f"Start an innovative {query} startup company",
+            f"Pursue advanced research in {query} field",
+            f"Work on cutting-edge {query} projects globally",
+            f"Lead {query} teams in Fortune 500 companies"
+        ]
+    if offline:
+        return [
+            "Explore career opportunities in your field",
+            "Build expertise through hands-on projects",
+            "Network with industry professionals",
+            "Pursue continuous learning and skill development",
+            "Consider leadership roles in your domain"
+        ]
+    return [
+        f"Specialize in {query} technology",
+        f"Lead {query} projects in industry",
+        f"Research and develop {query} solutions",
+        f"Consult on {query} implementations",
+        f"Build {query}-focused products"
+    ]
+
+
+# Returned when suggestion handling itself fails
+ERROR_SUGGESTIONS = [
+    "Explore your interests deeper",
+    "Build practical skills",
+    "Network with professionals",
+    "Gain hands-on experience",
+    "Consider interdisciplinary approaches"
+]
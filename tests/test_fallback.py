@@ -0,0 +1,43 @@
+"""The fallback f-strings against the templates they mirror
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import fallback_branch_data  # noqa: E402
+from fallback import RENDERERS, load_templates, render_fallback  # noqa: E402
+
+PROFILES = [
+    ('Computer Science', '2nd Year', 'Artificial Intelligence, Web Development', 'Become a machine learning engineer'),
+    ('Civil Engineering', '1st Year', 'Sustainability', 'Work on {green} infrastructure, 100% of the time'),
+]
+
+
+class FallbackTemplateTest(unittest.TestCase):
+    def test_f_strings_match_the_templates(self):
+        templates = load_templates()
+        self.assertEqual(set(templates), set(RENDERERS))
+        for branch, year, interests, goals in PROFILES:
+            electives, clubs, internships = fallback_branch_data(branch)
+            # Every elective count the templates branch on, as tuples and as database lists
+            for count in range(1, len(electives) + 1):
+                for rows in (electives[:count], [list(row) for row in electives[:count]]):
+                    for kind, template in templates.items():
+                        expected = template.render(
+                            branch=branch, year=year, interests=interests, goals=goals,
+                            primary_interest=interests.split(',', 1)[0].strip(),
+                            electives=rows, clubs=clubs, internships=internships
+                        )
+                        with self.subTest(kind=kind, branch=branch, electives=count):
+                            self.assertEqual(
+                                render_fallback(kind, branch, year, interests, goals, rows, clubs, internships),
+                                expected
+                            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""HedgedModel against scripted fake tiers
+
+    python -m unittest discover tests
+"""
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeGenerativeModel  # noqa: E402
+from hedging import HedgedModel, ModelTier  # noqa: E402
+
+PROMPT = "Student profile: Computer Science, 2nd Year, interests AI, goals ML engineer"
+
+
+def tier(name, latencies_ms, history_s=None, window=200):
+    """A tier whose calls take the scripted latencies, with history_s already in its window"""
+    model = FakeGenerativeModel(name, latency_script=latencies_ms, response_bytes=200, error_rate=0, rpm=0)
+    model_tier = ModelTier(name, model, window=window, min_samples=20)
+    for latency in history_s or []:
+        model_tier.record(latency, 'ok')
+    return model_tier
+
+
+class HedgeDelayTest(unittest.TestCase):
+    def test_no_delay_until_min_samples(self):
+        primary = tier('primary', [10], history_s=[0.1] * 19)
+        self.assertIsNone(primary.hedge_delay(0.9, 0.0))
+        primary.record(0.1, 'ok')
+        self.assertEqual(primary.hedge_delay(0.9, 0.0), 0.1)
+
+    def test_delay_is_the_quantile_of_the_window(self):
+        primary = tier('primary', [10], history_s=[0.1] * 18 + [1.0] * 2)
+        self.assertEqual(primary.hedge_delay(0.9, 0.0), 1.0)
+        self.assertEqual(primary.hedge_delay(0.5, 0.0), 0.1)
+        self.assertEqual(primary.hedge_delay(0.5, 0.3), 0.3)
+
+    def test_errors_stay_out_of_the_window(self):
+        primary = tier('primary', [10], history_s=[0.1] * 20)
+        primary.record(5.0, 'error')
+        self.assertEqual(primary.stats(0.9)['samples'], 20)
+        self.assertEqual(primary.stats(0.9)['errors'], 1)
+
+
+class HedgingTest(unittest.TestCase):
+    def hedged(self, primary, secondary, **kwargs):
+        kwargs.setdefault('min_delay', 0.0)
+        kwargs.setdefault('max_hedge_ratio', 1.0)
+        return HedgedModel([primary, secondary], **kwargs)
+
+    def test_fast_primary_is_not_hedged(self):
+        model = self.hedged(tier('primary', [20], history_s=[0.1] * 20), tier('secondary', [20]))
+        model.generate_content(PROMPT)
+        stats = model.stats()
+        self.assertEqual(stats['hedged'], 0)
+        self.assertEqual(model.tiers[1].model.calls, 0)
+
+    def test_slow_primary_is_hedged_at_its_delay(self):
+        model = self.hedged(tier('primary', [600], history_s=[0.05] * 20), tier('secondary', [20]))
+        started = time.monotonic()
+        model.generate_content(PROMPT)
+        elapsed = time.monotonic() - started
+        # Hedged at 50ms, answered by the secondary 20ms later instead of waiting 600ms
+        self.assertGreaterEqual(elapsed, 0.06)
+        self.assertLess(elapsed, 0.4)
+        stats = model.stats()
+        self.assertEqual((stats['hedged'], stats['hedges_won']), (1, 1))
+        # The sync primary cannot be interrupted; it is left to finish
+        self.assertEqual(stats['tiers']['primary']['abandoned'], 1)
+
+    def test_async_loser_is_cancelled_and_recorded(self):
+        primary = tier('primary', [600], history_s=[0.05] * 20)
+        model = self.hedged(primary, tier('secondary', [20]))
+
+        async def run():
+            response = await model.generate_content_async(PROMPT)
+            # Let the cancellation reach the primary's task
+            await asyncio.sleep(0.01)
+            return response
+
+        self.assertTrue(asyncio.run(run()).text)
+        stats = model.stats()
+        self.assertEqual(stats['tiers']['primary']['cancelled'], 1)
+        self.assertEqual(stats['tiers']['secondary']['wins'], 1)
+        # The cancelled call is in the window as a lower bound, above every earlier sample
+        self.assertEqual(stats['tiers']['primary']['samples'], 21)
+        self.assertGreater(primary.hedge_delay(1.0, 0.0), 0.06)
+
+    def test_hedge_rate_is_capped(self):
+        # 100 fast samples keep the primary's p90 at 10ms while its live calls take 60ms
+        model = self.hedged(tier('primary', [60], history_s=[0.01] * 100), tier('secondary', [5]),
+                            max_hedge_ratio=0.2, window=50)
+        for _ in range(10):
+            model.generate_content(PROMPT)
+        stats = model.stats()
+        self.assertEqual(stats['requests'], 10)
+        self.assertLessEqual(stats['hedged'], 2)
+        self.assertGreaterEqual(stats['hedges_skipped'], 8)
+        self.assertLessEqual(stats['hedge_rate'], 0.2)
+
+    def test_hedge_needs_quota(self):
+        refused = []
+        model = self.hedged(tier('primary', [100], history_s=[0.01] * 20), tier('secondary', [5]),
+                            admit=lambda prompt, priority: refused.append((prompt, priority)))
+        model.generate_content(PROMPT, priority='batch')
+        stats = model.stats()
+        self.assertEqual(refused, [(PROMPT, 'batch')])
+        self.assertEqual((stats['hedged'], stats['hedges_no_quota']), (0, 1))
+        self.assertEqual(model.tiers[1].model.calls, 0)
+
+    def test_hedge_ticket_is_settled_with_its_response(self):
+        settled = []
+        model = self.hedged(tier('primary', [300], history_s=[0.01] * 20), tier('secondary', [5]),
+                            admit=lambda prompt, priority: ('ticket', priority),
+                            settle=lambda ticket, response, called: settled.append((ticket, response, called)))
+        response = model.generate_content(PROMPT, priority='interactive')
+        self.assertEqual(settled, [(('ticket', 'interactive'), response, True)])
+
+    def test_cancelled_async_hedge_is_settled(self):
+        settled = []
+        # The hedge is slower than the primary it was sent after, so it loses and is cancelled
+        model = self.hedged(tier('primary', [80], history_s=[0.01] * 20), tier('secondary', [600]),
+                            admit=lambda prompt, priority: 'ticket',
+                            settle=lambda ticket, response, called: settled.append((ticket, response, called)))
+
+        async def run():
+            await model.generate_content_async(PROMPT)
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        self.assertEqual(settled, [('ticket', None, True)])
+
+if __name__ == '__main__':
+    unittest.main()
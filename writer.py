@@ -0,0 +1,220 @@
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from compression import compress_text
+
+logger = logging.getLogger(__name__)
+
+INSERT_SQL = (
+    "INSERT INTO recommendations "
+    "(session_id, branch, year, interests, goals, recommendation, summary, source, created_at) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+)
+
+_STOP = object()
+
+
+class RecommendationWriter:
+    """Write-behind queue that batches recommendation inserts on a background thread
+
+    Rows are buffered in a bounded queue and written with one executemany and
+    one commit per batch. If MySQL is unavailable the batch is appended to a
+    local JSONL spill file, which is replayed once a later batch succeeds.
+    The recommendation text is compressed with `compression` only at insert
+    time, so queued and spilled rows stay plain JSON.
+    """
+
+    def __init__(self, get_connection, spill_dir, maxsize=1000, batch_size=50,
+                 flush_interval=0.5, enqueue_timeout=0.05, compression='zstd'):
+        self.get_connection = get_connection
+        self.spill_dir = spill_dir
+        self.spill_path = os.path.join(spill_dir, f"recommendations-{os.getpid()}.jsonl")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.compression = compression
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {
+            'enqueued': 0, 'written': 0, 'batches': 0, 'dropped': 0,
+            'spilled': 0, 'replayed': 0, 'failed_batches': 0
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='recommendation-writer', daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def make_row(session_id, branch, year, interests, goals, recommendation, summary, source='gemini'):
+        return (session_id, branch, year, interests, goals, recommendation, summary, source,
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+    def submit(self, session_id, branch, year, interests, goals, recommendation, summary, source='gemini'):
+        """Queue a row; returns False when the queue stayed full and the row was dropped"""
+        row = self.make_row(session_id, branch, year, interests, goals, recommendation, summary, source)
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._count('dropped')
+            logger.warning("Recommendation write queue full, dropping row")
+            return False
+        self._count('enqueued')
+        return True
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write(batch)
+            if stopping:
+                # Drain whatever arrived before shutdown
+                remaining = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        remaining.append(item)
+                for start in range(0, len(remaining), self.batch_size):
+                    self._write(remaining[start:start + self.batch_size])
+                return
+
+    def _insert(self, rows):
+        conn = self.get_connection()
+        if not conn:
+            raise ConnectionError("Database not available")
+        try:
+            cursor = conn.cursor()
+            with metrics.stage('recommendation_insert', 'background'):
+                rows = [row[:5] + (compress_text(row[5], self.compression),) + tuple(row[6:]) for row in rows]
+                cursor.executemany(INSERT_SQL, rows)
+                conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def _write(self, batch):
+        try:
+            self._insert(batch)
+        except Exception as e:
+            self._count('failed_batches')
+            logger.error("Failed to write %s recommendations, spilling to disk: %s", len(batch), e)
+            self._spill(batch)
+            return
+        self._count('written', len(batch))
+        self._count('batches')
+        self._replay_spill()
+
+    def write_now(self, rows):
+        """Insert rows on the caller's thread in batch_size chunks, bypassing the queue
+
+        Used by bulk jobs that already hold many rows. Chunks that fail are
+        spilled and replayed like queued batches.
+        """
+        for start in range(0, len(rows), self.batch_size):
+            self._write(rows[start:start + self.batch_size])
+
+    def _spill(self, rows):
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(row) + '\n')
+            self._count('spilled', len(rows))
+        except Exception as e:
+            self._count('dropped', len(rows))
+            logger.error("Failed to spill recommendations to %s: %s", self.spill_path, e)
+
+    def _claimable_spill_files(self):
+        """This worker's spill file plus any left behind by workers that have exited"""
+        paths = []
+        for path in glob.glob(os.path.join(self.spill_dir, 'recommendations-*.jsonl')):
+            try:
+                pid = int(os.path.basename(path).split('-')[1].split('.')[0])
+            except ValueError:
+                continue
+            if pid != os.getpid():
+                try:
+                    os.kill(pid, 0)
+                    continue
+                except ProcessLookupError:
+                    pass
+                except PermissionError:
+                    continue
+            paths.append(path)
+        return paths
+
+    def _replay_spill(self):
+        for path in self._claimable_spill_files():
+            claimed = f"{path}.replaying-{os.getpid()}"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            with open(claimed, encoding='utf-8') as f:
+                rows = [tuple(json.loads(line)) for line in f if line.strip()]
+            try:
+                for start in range(0, len(rows), self.batch_size):
+                    self._insert(rows[start:start + self.batch_size])
+                    self._count('replayed', min(self.batch_size, len(rows) - start))
+            except Exception as e:
+                logger.error("Spill replay failed, will retry later: %s", e)
+                # Put the unreplayed rows back so the next successful batch retries them
+                with open(path, 'a', encoding='utf-8') as f:
+                    for row in rows[start:]:
+                        f.write(json.dumps(row) + '\n')
+            else:
+                logger.info("Replayed %s spilled recommendations from %s", len(rows), os.path.basename(path))
+            os.remove(claimed)
+
+    def stop(self, timeout=10):
+        """Flush queued rows and stop the writer thread"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("Recommendation write queue still full at shutdown")
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['spill_pending'] = os.path.exists(self.spill_path)
+        return stats